@@ -0,0 +1,101 @@
+"""In-memory stand-ins for the gspread client, used by the Google Sheets loader tests and benchmarks."""
+import json
+import gspread
+import requests
+
+def make_api_error(status_code, message="Simulated API error", retry_after=None):
+    """Builds a gspread APIError the way gspread does, from an HTTP response."""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps({'error': {'code': status_code, 'message': message, 'status': ''}}).encode()
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(retry_after)
+    return gspread.exceptions.APIError(response)
+
+class FakeWorksheet:
+    """
+    Grid of cell values with the gspread methods the loader uses. Like the real API, writes
+    outside the grid fail, and `failures` (a list of status codes) makes the next calls raise APIError.
+    """
+    def __init__(self, title, rows=1, cols=1):
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self.cells = {}
+        self.failures = []
+        self.calls = []
+
+    def _maybe_fail(self, method):
+        self.calls.append(method)
+        if self.failures:
+            raise make_api_error(self.failures.pop(0))
+
+    def resize(self, rows=None, cols=None):
+        self._maybe_fail('resize')
+        self.row_count = rows or self.row_count
+        self.col_count = cols or self.col_count
+        self.cells = {(r, c): v for (r, c), v in self.cells.items() if r <= self.row_count and c <= self.col_count}
+
+    def clear(self):
+        self._maybe_fail('clear')
+        self.cells = {}
+
+    def _write(self, start_row, start_col, values):
+        for row_offset, row in enumerate(values):
+            for col_offset, value in enumerate(row):
+                row_number, col_number = start_row + row_offset, start_col + col_offset
+                if row_number > self.row_count or col_number > self.col_count:
+                    raise make_api_error(400, f"Range exceeds grid limits: row {row_number}, col {col_number}")
+                self.cells[(row_number, col_number)] = value
+
+    def batch_update(self, data, **kwargs):
+        self._maybe_fail('batch_update')
+        for item in data:
+            start_row, start_col = gspread.utils.a1_to_rowcol(item['range'].split(':')[0])
+            self._write(start_row, start_col, item['values'])
+
+    def update(self, values, range_name='A1', **kwargs):
+        self._maybe_fail('update')
+        self.row_count = max(self.row_count, len(values))
+        self.col_count = max(self.col_count, max(len(row) for row in values))
+        start_row, start_col = gspread.utils.a1_to_rowcol(range_name)
+        self._write(start_row, start_col, values)
+
+    def append_rows(self, values, **kwargs):
+        self._maybe_fail('append_rows')
+        start_row = max((r for r, _ in self.cells), default=0) + 1
+        self.row_count = max(self.row_count, start_row + len(values) - 1)
+        self._write(start_row, 1, values)
+
+    def get_all_values(self):
+        return [[self.cells.get((r, c), '') for c in range(1, self.col_count + 1)]
+                for r in range(1, self.row_count + 1)]
+
+class FakeSpreadsheet:
+    def __init__(self, title, url="https://docs.google.com/spreadsheets/d/fake"):
+        self.title = title
+        self.url = url
+        self.worksheets = {}
+
+    def worksheet(self, title):
+        if title not in self.worksheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self.worksheets[title]
+
+    def add_worksheet(self, title, rows, cols):
+        self.worksheets[title] = FakeWorksheet(title, int(rows), int(cols))
+        return self.worksheets[title]
+
+class FakeClient:
+    """Stand-in for the client returned by gspread.service_account."""
+    def __init__(self, spreadsheet=None):
+        self.spreadsheet = spreadsheet or FakeSpreadsheet("Fashion Studio Products")
+
+    def open_by_url(self, url):
+        return self.spreadsheet
+
+    def open(self, title):
+        return self.spreadsheet
+
+    def create(self, title):
+        return self.spreadsheet
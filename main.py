@@ -1,59 +1,308 @@
-from utils.extract import extract_all_products
+from utils.extract import extract_all_products, iter_extract_chunks
 from utils.transform import transform_data
-from utils.load import save_to_csv, save_to_postgresql, save_to_google_sheets
-from utils.config import CSV_FILE_PATH, POSTGRES_TABLE_NAME, GOOGLE_SHEET_NAME
+from utils.load import (
+    save_to_csv, save_to_postgresql, save_to_google_sheets, save_to_parquet,
+    apply_changes_to_csv, apply_changes_to_postgresql, apply_changes_to_google_sheets, dispatch_sinks
+)
+from utils.cdc import load_with_cdc, drop_snapshot
+from utils.history import record_history
+from utils.metrics import METRICS, record_stage, compare_reports
+from utils.diagnostics import parse_failure_scope
+from utils.dedup import Deduplicator, BloomFilter
+from utils.artifacts import save_artifact, load_artifact, artifact_info, update_artifact_info
+from utils.config import (
+    CSV_FILE_PATH, POSTGRES_TABLE_NAME, GOOGLE_SHEET_NAME, STREAMING_MODE, STREAM_CHUNK_SIZE,
+    INCREMENTAL_LOAD, SAVE_PARQUET, PARQUET_FILE_PATH, PARQUET_PARTITION_COLS, RECORD_HISTORY,
+    METRICS_REPORT_PATH, METRICS_PROMETHEUS_PATH, METRICS_BASELINE_PATH, METRICS_REGRESSION_THRESHOLD,
+    DEDUP_FILTER_PATH, SAVE_ARTIFACTS, ARTIFACT_DIR, CDC_SNAPSHOT_DIR
+)
+import argparse
+from datetime import datetime
+import json
 import logging
+import os
 import pandas as pd
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def run_etl_pipeline():
-    """Runs the full ETL pipeline."""
+def write_run_report():
+    """
+    Writes the metrics of this run (JSON report, optional Prometheus text file and profiles)
+    and warns about stages that got slower than in the baseline report.
+    """
+    report = METRICS.report()
+    if METRICS_REPORT_PATH:
+        METRICS.write_json(METRICS_REPORT_PATH)
+        logging.info(f"Run report written to {METRICS_REPORT_PATH}")
+    if METRICS_PROMETHEUS_PATH:
+        METRICS.write_prometheus(METRICS_PROMETHEUS_PATH)
+    for path in METRICS.write_profiles():
+        logging.info(f"Profile written to {path}")
+    if METRICS_BASELINE_PATH and os.path.exists(METRICS_BASELINE_PATH):
+        with open(METRICS_BASELINE_PATH, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        for regression in compare_reports(report, baseline, METRICS_REGRESSION_THRESHOLD):
+            logging.warning(f"Performance regression against baseline: {regression}")
+
+# Pipeline stages, in order; each checkpoints its output (see utils/artifacts.py)
+STAGES = ['extract', 'transform', 'load']
+# Sink names accepted by --sinks and the names they are reported under
+SINK_LABELS = {
+    'csv': 'CSV',
+    'postgresql': 'PostgreSQL',
+    'sheets': 'Google Sheets',
+    'parquet': 'Parquet',
+    'history': 'History',
+}
+
+def default_sinks():
+    """Sinks loaded when none are selected: CSV, PostgreSQL, Google Sheets and the configured extras."""
+    sinks = ['csv', 'postgresql', 'sheets']
+    if SAVE_PARQUET:
+        sinks.append('parquet')
+    if RECORD_HISTORY:
+        sinks.append('history')
+    return sinks
+
+def full_rewrite(cdc_sink, load):
+    """
+    Wraps `load(df)`, which rewrites or appends to a sink outside load_with_cdc, so the
+    sink's CDC snapshot is dropped first: it would no longer describe what the sink holds.
+    """
+    def rewrite(df, *args, **kwargs):
+        drop_snapshot(cdc_sink, CDC_SNAPSHOT_DIR)
+        return load(df, *args, **kwargs)
+    return rewrite
+
+def build_sinks(selected=None):
+    """Returns {label: loader} for the `selected` sink names (default_sinks() by default)."""
+    # The sinks are independent and run concurrently; with INCREMENTAL_LOAD each sink
+    # only receives the rows changed since its last load
+    if INCREMENTAL_LOAD:
+        loaders = {
+            'csv': lambda df: load_with_cdc(df, 'csv', lambda changes: apply_changes_to_csv(changes, CSV_FILE_PATH)),
+            'postgresql': lambda df: load_with_cdc(
+                df, 'postgresql', lambda changes: apply_changes_to_postgresql(changes, POSTGRES_TABLE_NAME)),
+            'sheets': lambda df: load_with_cdc(df, 'google_sheets', apply_changes_to_google_sheets),
+        }
+    else:
+        loaders = {
+            'csv': full_rewrite('csv', lambda df: save_to_csv(df, CSV_FILE_PATH)),
+            'postgresql': full_rewrite('postgresql', lambda df: save_to_postgresql(df, POSTGRES_TABLE_NAME)),
+            'sheets': full_rewrite('google_sheets', save_to_google_sheets),
+        }
+    loaders['parquet'] = lambda df: save_to_parquet(df, PARQUET_FILE_PATH, partition_cols=PARQUET_PARTITION_COLS)
+    loaders['history'] = record_history
+    unknown = [name for name in selected or () if name not in SINK_LABELS]
+    if unknown:
+        raise ValueError(f"Unknown sink(s) {', '.join(unknown)}. Choose from: {', '.join(SINK_LABELS)}")
+    return {SINK_LABELS[name]: loaders[name] for name in (selected or default_sinks())}
+
+def resume_stages(stages, pages=None, artifact_dir=ARTIFACT_DIR):
+    """
+    Returns the `stages` a resumed run still has to run, given the checkpoints in
+    `artifact_dir`, or None if those checkpoints cannot be resumed: they were extracted
+    for other `pages`. Checkpoints of a run whose load completed are not resumed; the run
+    starts over.
+    """
+    raw, clean = artifact_info('raw', artifact_dir), artifact_info('clean', artifact_dir)
+    if clean is not None and raw is not None and clean.get('run_id') != raw.get('run_id'):
+        clean = None # Derived from another extract
+    latest = clean or raw
+    if latest is None or latest.get('loaded'):
+        return stages
+    requested = list(pages) if pages is not None else None
+    if latest.get('pages') != requested:
+        logging.error(f"The checkpoints in {artifact_dir} were extracted for pages {latest.get('pages') or 'all'}, "
+                      f"not {requested or 'all'}; cannot resume. Run without --resume to start over.")
+        return None
+    if clean is not None and 'load' in stages:
+        return ['load']
+    if raw is not None and 'transform' in stages:
+        return [stage for stage in stages if stage != 'extract']
+    return stages
+
+def run_etl_pipeline(stages=STAGES, sinks=None, pages=None, max_workers=None, parse_workers=None,
+                     resume=False, artifact_dir=ARTIFACT_DIR):
+    """
+    Runs the ETL pipeline, or only the `stages` given ('extract', 'transform', 'load').
+    A stage whose predecessor is not run reads that predecessor's checkpoint from
+    `artifact_dir`; with `resume`, stages whose output is already checkpointed by an
+    unfinished run are skipped (see resume_stages). The sinks that succeed are recorded in the
+    transform checkpoint, and a resumed load only reruns the sinks that have not; once every
+    sink succeeded, the checkpoints are marked as loaded.
+    `sinks` selects the sinks to load (names of SINK_LABELS), `pages` the page numbers to
+    extract, `max_workers`/`parse_workers` the extraction concurrency.
+    Returns True if every stage run (and every sink) succeeded.
+    """
+    stages = [stage for stage in STAGES if stage in stages]
+    if resume:
+        stages = resume_stages(stages, pages, artifact_dir)
+        if stages is None:
+            return False
+        logging.info(f"Resuming: running stage(s) {', '.join(stages)}.")
     logging.info("Starting ETL Pipeline...")
+    METRICS.reset()
+    raw_product_data = cleaned_product_data = None
 
     # 1. Extract
-    logging.info("--- Extract Phase ---")
-    raw_product_data = extract_all_products()
-    if raw_product_data.empty:
-        logging.error("Extraction failed or returned no data. ETL pipeline cannot continue.")
-        return
-    logging.info(f"Successfully extracted {len(raw_product_data)} raw product entries.")
+    if 'extract' in stages:
+        logging.info("--- Extract Phase ---")
+        with record_stage('extract') as stage:
+            raw_product_data = extract_all_products(max_workers=max_workers, parse_workers=parse_workers, pages=pages)
+            stage.rows_out = len(raw_product_data)
+        if raw_product_data.empty:
+            logging.error("Extraction failed or returned no data. ETL pipeline cannot continue.")
+            return False
+        logging.info(f"Successfully extracted {len(raw_product_data)} raw product entries.")
+        if SAVE_ARTIFACTS:
+            save_artifact(raw_product_data, 'raw', artifact_dir, pages=list(pages) if pages is not None else None,
+                          run_id=datetime.now().strftime('%Y%m%dT%H%M%S%f'))
 
     # 2. Transform
-    logging.info("--- Transform Phase ---")
-    cleaned_product_data = transform_data(raw_product_data)
-    if cleaned_product_data.empty:
-        logging.error("Transformation failed or resulted in no data. ETL pipeline cannot continue.")
-        return
-    logging.info(f"Successfully transformed data. {len(cleaned_product_data)} products ready for loading.")
-    print(cleaned_product_data.head())
-    print(cleaned_product_data.info())
-
+    if 'transform' in stages:
+        logging.info("--- Transform Phase ---")
+        if raw_product_data is None:
+            raw_product_data = load_artifact('raw', artifact_dir)
+            if raw_product_data is None:
+                logging.error(f"No extract checkpoint in {artifact_dir}; run the extract stage first.")
+                return False
+        with record_stage('transform', rows_in=len(raw_product_data)) as stage:
+            cleaned_product_data = transform_data(raw_product_data)
+            stage.rows_out = len(cleaned_product_data)
+        if cleaned_product_data.empty:
+            logging.error("Transformation failed or resulted in no data. ETL pipeline cannot continue.")
+            return False
+        logging.info(f"Successfully transformed data. {len(cleaned_product_data)} products ready for loading.")
+        logging.debug(f"Transformed data sample:\n{cleaned_product_data.head()}\n{cleaned_product_data.dtypes}")
+        if SAVE_ARTIFACTS:
+            raw_info = artifact_info('raw', artifact_dir) or {}
+            save_artifact(cleaned_product_data, 'clean', artifact_dir, pages=raw_info.get('pages'),
+                          run_id=raw_info.get('run_id'))
 
     # 3. Load
-    logging.info("--- Load Phase ---")
-    # Load to CSV
-    csv_success = save_to_csv(cleaned_product_data, CSV_FILE_PATH)
-    if csv_success:
-        logging.info(f"Data loaded to CSV: {CSV_FILE_PATH}")
-    else:
-        logging.warning("Failed to load data to CSV.")
+    success = True
+    if 'load' in stages:
+        logging.info("--- Load Phase ---")
+        if cleaned_product_data is None:
+            cleaned_product_data = load_artifact('clean', artifact_dir)
+            if cleaned_product_data is None:
+                logging.error(f"No transform checkpoint in {artifact_dir}; run the transform stage first.")
+                return False
+        selected = list(sinks or default_sinks())
+        loaded_sinks = set((artifact_info('clean', artifact_dir) or {}).get('loaded_sinks', [])) if resume else set()
+        pending = [name for name in selected if name not in loaded_sinks]
+        if len(pending) < len(selected):
+            logging.info(f"Resuming: sink(s) {', '.join(name for name in selected if name in loaded_sinks)} "
+                         f"already loaded this run.")
+        results = dispatch_sinks(cleaned_product_data, build_sinks(pending)) if pending else {}
+        for name in pending:
+            if results[SINK_LABELS[name]]['success']:
+                loaded_sinks.add(name)
+            else:
+                success = False
+                logging.warning(f"Failed to load data to {SINK_LABELS[name]}.")
+        update_artifact_info('clean', artifact_dir, loaded_sinks=sorted(loaded_sinks), loaded=success)
 
-    # Load to PostgreSQL
-    pg_success = save_to_postgresql(cleaned_product_data, POSTGRES_TABLE_NAME)
-    if pg_success:
-        logging.info(f"Data loaded to PostgreSQL table: {POSTGRES_TABLE_NAME}")
-    else:
-        logging.warning("Failed to load data to PostgreSQL.")
+    write_run_report()
+    logging.info("ETL Pipeline finished.")
+    return success
 
-    # Load to Google Sheets
-    gs_success = save_to_google_sheets(cleaned_product_data) 
-    if gs_success:
-        logging.info(f"Data loaded to Google Sheets (details in config/.env).")
-    else:
-        logging.warning("Failed to load data to Google Sheets.")
+def run_streaming_etl_pipeline(chunk_size=STREAM_CHUNK_SIZE, pages=None, max_workers=None):
+    """
+    Runs the ETL pipeline chunk by chunk: each extracted chunk is transformed (with
+    deduplication across chunks) and appended to the CSV file and PostgreSQL table,
+    so peak memory is bounded by the chunk size. Google Sheets is not loaded in this mode.
+    With DEDUP_FILTER_PATH set, products emitted by earlier runs are skipped as well and
+    the new ones are appended to the existing CSV file and table.
+    `pages`/`max_workers` select the page numbers and extraction concurrency.
+    Returns True if every chunk was loaded.
+    """
+    logging.info("Starting streaming ETL Pipeline...")
+    METRICS.reset()
+    seen_filter = BloomFilter.open(DEDUP_FILTER_PATH) if DEDUP_FILTER_PATH else None
+    deduplicator = Deduplicator(seen_filter=seen_filter)
+    save_csv = full_rewrite('csv', save_to_csv)
+    save_postgresql = full_rewrite('postgresql', save_to_postgresql)
+    raw_rows = loaded_rows = chunk_count = 0
+    csv_ok = pg_ok = True
 
-    logging.info("ETL Pipeline finished.")
+    # One parse failure summary for the whole stream rather than one per chunk
+    with parse_failure_scope():
+        for raw_chunk in iter_extract_chunks(chunk_size=chunk_size, max_workers=max_workers, pages=pages):
+            chunk_count += 1
+            raw_rows += len(raw_chunk)
+            cleaned_chunk = transform_data(raw_chunk, deduplicator=deduplicator)
+            if cleaned_chunk.empty:
+                continue
+            # Without the filter every run rewrites the outputs; with it they are appended to,
+            # once they exist
+            first_load = loaded_rows == 0 and (seen_filter is None or not os.path.exists(CSV_FILE_PATH))
+            csv_ok = save_csv(cleaned_chunk, CSV_FILE_PATH, mode='w' if first_load else 'a') and csv_ok
+            pg_ok = save_postgresql(cleaned_chunk, POSTGRES_TABLE_NAME,
+                                       if_exists='replace' if first_load else 'append') and pg_ok
+            loaded_rows += len(cleaned_chunk)
+
+    if loaded_rows == 0:
+        if seen_filter is not None and raw_rows:
+            logging.info("No products that were not loaded by an earlier run.")
+            return True
+        logging.error("Streaming pipeline produced no data to load.")
+        return False
+    logging.info(f"Streamed {raw_rows} raw rows in {chunk_count} chunk(s); {loaded_rows} products loaded.")
+    if not csv_ok:
+        logging.warning("One or more chunks failed to load to CSV.")
+    if not pg_ok:
+        logging.warning("One or more chunks failed to load to PostgreSQL.")
+    if seen_filter is not None:
+        if csv_ok and pg_ok:
+            deduplicator.commit(DEDUP_FILTER_PATH)
+        else:
+            logging.warning(f"Not recording this run's products in {DEDUP_FILTER_PATH}; they will be retried next run.")
+    logging.info("Google Sheets is skipped in streaming mode; run the batch pipeline to refresh it.")
+    write_run_report()
+    logging.info("Streaming ETL Pipeline finished.")
+    return csv_ok and pg_ok
+
+def parse_pages(text):
+    """Parses a page selection such as '1-10', '3' or '1-5,8,10-12' into a sorted list of page numbers."""
+    pages = set()
+    for part in text.split(','):
+        first, _, last = part.strip().partition('-')
+        try:
+            first, last = int(first), int(last or first)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid page selection '{text}' (expected e.g. 1-10 or 1-5,8)")
+        if first < 1 or last < first:
+            raise argparse.ArgumentTypeError(f"invalid page range '{part.strip()}'")
+        pages.update(range(first, last + 1))
+    return sorted(pages)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract, clean and load the Fashion Studio catalog.")
+    parser.add_argument("--stage", nargs="+", choices=STAGES + ['all'], default=['all'],
+                        help="Stage(s) to run; a stage whose predecessor is not run reads its checkpoint")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip the stages whose output is already checkpointed")
+    parser.add_argument("--sinks", nargs="+", choices=list(SINK_LABELS),
+                        help=f"Sinks to load (default: {' '.join(default_sinks())})")
+    parser.add_argument("--pages", type=parse_pages, help="Pages to extract, e.g. 1-10 or 1-5,8 (default: all)")
+    parser.add_argument("--workers", type=int, help="Page fetch threads")
+    parser.add_argument("--parse-workers", type=int, help="Parse processes (0 parses in the fetch threads)")
+    parser.add_argument("--artifact-dir", default=ARTIFACT_DIR, help="Directory of the stage checkpoints")
+    parser.add_argument("--streaming", action="store_true", default=STREAMING_MODE,
+                        help="Extract, transform and load page by page (CSV and PostgreSQL only)")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE, help="Rows per chunk in streaming mode")
+    args = parser.parse_args(argv)
+
+    if args.streaming:
+        success = run_streaming_etl_pipeline(args.chunk_size, pages=args.pages, max_workers=args.workers)
+    else:
+        stages = STAGES if 'all' in args.stage else args.stage
+        success = run_etl_pipeline(stages, sinks=args.sinks, pages=args.pages, max_workers=args.workers,
+                                   parse_workers=args.parse_workers, resume=args.resume,
+                                   artifact_dir=args.artifact_dir)
+    return 0 if success else 1
 
 if __name__ == "__main__":
-    run_etl_pipeline()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
@@ -0,0 +1,24 @@
+import pytest
+import pandas as pd
+from datetime import datetime
+
+@pytest.fixture(autouse=True)
+def disable_page_cache(monkeypatch):
+    """Keeps tests from reading or writing the on-disk page and transform caches in the working directory."""
+    monkeypatch.setattr('utils.extract.USE_PAGE_CACHE', False)
+    monkeypatch.setattr('utils.transform.USE_TRANSFORM_CACHE', False)
+
+@pytest.fixture
+def sample_raw_df():
+    """Provides a sample raw DataFrame for testing transformations."""
+    now = datetime.now()
+    data = {
+        'Title': ["Product A", "Product B", "Unknown Product", "Product C", "Product A"],
+        'Price': ["$10.50", "Price Unavailable", "$5.00", "$20", "$10.50"],
+        'Rating': ["Rating: ⭐ 4.5 / 5", "Rating: Invalid Rating / 5", "Rating: ⭐ 3.0 / 5", "Rating: 2 / 5", "Rating: ⭐ 4.5 / 5"],
+        'Colors': ["3 Colors", "2 Colors", "1 Color", "No Colors Here", "3 Colors"],
+        'Size': ["Size: M", "Size: L", "Size: S", "Size: XL", "Size: M"],
+        'Gender': ["Gender: Men", "Gender: Women", "Gender: Unisex", "Gender: Men", "Gender: Men"],
+        'Timestamp': [now, now, now, now, now]
+    }
+    return pd.DataFrame(data)
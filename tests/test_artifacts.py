@@ -0,0 +1,42 @@
+import json
+import sys
+import pandas as pd
+import pytest
+from utils.artifacts import save_artifact, load_artifact, artifact_info, update_artifact_info
+
+@pytest.fixture
+def raw_df():
+    return pd.DataFrame({
+        'Title': ["Product A", "Unknown Product", None],
+        'Price': ["$10.50", "Price Unavailable", "$3"],
+        'Colors': ["3 Colors", "0 Colors", "1 Color"],
+        'Timestamp': [pd.Timestamp("2024-01-01 08:00:00")] * 3,
+    }, index=[5, 6, 7])
+
+def test_artifact_round_trip(raw_df, tmp_path):
+    assert save_artifact(raw_df, 'raw', str(tmp_path), pages=[1, 2]) is True
+    loaded = load_artifact('raw', str(tmp_path))
+    pd.testing.assert_frame_equal(loaded, raw_df.reset_index(drop=True))
+    info = artifact_info('raw', str(tmp_path))
+    assert info['rows'] == 3 and info['format'] == 'feather' and info['pages'] == [1, 2]
+
+def test_missing_artifact(tmp_path):
+    assert load_artifact('clean', str(tmp_path)) is None
+    assert artifact_info('clean', str(tmp_path)) is None
+    with pytest.raises(ValueError):
+        load_artifact('final', str(tmp_path))
+
+def test_pickle_fallback_without_pyarrow(raw_df, tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyarrow.feather', None)
+    assert save_artifact(raw_df, 'clean', str(tmp_path)) is True
+    assert json.loads((tmp_path / "clean.json").read_text())['format'] == 'pickle'
+    pd.testing.assert_frame_equal(load_artifact('clean', str(tmp_path)), raw_df)
+
+def test_new_raw_artifact_drops_the_clean_one(raw_df, tmp_path):
+    save_artifact(raw_df, 'raw', str(tmp_path))
+    save_artifact(raw_df, 'clean', str(tmp_path))
+    assert update_artifact_info('clean', str(tmp_path), loaded=True) is True
+    assert artifact_info('clean', str(tmp_path))['loaded'] is True
+    save_artifact(raw_df, 'raw', str(tmp_path))
+    assert artifact_info('clean', str(tmp_path)) is None
+    assert update_artifact_info('clean', str(tmp_path), loaded=True) is False
@@ -0,0 +1,115 @@
+import pytest
+import requests_mock
+import os
+import time
+from utils.cache import PageCache, TransformCache, content_hash
+from utils.config import BASE_URL
+from utils.extract import fetch_page_content, extract_all_products
+from tests.test_extract import MOCK_HTML_PAGE_1_CONTENT
+
+URL = "https://example.test/page2"
+
+@pytest.fixture
+def cache(tmp_path):
+    return PageCache(cache_dir=str(tmp_path / "pages"), max_bytes=10 * 1024 * 1024, ttl_seconds=3600)
+
+def test_store_and_get_body(cache):
+    cache.store_response(URL, b"<html>a</html>", etag='"v1"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    assert cache.get_body(URL) == b"<html>a</html>"
+    assert cache.get(URL)['content_hash'] == content_hash(b"<html>a</html>")
+    assert cache.conditional_headers(URL) == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+
+def test_rows_are_kept_only_for_identical_content(cache):
+    cache.store_response(URL, b"body-1")
+    cache.store_rows(URL, b"body-1", [{'Title': "A"}])
+    assert cache.get_rows(URL, b"body-1") == [{'Title': "A"}]
+    assert cache.get_rows(URL, b"body-2") is None
+
+    cache.store_response(URL, b"body-1") # Same content re-downloaded keeps rows
+    assert cache.get_rows(URL, b"body-1") == [{'Title': "A"}]
+    cache.store_response(URL, b"body-2") # Changed content drops them
+    assert cache.get_rows(URL, b"body-2") is None
+
+def test_ttl_expires_entries(tmp_path):
+    cache = PageCache(cache_dir=str(tmp_path), ttl_seconds=0)
+    cache.store_response(URL, b"body")
+    time.sleep(0.01)
+    assert cache.get(URL) is None
+    assert cache.conditional_headers(URL) == {}
+
+def test_size_based_eviction_drops_least_recently_used(tmp_path):
+    cache = PageCache(cache_dir=str(tmp_path), max_bytes=1500)
+    cache.store_response("https://example.test/1", b"x" * 500)
+    old_time = time.time() - 100
+    for name in os.listdir(tmp_path):
+        os.utime(tmp_path / name, (old_time, old_time))
+    cache.store_response("https://example.test/2", b"y" * 500)
+    cache.store_response("https://example.test/3", b"z" * 500)
+    assert cache.get("https://example.test/1") is None
+    assert cache.get_body("https://example.test/3") == b"z" * 500
+
+def test_fetch_page_content_uses_cached_body_on_304(cache):
+    cache.store_response(f"{BASE_URL}/page2", b"<html>cached</html>", etag='"abc"')
+    with requests_mock.Mocker() as m:
+        m.get(f"{BASE_URL}/page2", status_code=304)
+        content = fetch_page_content(2, cache=cache)
+    assert content == b"<html>cached</html>"
+    assert m.last_request.headers['If-None-Match'] == '"abc"'
+
+def test_extract_reuses_parsed_rows_for_unchanged_page(cache, monkeypatch):
+    monkeypatch.setattr('utils.extract.MAX_PAGES', 1)
+    with requests_mock.Mocker() as m:
+        m.get(BASE_URL, [
+            {'text': MOCK_HTML_PAGE_1_CONTENT, 'headers': {'ETag': '"p1"'}},
+            {'status_code': 304},
+        ])
+        first = extract_all_products(max_workers=1, cache=cache)
+
+        def fail_parse(*args, **kwargs):
+            raise AssertionError("unchanged page must not be re-parsed")
+        monkeypatch.setattr('utils.extract.parse_product_data', fail_parse)
+        second = extract_all_products(max_workers=1, cache=cache)
+
+    assert m.call_count == 2
+    assert first.drop(columns='Timestamp').equals(second.drop(columns='Timestamp'))
+    assert list(second.columns) == list(first.columns)
+
+
+def test_transform_cache_evicts_least_recently_used(tmp_path):
+    import pandas as pd
+    transform_cache = TransformCache(cache_dir=str(tmp_path), max_bytes=10 * 1024 * 1024)
+    frame = pd.DataFrame({'Price': [1.0] * 1000})
+    transform_cache.put('a', frame)
+    entry_size = os.path.getsize(tmp_path / 'a.pkl')
+    transform_cache.max_bytes = 2 * entry_size
+    transform_cache.put('b', frame)
+    for name, age in (('a.pkl', 200), ('b.pkl', 100)):
+        os.utime(tmp_path / name, (time.time() - age, time.time() - age))
+    transform_cache.get('a') # 'a' is now the most recently used entry
+    transform_cache.put('c', frame)
+    assert transform_cache.get('b') is None
+    pd.testing.assert_frame_equal(transform_cache.get('a'), frame)
+    assert transform_cache.get('c') is not None
+
+def test_stores_under_the_limit_do_not_scan_the_directory(tmp_path, monkeypatch):
+    import pandas as pd
+    page_cache = PageCache(cache_dir=str(tmp_path / "pages"), max_bytes=10 * 1024 * 1024)
+    transform_cache = TransformCache(cache_dir=str(tmp_path / "transform"), max_bytes=10 * 1024 * 1024)
+    scans = []
+    real_listdir = os.listdir
+    monkeypatch.setattr('utils.cache.os.listdir', lambda path: scans.append(path) or real_listdir(path))
+    for page in range(5):
+        page_cache.store_response(f"https://example.test/{page}", b"x" * 100)
+        page_cache.store_rows(f"https://example.test/{page}", b"x" * 100, [{'Title': "A"}])
+        transform_cache.put(str(page), pd.DataFrame({'Price': [1.0]}))
+    assert scans == []
+    assert len(page_cache) == 5 and len(transform_cache) == 5
+
+    # Reopening picks up the entries on disk; going over the limit rescans and evicts
+    reopened = PageCache(cache_dir=str(tmp_path / "pages"), max_bytes=page_cache._total_bytes)
+    assert len(reopened) == 5 and reopened._total_bytes == page_cache._total_bytes
+    reopened.store_response("https://example.test/5", b"y" * 100)
+    assert len(scans) == 2 and len(reopened) < 6
@@ -0,0 +1,87 @@
+import logging
+import pytest
+import pandas as pd
+from utils.cdc import compute_changes, load_snapshot, save_snapshot, drop_snapshot, load_with_cdc, row_hashes
+
+def make_products(rows):
+    df = pd.DataFrame(rows, columns=['Title', 'Price', 'Rating', 'Colors', 'Size', 'Gender'])
+    df['Timestamp'] = pd.Timestamp.now()
+    return df
+
+@pytest.fixture
+def products():
+    return make_products([
+        ("Product A", 160000.0, 4.5, 3, "M", "Men"),
+        ("Product B", 320000.0, 3.8, 1, "L", "Women"),
+        ("Product C", 480000.0, 4.0, 2, "S", "Unisex"),
+    ])
+
+def test_first_load_is_initial(products):
+    changes = compute_changes(products, None)
+    assert changes.initial and changes.requires_rewrite and changes.has_changes
+    assert len(changes.inserts) == 3
+    assert len(changes.next_snapshot) == 3
+
+def test_timestamp_does_not_count_as_a_change(products):
+    snapshot = compute_changes(products).next_snapshot
+    later = products.copy()
+    later['Timestamp'] = later['Timestamp'] + pd.Timedelta(hours=1)
+    changes = compute_changes(later, snapshot)
+    assert not changes.has_changes
+    assert (row_hashes(products) == row_hashes(later)).all()
+
+def test_detects_inserts_and_updates_in_place(products):
+    snapshot = compute_changes(products).next_snapshot
+    changed = pd.concat([
+        products,
+        make_products([("Product D", 10.0, 5.0, 1, "XL", "Men")]),
+    ], ignore_index=True)
+    changed.loc[2, 'Price'] = 500000.0 # Product C changes price
+
+    changes = compute_changes(changed, snapshot)
+    assert not changes.requires_rewrite
+    assert list(changes.inserts['Title']) == ["Product D"]
+    assert list(changes.updates['Title']) == ["Product C"]
+    assert changes.update_positions == [2]
+    assert changes.deletes.empty
+    # The new snapshot keeps the loaded order and appends the insert
+    assert list(changes.next_snapshot['Title']) == ["Product A", "Product B", "Product C", "Product D"]
+    assert not compute_changes(changed, changes.next_snapshot).has_changes
+
+def test_detects_deletes(products):
+    snapshot = compute_changes(products).next_snapshot
+    changes = compute_changes(products.iloc[[0, 2]], snapshot)
+    assert changes.requires_rewrite
+    assert list(changes.deletes['Title']) == ["Product B"]
+    assert changes.inserts.empty and changes.updates.empty
+
+def test_snapshot_round_trip(products, tmp_path):
+    assert load_snapshot('csv', str(tmp_path)) is None
+    snapshot = compute_changes(products).next_snapshot
+    save_snapshot(snapshot, 'csv', str(tmp_path))
+    pd.testing.assert_frame_equal(load_snapshot('csv', str(tmp_path)), snapshot)
+
+def test_load_with_cdc_saves_snapshot_only_on_success(products, tmp_path):
+    snapshot_dir = str(tmp_path)
+    assert load_with_cdc(products, 'sheets', lambda changes: False, snapshot_dir) == (False, 0)
+    assert load_snapshot('sheets', snapshot_dir) is None
+
+    received = []
+    assert load_with_cdc(products, 'sheets', lambda changes: received.append(changes) or True, snapshot_dir) == (True, 3)
+    assert received[0].initial
+    assert load_with_cdc(products, 'sheets', lambda changes: received.append(changes) or True, snapshot_dir) == (True, 0)
+    assert not received[1].has_changes
+
+def test_rows_sharing_a_key_are_collapsed_with_a_warning(products, caplog):
+    repriced = make_products([("Product A", 1.0, 4.5, 3, "M", "Men")])
+    with caplog.at_level(logging.WARNING):
+        changes = compute_changes(pd.concat([products, repriced], ignore_index=True))
+    assert len(changes.current) == 3
+    assert changes.current.loc[changes.current['Title'] == "Product A", 'Price'].item() == 1.0 # The last row wins
+    assert "1 row(s) share a primary key" in caplog.text
+
+def test_drop_snapshot(products, tmp_path):
+    save_snapshot(compute_changes(products).next_snapshot, 'csv', str(tmp_path))
+    drop_snapshot('csv', str(tmp_path))
+    drop_snapshot('csv', str(tmp_path)) # Dropping a missing snapshot is fine
+    assert load_snapshot('csv', str(tmp_path)) is None
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.dedup import BloomFilter, Deduplicator, DEDUP_KEY_COLUMNS, key_fingerprints
+
+def make_products(titles, price=10.0):
+    return pd.DataFrame({
+        'Title': titles,
+        'Price': [price] * len(titles),
+        'Rating': [4.5] * len(titles),
+        'Colors': [3] * len(titles),
+        'Size': ["M"] * len(titles),
+        'Gender': ["Men"] * len(titles),
+    })
+
+def test_fingerprints_depend_only_on_key_columns():
+    a = make_products(["A", "B"])
+    b = a.assign(Rating=[1.0, 2.0]).set_axis([7, 8])
+    np.testing.assert_array_equal(key_fingerprints(a), key_fingerprints(b))
+    assert key_fingerprints(a)[0] != key_fingerprints(make_products(["A"], price=11.0))[0]
+
+def test_deduplicator_matches_drop_duplicates():
+    rng = np.random.default_rng(0)
+    df = make_products([f"P{i}" for i in rng.integers(0, 300, 2000)])
+    df['Size'] = np.array(["S", "M", "L"], dtype=object)[rng.integers(0, 3, len(df))]
+    expected = df.drop_duplicates(subset=DEDUP_KEY_COLUMNS, keep='first')
+    pd.testing.assert_frame_equal(Deduplicator().drop_duplicates(df), expected)
+
+def test_deduplicator_remembers_earlier_chunks():
+    deduplicator = Deduplicator()
+    assert deduplicator.drop_duplicates(make_products(["A", "B", "A"]))['Title'].tolist() == ["A", "B"]
+    assert deduplicator.drop_duplicates(make_products(["B", "C"]))['Title'].tolist() == ["C"]
+    assert len(deduplicator) == 3
+    assert deduplicator.drop_duplicates(make_products([])).empty
+
+def test_deduplicator_over_many_chunks_matches_drop_duplicates():
+    rng = np.random.default_rng(2)
+    df = make_products([f"P{i}" for i in rng.integers(0, 3000, 20_000)])
+    deduplicator = Deduplicator()
+    kept = pd.concat([deduplicator.drop_duplicates(df.iloc[start:start + 100]) for start in range(0, len(df), 100)])
+    pd.testing.assert_frame_equal(kept, df.drop_duplicates(subset=DEDUP_KEY_COLUMNS, keep='first'))
+    assert len(deduplicator) == len(kept)
+    assert len(deduplicator._runs) <= np.log2(len(kept)) + 1 # Runs are merged as they accumulate
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    rng = np.random.default_rng(1)
+    added = rng.integers(0, 2**63, 10_000, dtype=np.uint64)
+    bloom.add(added)
+    assert bloom.contains(added).all()
+    others = rng.integers(0, 2**63, 50_000, dtype=np.uint64)
+    assert bloom.contains(others).mean() < 0.02
+    bloom.add(added[:10])
+    assert bloom.count == 10_000
+
+def test_bloom_filter_round_trip(tmp_path):
+    path = str(tmp_path / "dedup" / "seen.bloom")
+    bloom = BloomFilter(capacity=100, error_rate=0.001)
+    bloom.add(np.array([1, 2, 3], dtype=np.uint64))
+    bloom.save(path)
+    loaded = BloomFilter.open(path)
+    assert loaded.count == 3 and loaded.num_hashes == bloom.num_hashes
+    np.testing.assert_array_equal(loaded.bits, bloom.bits)
+
+    with open(path, 'wb') as f:
+        f.write(b"not a filter")
+    assert BloomFilter.open(path, capacity=100).count == 0 # Unreadable files start over
+
+def test_cross_run_filter_skips_rows_of_earlier_runs(tmp_path):
+    path = str(tmp_path / "seen.bloom")
+    first = Deduplicator(seen_filter=BloomFilter.open(path, capacity=1000))
+    assert first.drop_duplicates(make_products(["A", "B"]))['Title'].tolist() == ["A", "B"]
+    first.commit(path)
+
+    second = Deduplicator(seen_filter=BloomFilter.open(path))
+    assert second.drop_duplicates(make_products(["A", "C", "B", "C"]))['Title'].tolist() == ["C"]
+
+@pytest.mark.parametrize("capacity, error_rate", [(0, 0.01), (10, 0), (10, 1.5)])
+def test_bloom_filter_rejects_bad_parameters(capacity, error_rate):
+    with pytest.raises(ValueError):
+        BloomFilter(capacity, error_rate)
@@ -0,0 +1,73 @@
+import logging
+import pandas as pd
+import pytest
+from utils.diagnostics import (
+    ParseDiagnostics, collect_parse_failures, parse_failure_scope, report_parse_failure
+)
+from utils.transform import clean_rating, clean_colors, transform_data
+
+def test_collector_counts_and_samples_failures():
+    diagnostics = ParseDiagnostics(sample_size=2)
+    for value in ["a", "b", "a", "c"]:
+        diagnostics.record('Rating', 'no number', value, "bad %s", (value,))
+    diagnostics.record('Colors', 'no color count', "x", "bad %s", ("x",), count=10)
+    assert diagnostics.total == 14
+    assert diagnostics.summary() == {
+        'Colors: no color count': {'count': 10, 'samples': ["'x'"]},
+        'Rating: no number': {'count': 4, 'samples': ["'a'", "'b'"]},
+    }
+    assert diagnostics.records is None
+
+def test_failures_are_counted_instead_of_logged_inside_a_scope(caplog):
+    with caplog.at_level(logging.WARNING):
+        with collect_parse_failures() as diagnostics:
+            clean_rating("Rating: ⭐ Invalid / 5 stars")
+            clean_colors("abc")
+        assert caplog.text == ""
+        clean_colors("abc") # Outside a scope the warning is logged as before
+    assert "Could not parse numeric colors from 'abc'" in caplog.text
+    assert diagnostics.counts[('Colors', 'no color count')] == 1
+
+def test_message_is_not_formatted_when_warnings_are_disabled():
+    class Unprintable:
+        def __str__(self):
+            raise AssertionError("formatted")
+    logger = logging.getLogger()
+    level = logger.level
+    logger.setLevel(logging.ERROR)
+    try:
+        report_parse_failure('Price', 'ValueError', None, "Could not parse price '%s'", Unprintable())
+    finally:
+        logger.setLevel(level)
+
+def test_scope_logs_one_summary(caplog):
+    with caplog.at_level(logging.WARNING):
+        with parse_failure_scope() as outer:
+            with parse_failure_scope() as inner: # Nested scopes add to the outer summary
+                for _ in range(50):
+                    clean_colors("abc")
+            assert inner is outer
+    warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert "Colors: no color count: 50 (e.g. 'abc')" in warnings[0].getMessage()
+
+@pytest.mark.parametrize("engine", ["rowwise", "vectorized", "memoized"])
+def test_engines_count_failures_per_row(engine):
+    n = 40
+    raw = pd.DataFrame({
+        'Title': [f"Product {i}" for i in range(n)],
+        'Price': ["$10.00", "Price Unavailable", "oops", "$5"] * (n // 4),
+        'Rating': ["Rating: ⭐ 4.5 / 5", "Rating: unknown"] * (n // 2),
+        'Colors': ["3 Colors", "Colors"] * (n // 2),
+        'Size': ["Size: M"] * n,
+        'Gender': ["Gender: Men"] * n,
+        'Timestamp': [pd.Timestamp.now()] * n,
+    })
+    with collect_parse_failures() as diagnostics:
+        transform_data(raw, engine=engine)
+        transform_data(raw, engine=engine) # Cached results still count
+    assert diagnostics.counts == {
+        ('Price', 'ValueError'): 20,
+        ('Rating', 'no number'): 40,
+        ('Colors', 'no color count'): 40,
+    }
@@ -1,10 +1,13 @@
 import pytest
 import requests_mock
-from utils.extract import fetch_page_content, parse_product_data, extract_all_products
+from utils.extract import fetch_page_content, parse_product_data, extract_all_products, TokenBucket
 from utils.config import BASE_URL # Pastikan BASE_URL diimpor dari config
 import pandas as pd
 from datetime import datetime
 import logging # Untuk caplog
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
 
 # Definisikan MOCK HTML di sini
 MOCK_HTML_PAGE_1_CONTENT = """
@@ -154,4 +157,143 @@ def test_extract_all_products_no_data_extracted(mock_requests_session, caplog, m
     
     assert df.empty
     assert "No products extracted from page 1" in caplog.text # Pesan ketika halaman tidak ada produk
-    assert "No data was extracted from any page." in caplog.text # Pesan akhir jika DF kosong
\ No newline at end of file
+    assert "No data was extracted from any page." in caplog.text # Pesan akhir jika DF kosong
+
+
+def test_extract_all_products_concurrent_keeps_page_order(mock_requests_session, monkeypatch):
+    """Test that the thread-pool mode returns rows in page order."""
+    monkeypatch.setattr('utils.extract.MAX_PAGES', 3)
+    mock_requests_session.get(BASE_URL, text=MOCK_HTML_PAGE_2_CONTENT, status_code=200)
+    mock_requests_session.get(f"{BASE_URL}/page2", text=MOCK_HTML_PAGE_1_CONTENT, status_code=200)
+    mock_requests_session.get(f"{BASE_URL}/page3", text=MOCK_HTML_PAGE_2_CONTENT, status_code=200)
+
+    df = extract_all_products(max_workers=3)
+    assert list(df['Title']) == ["Another Product", "Cool T-Shirt", "Awesome Jeans", "Another Product"]
+
+
+def test_extract_all_products_sequential_mode(mock_requests_session, monkeypatch):
+    """Test that max_workers=1 still extracts every page."""
+    monkeypatch.setattr('utils.extract.MAX_PAGES', 2)
+    mock_requests_session.get(BASE_URL, text=MOCK_HTML_PAGE_1_CONTENT, status_code=200)
+    mock_requests_session.get(f"{BASE_URL}/page2", text=MOCK_HTML_PAGE_2_CONTENT, status_code=200)
+
+    df = extract_all_products(max_workers=1)
+    assert len(df) == 3
+
+
+def test_token_bucket_limits_rate():
+    """Test that the token bucket spaces out requests beyond its burst capacity."""
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    # First token is free, the next two each wait ~1/20 s
+    assert time.monotonic() - start >= 0.09
+
+
+def test_extract_all_products_with_parse_pool(mock_requests_session, monkeypatch):
+    """Test the fetch/parse pipeline with a process pool keeps page order and skips failed pages."""
+    monkeypatch.setattr('utils.extract.MAX_PAGES', 4)
+    mock_requests_session.get(BASE_URL, text=MOCK_HTML_PAGE_2_CONTENT, status_code=200)
+    mock_requests_session.get(f"{BASE_URL}/page2", text=MOCK_HTML_PAGE_1_CONTENT, status_code=200)
+    mock_requests_session.get(f"{BASE_URL}/page3", status_code=500)
+    mock_requests_session.get(f"{BASE_URL}/page4", text=MOCK_HTML_PAGE_2_CONTENT, status_code=200)
+
+    df = extract_all_products(max_workers=2, parse_workers=2)
+    assert list(df['Title']) == ["Another Product", "Cool T-Shirt", "Awesome Jeans", "Another Product"]
+    assert isinstance(df.iloc[0]['Timestamp'], datetime)
+
+
+def test_parse_pool_queue_is_bounded(mock_requests_session, monkeypatch):
+    """Test that a stalled consumer leaves fetchers blocked on the bounded queue and no more pages submitted than the window."""
+    fetches = []
+    stalled = {}
+
+    class RecordingPool(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            future = super().submit(fn, *args, **kwargs)
+            fetches.append(future)
+            return future
+
+    class StallingQueue(queue.Queue):
+        def get(self, *args, **kwargs):
+            if self.maxsize and not stalled: # The raw page queue; the consumer stalls on its first page
+                time.sleep(0.5)
+                stalled.update(submitted=len(fetches), pending=sum(not f.done() for f in fetches),
+                               queued=self.qsize())
+            return super().get(*args, **kwargs)
+
+    monkeypatch.setattr('utils.extract.ThreadPoolExecutor', RecordingPool)
+    monkeypatch.setattr('utils.extract.queue.Queue', StallingQueue)
+    monkeypatch.setattr('utils.extract.PARSE_QUEUE_SIZE', 1)
+    monkeypatch.setattr('utils.extract.MAX_PAGES', 10)
+    monkeypatch.setattr('utils.extract.DISCOVER_PAGE_COUNT', False)
+    mock_requests_session.get(BASE_URL, text=MOCK_HTML_PAGE_1_CONTENT, status_code=200)
+    for page in range(2, 11):
+        mock_requests_session.get(f"{BASE_URL}/page{page}", text=MOCK_HTML_PAGE_2_CONTENT, status_code=200)
+
+    df = extract_all_products(max_workers=2, parse_workers=1)
+    assert len(df) == 2 + 9
+    assert stalled['queued'] == 1
+    assert stalled['pending'] >= 1 # Fetchers wait for the consumer instead of buffering pages
+    assert stalled['submitted'] == 2 * 2 # Only the sliding window was submitted
+    assert len(fetches) == 10
+
+
+def test_parse_pool_does_not_fork_the_threaded_process():
+    """Test that parse workers are not forked from the process running the fetch threads."""
+    from utils.extract import _parse_pool_context
+    assert _parse_pool_context().get_start_method() in ('forkserver', 'spawn')
+
+
+def test_iter_extract_chunks_per_page(mock_requests_session, monkeypatch):
+    """Test that streaming extraction yields one DataFrame per page, in page order."""
+    from utils.extract import iter_extract_chunks
+    monkeypatch.setattr('utils.extract.MAX_PAGES', 3)
+    mock_requests_session.get(BASE_URL, text=MOCK_HTML_PAGE_1_CONTENT, status_code=200)
+    mock_requests_session.get(f"{BASE_URL}/page2", text=MOCK_HTML_PAGE_EMPTY_CONTENT, status_code=200)
+    mock_requests_session.get(f"{BASE_URL}/page3", text=MOCK_HTML_PAGE_2_CONTENT, status_code=200)
+
+    chunks = list(iter_extract_chunks(max_workers=1))
+    assert [len(chunk) for chunk in chunks] == [2, 1] # Empty page 2 yields nothing
+    assert chunks[1].iloc[0]['Title'] == "Another Product"
+
+
+def test_iter_extract_chunks_with_chunk_size(mock_requests_session, monkeypatch):
+    """Test that rows are batched into chunks of at least chunk_size rows."""
+    from utils.extract import iter_extract_chunks
+    monkeypatch.setattr('utils.extract.MAX_PAGES', 3)
+    mock_requests_session.get(BASE_URL, text=MOCK_HTML_PAGE_2_CONTENT, status_code=200)
+    mock_requests_session.get(f"{BASE_URL}/page2", text=MOCK_HTML_PAGE_2_CONTENT, status_code=200)
+    mock_requests_session.get(f"{BASE_URL}/page3", text=MOCK_HTML_PAGE_1_CONTENT, status_code=200)
+
+    chunks = list(iter_extract_chunks(chunk_size=2, max_workers=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2]
+    assert list(pd.concat(chunks)['Title']) == ["Another Product", "Another Product", "Cool T-Shirt", "Awesome Jeans"]
+
+
+def test_extract_all_products_stops_after_consecutive_empty_pages(mock_requests_session, monkeypatch):
+    """Test that without a page count the crawl stops after EMPTY_PAGE_STOP empty pages."""
+    monkeypatch.setattr('utils.extract.MAX_PAGES', 10)
+    monkeypatch.setattr('utils.extract.EMPTY_PAGE_STOP', 2)
+    mock_requests_session.get(BASE_URL, text=MOCK_HTML_PAGE_1_CONTENT, status_code=200)
+    mock_requests_session.get(f"{BASE_URL}/page2", text=MOCK_HTML_PAGE_2_CONTENT, status_code=200)
+    for page in range(3, 11):
+        mock_requests_session.get(f"{BASE_URL}/page{page}", text=MOCK_HTML_PAGE_EMPTY_CONTENT, status_code=200)
+
+    df = extract_all_products(max_workers=1)
+    assert len(df) == 3
+    assert mock_requests_session.call_count == 4 # Pages 1-2, then the two empty pages 3-4
+
+
+def test_extract_all_products_prefetch_window_is_bounded(mock_requests_session, monkeypatch):
+    """Test that concurrent mode fetches at most 2 * max_workers pages past the stop."""
+    monkeypatch.setattr('utils.extract.MAX_PAGES', 40)
+    monkeypatch.setattr('utils.extract.EMPTY_PAGE_STOP', 1)
+    mock_requests_session.get(BASE_URL, text=MOCK_HTML_PAGE_1_CONTENT, status_code=200)
+    for page in range(2, 41):
+        mock_requests_session.get(f"{BASE_URL}/page{page}", text=MOCK_HTML_PAGE_EMPTY_CONTENT, status_code=200)
+
+    df = extract_all_products(max_workers=2)
+    assert len(df) == 2
+    assert mock_requests_session.call_count <= 2 + 2 * 2
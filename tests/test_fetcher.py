@@ -0,0 +1,50 @@
+import pytest
+import requests_mock
+from utils.fetcher import PageFetcher, get_default_fetcher, RETRY_STATUS_CODES
+from utils.config import USER_AGENT
+
+TEST_URL = "https://example.test/page2"
+
+@pytest.fixture
+def fetcher():
+    with PageFetcher(pool_size=4, max_retries=2, backoff_factor=0.1, timeout=5) as f:
+        yield f
+
+def test_fetcher_reuses_session_headers(fetcher):
+    with requests_mock.Mocker() as m:
+        m.get(TEST_URL, text="<html>ok</html>")
+        response = fetcher.get(TEST_URL)
+    assert response.content == b"<html>ok</html>"
+    assert m.last_request.headers['User-Agent'] == USER_AGENT
+
+def test_fetcher_records_timing_stats(fetcher):
+    with requests_mock.Mocker() as m:
+        m.get(TEST_URL, text="abcd")
+        m.get("https://example.test/missing", status_code=404)
+        fetcher.get(TEST_URL)
+        fetcher.get("https://example.test/missing")
+    summary = fetcher.stats_summary()
+    assert summary['requests'] == 2
+    assert summary['errors'] == 1
+    assert summary['bytes'] == 4
+    assert summary['max_seconds'] >= summary['mean_seconds'] >= 0
+
+def test_fetcher_records_connection_errors(fetcher):
+    with requests_mock.Mocker() as m:
+        m.get(TEST_URL, exc=ConnectionError("boom"))
+        with pytest.raises(ConnectionError):
+            fetcher.get(TEST_URL)
+    assert fetcher.stats[0]['status'] is None
+    assert fetcher.stats_summary()['errors'] == 1
+
+def test_fetcher_mounts_pooled_adapter_with_retry(fetcher):
+    adapter = fetcher.session.get_adapter("https://example.test")
+    assert adapter._pool_maxsize == 4
+    retry = adapter.max_retries
+    assert retry.total == 2
+    assert retry.backoff_factor == 0.1
+    assert set(RETRY_STATUS_CODES) <= set(retry.status_forcelist)
+    assert 429 in retry.status_forcelist
+
+def test_get_default_fetcher_is_shared():
+    assert get_default_fetcher() is get_default_fetcher()
@@ -0,0 +1,74 @@
+import os
+import pytest
+import pandas as pd
+from utils.history import HistoryStore, record_history
+
+def make_run(prices, rating_b=3.8):
+    return pd.DataFrame({
+        'Title': ["Product A", "Product B", "Product C"][:len(prices)],
+        'Price': prices,
+        'Rating': [4.5, rating_b, None][:len(prices)],
+        'Colors': [3, 1, 2][:len(prices)],
+        'Size': ["M", "L", "S"][:len(prices)],
+        'Gender': ["Men", "Women", "Unisex"][:len(prices)],
+        'Timestamp': pd.Timestamp("2024-01-01 08:00:00"),
+    })
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history"))
+    store.append(make_run([100.0, 200.0, 300.0]), run_timestamp="2024-01-01 09:00:00")
+    store.append(make_run([110.0, 200.0, 300.0]), run_timestamp="2024-01-02 09:00:00")
+    store.append(make_run([120.0, 200.0], rating_b=4.0), run_timestamp="2024-01-03 09:00:00")
+    return store
+
+def test_runs_are_partitioned_by_date(store):
+    assert store.runs() == ["20240101T090000", "20240102T090000", "20240103T090000"]
+    assert sorted(p for p in os.listdir(store.root) if p.startswith("run_date=")) == [
+        "run_date=2024-01-01", "run_date=2024-01-02", "run_date=2024-01-03"]
+
+def test_latest_snapshot(store):
+    latest = store.latest_snapshot(columns=['Title', 'Price'])
+    assert latest['Title'].tolist() == ["Product A", "Product B"]
+    assert latest['Price'].tolist() == [120.0, 200.0]
+
+def test_price_series_reads_only_indexed_partitions(store, monkeypatch):
+    read = []
+    original = store._read_run
+    monkeypatch.setattr(store, '_read_run', lambda run_id, **kwargs: read.append(run_id) or original(run_id, **kwargs))
+
+    series = store.price_series("Product C")
+    assert series['Price'].tolist() == [300.0, 300.0]
+    assert read == ["20240101T090000", "20240102T090000"] # Product C is gone on 2024-01-03
+
+    assert store.price_series("Product A", gender="Men")['Price'].tolist() == [100.0, 110.0, 120.0]
+    assert store.price_series("Product A", gender="Women").empty
+
+def test_changes_between_runs(store):
+    changes = store.changes_between("20240102T090000", "20240103T090000").set_index('Title')
+    assert changes.loc["Product A", 'change'] == 'changed'
+    assert changes.loc["Product A", 'Price_before'] == 110.0 and changes.loc["Product A", 'Price_after'] == 120.0
+    assert changes.loc["Product B", 'change'] == 'changed' # Rating 3.8 -> 4.0
+    assert changes.loc["Product C", 'change'] == 'removed'
+    # A missing rating in both runs is not a change
+    assert store.changes_between("20240101T090000", "20240102T090000")['Title'].tolist() == ["Product A"]
+
+def test_history_is_append_only(store, tmp_path):
+    with pytest.raises(ValueError):
+        store.append(make_run([1.0]), run_timestamp="2024-01-03 09:00:00")
+    # The index survives reopening the store
+    assert HistoryStore(store.root).runs() == store.runs()
+
+def test_record_history(tmp_path):
+    root = str(tmp_path / "history")
+    assert record_history(make_run([100.0]), root=root, run_timestamp="2024-02-01") is True
+    assert record_history(make_run([100.0, 200.0]), root=root, run_timestamp="2024-02-01") is False
+    assert record_history(pd.DataFrame(), root=root) is False
+
+def test_reloading_the_same_scrape_is_a_no_op(tmp_path):
+    root = str(tmp_path / "history")
+    assert record_history(make_run([100.0]), root=root) is True
+    assert HistoryStore(root).runs() == ["20240101T080000"] # Named after the scrape Timestamp
+    assert record_history(make_run([100.0]), root=root) is True
+    assert HistoryStore(root).runs() == ["20240101T080000"]
+    assert len(HistoryStore(root).price_series("Product A")) == 1
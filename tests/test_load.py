@@ -6,13 +6,19 @@ from sqlalchemy.exc import OperationalError
 import gspread # Untuk gspread.exceptions
 
 # Impor fungsi dan konstanta yang akan diuji/digunakan
-from utils.load import save_to_csv, save_to_postgresql, save_to_google_sheets
+from utils.load import (
+    save_to_csv, load_from_csv, save_to_postgresql, save_to_google_sheets, _sheet_values,
+    apply_changes_to_csv, apply_changes_to_postgresql, apply_changes_to_google_sheets, dispatch_sinks,
+    save_to_parquet, load_from_parquet
+)
+import pyarrow.parquet as pq
 from utils.config import (
     CSV_FILE_PATH, POSTGRES_TABLE_NAME, 
     GOOGLE_SHEETS_CREDENTIALS_FILE, GOOGLE_SHEET_NAME, GOOGLE_SHEET_ID
 )
 from datetime import datetime
 import os # Untuk mock os.path.exists
+from benchmarks.fakes import FakeClient
 
 @pytest.fixture
 def sample_clean_df():
@@ -40,16 +46,57 @@ def empty_df():
     return pd.DataFrame()
 
 # --- Test save_to_csv ---
-@patch('pandas.DataFrame.to_csv')
-def test_save_to_csv_success(mock_to_csv, sample_clean_df):
-    assert save_to_csv(sample_clean_df, "test.csv") is True
-    mock_to_csv.assert_called_once_with("test.csv", index=False, encoding='utf-8')
+@pytest.mark.parametrize("engine", ["pyarrow", "pandas"])
+def test_save_to_csv_success(engine, sample_clean_df, tmp_path):
+    file_path = tmp_path / "test.csv"
+    assert save_to_csv(sample_clean_df, file_path, engine=engine) is True
+    loaded = load_from_csv(file_path, engine=engine, schema='standard')
+    expected = sample_clean_df.astype({'Price': 'float64'})
+    pd.testing.assert_frame_equal(loaded, expected)
+    assert os.listdir(tmp_path) == ["test.csv"] # No temporary file left behind
 
-@patch('pandas.DataFrame.to_csv', side_effect=IOError("Disk full"))
-def test_save_to_csv_io_error(mock_to_csv, sample_clean_df, caplog):
-    with caplog.at_level(logging.ERROR):
-        assert save_to_csv(sample_clean_df, "test.csv") is False
-    assert "Error saving data to CSV test.csv: Disk full" in caplog.text
+def test_save_to_csv_default_output_matches_pandas(sample_clean_df, tmp_path):
+    file_path = tmp_path / "products.csv"
+    sample_clean_df = sample_clean_df.astype({'Price': 'float64'})
+    assert save_to_csv(sample_clean_df.iloc[:1], file_path, chunk_rows=1) is True
+    assert save_to_csv(sample_clean_df.iloc[1:], file_path, mode='a') is True
+    reference = tmp_path / "reference.csv"
+    sample_clean_df.to_csv(reference, index=False, encoding='utf-8')
+    assert file_path.read_bytes() == reference.read_bytes()
+    # The pyarrow reader parses the pandas-written file with the output schema's dtypes
+    pd.testing.assert_frame_equal(load_from_csv(file_path, engine='pyarrow', schema='standard'), sample_clean_df)
+
+def test_save_to_csv_io_error(sample_clean_df, tmp_path, caplog):
+    file_path = tmp_path / "test.csv"
+    file_path.write_text("previous contents\n")
+    with patch('utils.load._write_csv', side_effect=IOError("Disk full")):
+        with caplog.at_level(logging.ERROR):
+            assert save_to_csv(sample_clean_df, file_path) is False
+    assert f"Error saving data to CSV {file_path}: Disk full" in caplog.text
+    assert file_path.read_text() == "previous contents\n" # The old file survives a failed write
+    assert os.listdir(tmp_path) == ["test.csv"]
+
+@pytest.mark.parametrize("file_name, engine", [
+    ("products.csv.gz", "pandas"), ("products.csv.gz", "pyarrow"), ("products.csv.zst", "pyarrow"),
+])
+def test_save_to_csv_compressed_chunks_and_appends(file_name, engine, sample_clean_df, tmp_path):
+    file_path = tmp_path / file_name
+    more = sample_clean_df.assign(Title=["Cleaned Product C", "Cleaned Product D"])
+    assert save_to_csv(sample_clean_df, file_path, engine=engine, chunk_rows=1) is True
+    assert save_to_csv(more, file_path, mode='a', engine=engine, chunk_rows=1) is True
+    with open(file_path, 'rb') as f:
+        assert b"Cleaned Product" not in f.read() # Compressed on disk
+    loaded = load_from_csv(file_path, columns=['Title', 'Colors'], schema='compact')
+    assert list(loaded['Title']) == ["Cleaned Product A", "Cleaned Product B", "Cleaned Product C", "Cleaned Product D"]
+    assert loaded['Colors'].dtype == 'int8'
+
+def test_load_from_csv_compact_schema_with_pandas_engine(sample_clean_df, tmp_path):
+    file_path = tmp_path / "products.csv"
+    save_to_csv(sample_clean_df, file_path, engine='pandas')
+    loaded = load_from_csv(file_path, schema='compact', engine='pandas')
+    assert loaded['Size'].dtype == 'category'
+    assert loaded['Rating'].dtype == 'float32'
+    assert loaded['Timestamp'].equals(sample_clean_df['Timestamp'])
 
 def test_save_to_csv_empty_df(empty_df, caplog):
     with caplog.at_level(logging.WARNING):
@@ -57,7 +104,7 @@ def test_save_to_csv_empty_df(empty_df, caplog):
     assert "DataFrame is empty. Skipping CSV save." in caplog.text
 
 # --- Test save_to_postgresql ---
-@patch('utils.load.create_engine')
+@patch('sqlalchemy.create_engine')
 def test_save_to_postgresql_success(mock_create_engine, sample_clean_df):
     mock_engine = MagicMock()
     mock_connection = MagicMock()
@@ -68,13 +115,13 @@ def test_save_to_postgresql_success(mock_create_engine, sample_clean_df):
     mock_df_to_sql = MagicMock()
     # Patch metode to_sql pada objek DataFrame (semua instance DataFrame)
     with patch.object(pd.DataFrame, 'to_sql', mock_df_to_sql):
-        assert save_to_postgresql(sample_clean_df, "test_table") is True
+        assert save_to_postgresql(sample_clean_df, "test_table", method='to_sql') is True
     
     mock_create_engine.assert_called_once() 
     assert mock_connection.execute.call_count > 0 # CREATE TABLE IF NOT EXISTS dipanggil
     mock_df_to_sql.assert_called_once_with("test_table", mock_engine, if_exists='replace', index=False)
 
-@patch('utils.load.create_engine', side_effect=OperationalError("connection failed", "params", "orig_error"))
+@patch('sqlalchemy.create_engine', side_effect=OperationalError("connection failed", "params", "orig_error"))
 def test_save_to_postgresql_connection_error(mock_create_engine, sample_clean_df, caplog):
     with caplog.at_level(logging.ERROR):
         assert save_to_postgresql(sample_clean_df, "test_table") is False
@@ -89,7 +136,7 @@ def test_save_to_postgresql_empty_df(empty_df, caplog):
 
 # --- Test save_to_google_sheets ---
 # Patch utama adalah gspread.service_account yang dipanggil di utils.load
-@patch('utils.load.gspread.service_account') 
+@patch('gspread.service_account') 
 @patch('utils.load.os.path.exists', return_value=True) # Asumsikan file creds JSON ada
 def test_save_to_google_sheets_success_with_id(mock_os_exists, mock_gspread_service_account, sample_clean_df, monkeypatch):
     mock_client = MagicMock()
@@ -110,8 +157,10 @@ def test_save_to_google_sheets_success_with_id(mock_os_exists, mock_gspread_serv
     mock_gspread_service_account.assert_called_once_with(filename=GOOGLE_SHEETS_CREDENTIALS_FILE)
     expected_url = f"https://docs.google.com/spreadsheets/d/mock_sheet_id_123"
     mock_client.open_by_url.assert_called_once_with(expected_url)
-    mock_worksheet.clear.assert_called_once()
-    mock_worksheet.update.assert_called_once()
+    # Resized once and written through batch_update instead of clear() + one large update()
+    mock_worksheet.clear.assert_not_called()
+    mock_worksheet.resize.assert_called_once_with(rows=len(sample_clean_df) + 1, cols=len(sample_clean_df.columns))
+    mock_worksheet.batch_update.assert_called_once()
 
 
 @patch('utils.load.os.path.exists', return_value=False) # File creds JSON TIDAK ada
@@ -121,7 +170,7 @@ def test_save_to_google_sheets_no_creds_file(mock_os_exists, sample_clean_df, ca
         assert save_to_google_sheets(sample_clean_df) is False 
     assert f"Google Sheets credentials file not found: {GOOGLE_SHEETS_CREDENTIALS_FILE}" in caplog.text
 
-@patch('utils.load.gspread.service_account', side_effect=Exception("Simulated Auth Error"))
+@patch('gspread.service_account', side_effect=Exception("Simulated Auth Error"))
 @patch('utils.load.os.path.exists', return_value=True)
 def test_save_to_google_sheets_auth_error(mock_os_exists, mock_gspread_service_account, sample_clean_df, caplog):
     with caplog.at_level(logging.ERROR):
@@ -136,7 +185,7 @@ def test_save_to_google_sheets_empty_df(empty_df, caplog):
         assert save_to_google_sheets(empty_df) is False
     assert "DataFrame is empty. Skipping Google Sheets save." in caplog.text
 
-@patch('utils.load.gspread.service_account')
+@patch('gspread.service_account')
 @patch('utils.load.os.path.exists', return_value=True)
 def test_save_to_google_sheets_creates_new_sheet_by_name(mock_os_exists, mock_gspread_service_account, sample_clean_df, caplog, monkeypatch):
     mock_client = MagicMock()
@@ -178,4 +227,287 @@ def test_save_to_google_sheets_creates_new_sheet_by_name(mock_os_exists, mock_gs
 
     assert expected_log_not_found in caplog.text
     assert expected_log_created in caplog.text
-    assert expected_log_shared_info in caplog.text
\ No newline at end of file
+    assert expected_log_shared_info in caplog.text
+
+def test_sheet_values_handle_compact_schema(sample_clean_df):
+    compact = sample_clean_df.copy()
+    compact['Title'] = compact['Title'].astype('string')
+    compact['Size'] = compact['Size'].astype('category')
+    compact['Gender'] = compact['Gender'].astype('category')
+    compact['Rating'] = compact['Rating'].astype('float32')
+    compact['Colors'] = compact['Colors'].astype('int8')
+
+    rows = _sheet_values(compact)
+    assert rows == _sheet_values(sample_clean_df)
+    assert rows[1][:6] == ["Cleaned Product B", 320000, 3.8, 1, "L", "Women"]
+    assert isinstance(rows[0][6], str) # Timestamp serialised as text
+    assert all(type(value) in (str, int, float) for row in rows for value in row)
+
+
+def test_save_to_csv_append_writes_header_once(sample_clean_df, tmp_path):
+    file_path = tmp_path / "stream.csv"
+    assert save_to_csv(sample_clean_df.iloc[:1], file_path) is True
+    assert save_to_csv(sample_clean_df.iloc[1:], file_path, mode='a') is True
+    loaded = pd.read_csv(file_path)
+    assert list(loaded['Title']) == ["Cleaned Product A", "Cleaned Product B"]
+
+def test_save_to_csv_append_to_a_missing_file_writes_the_header(sample_clean_df, tmp_path):
+    file_path = tmp_path / "stream.csv"
+    assert save_to_csv(sample_clean_df, file_path, mode='a') is True
+    assert list(pd.read_csv(file_path)['Title']) == ["Cleaned Product A", "Cleaned Product B"]
+
+@patch('sqlalchemy.create_engine')
+def test_save_to_postgresql_append(mock_create_engine, sample_clean_df):
+    mock_engine = MagicMock()
+    mock_create_engine.return_value = mock_engine
+    mock_df_to_sql = MagicMock()
+    with patch.object(pd.DataFrame, 'to_sql', mock_df_to_sql):
+        assert save_to_postgresql(sample_clean_df, "test_table", if_exists='append', method='to_sql') is True
+    mock_df_to_sql.assert_called_once_with("test_table", mock_engine, if_exists='append', index=False)
+
+def _copy_statements(mock_cursor):
+    return [call.args[0] for call in mock_cursor.execute.call_args_list]
+
+@patch('sqlalchemy.create_engine')
+def test_save_to_postgresql_copy_merges_through_staging(mock_create_engine, sample_clean_df):
+    mock_raw_connection = MagicMock()
+    mock_cursor = mock_raw_connection.cursor.return_value
+    copied = {}
+    mock_cursor.copy_expert.side_effect = lambda sql, buffer: copied.update(sql=sql, data=buffer.read())
+    mock_create_engine.return_value.raw_connection.return_value = mock_raw_connection
+
+    with patch.object(pd.DataFrame, 'to_sql') as mock_df_to_sql:
+        assert save_to_postgresql(sample_clean_df, "test_table", method='copy') is True
+    mock_df_to_sql.assert_not_called()
+
+    statements = _copy_statements(mock_cursor)
+    assert statements[0] == "DROP TABLE IF EXISTS test_table"
+    assert 'PRIMARY KEY ("Title", "Size", "Gender", "Colors")' in statements[1]
+    assert "CREATE UNLOGGED TABLE IF NOT EXISTS test_table_staging" in statements[2]
+    assert any('ON CONFLICT ("Title", "Size", "Gender", "Colors") DO UPDATE' in sql for sql in statements)
+    assert copied['sql'].startswith("COPY test_table_staging (")
+    assert "Cleaned Product A" in copied['data'] and "Cleaned Product B" in copied['data']
+    mock_raw_connection.commit.assert_called_once()
+    mock_raw_connection.close.assert_called_once()
+
+@patch('sqlalchemy.create_engine')
+def test_save_to_postgresql_copy_append_keeps_table(mock_create_engine, sample_clean_df):
+    mock_raw_connection = MagicMock()
+    mock_create_engine.return_value.raw_connection.return_value = mock_raw_connection
+    duplicated = pd.concat([sample_clean_df, sample_clean_df], ignore_index=True)
+
+    assert save_to_postgresql(duplicated, "test_table", if_exists='append', method='copy') is True
+    statements = _copy_statements(mock_raw_connection.cursor.return_value)
+    assert not any(sql.startswith("DROP TABLE") for sql in statements)
+    # Rows sharing a primary key are collapsed before COPY
+    _, buffer = mock_raw_connection.cursor.return_value.copy_expert.call_args.args
+    assert len(buffer.getvalue().splitlines()) == len(sample_clean_df)
+
+@patch('sqlalchemy.create_engine')
+def test_save_to_postgresql_copy_rolls_back_on_error(mock_create_engine, sample_clean_df, caplog):
+    mock_raw_connection = MagicMock()
+    mock_raw_connection.cursor.return_value.copy_expert.side_effect = Exception("copy failed")
+    mock_create_engine.return_value.raw_connection.return_value = mock_raw_connection
+
+    with caplog.at_level(logging.ERROR):
+        assert save_to_postgresql(sample_clean_df, "test_table", method='copy') is False
+    mock_raw_connection.rollback.assert_called_once()
+    mock_raw_connection.commit.assert_not_called()
+    assert "copy failed" in caplog.text
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+def test_save_to_postgresql_copy_against_local_server(sample_clean_df, monkeypatch):
+    from sqlalchemy import create_engine, text
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    monkeypatch.setattr('sqlalchemy.create_engine', lambda _: engine)
+
+    assert save_to_postgresql(sample_clean_df, "etl_copy_test", method='copy') is True
+    assert save_to_postgresql(sample_clean_df, "etl_copy_test", if_exists='append', method='copy') is True
+    with engine.connect() as connection:
+        count = connection.execute(text("SELECT COUNT(*) FROM etl_copy_test")).scalar()
+        connection.execute(text("DROP TABLE etl_copy_test, etl_copy_test_staging"))
+        connection.commit()
+    assert count == len(sample_clean_df)
+
+def test_apply_changes_to_csv_appends_inserts_and_skips_no_changes(sample_clean_df, tmp_path):
+    from utils.cdc import compute_changes
+    file_path = tmp_path / "products.csv"
+    first = compute_changes(sample_clean_df.iloc[:1])
+    assert apply_changes_to_csv(first, file_path) is True
+
+    second = compute_changes(sample_clean_df, first.next_snapshot)
+    with patch('utils.load.save_to_csv', wraps=save_to_csv) as mock_save:
+        assert apply_changes_to_csv(second, file_path) is True
+    assert mock_save.call_args.kwargs['mode'] == 'a'
+    assert list(pd.read_csv(file_path)['Title']) == ["Cleaned Product A", "Cleaned Product B"]
+
+    with patch('utils.load.save_to_csv') as mock_save:
+        assert apply_changes_to_csv(compute_changes(sample_clean_df, second.next_snapshot), file_path) is True
+    mock_save.assert_not_called()
+
+@patch('sqlalchemy.create_engine')
+def test_apply_changes_to_postgresql_upserts_and_deletes(mock_create_engine, sample_clean_df):
+    from utils.cdc import compute_changes
+    mock_raw_connection = MagicMock()
+    mock_create_engine.return_value.raw_connection.return_value = mock_raw_connection
+    snapshot = compute_changes(sample_clean_df).next_snapshot
+    changed = sample_clean_df.iloc[[0]].copy()
+    changed['Price'] = 1.0
+
+    assert apply_changes_to_postgresql(compute_changes(changed, snapshot), "test_table") is True
+    statements = [call.args[0] for call in mock_raw_connection.cursor.return_value.execute.call_args_list]
+    assert not any(sql.startswith("DROP TABLE") for sql in statements)
+    assert any(sql.startswith("DELETE FROM test_table t USING test_table_staging s") for sql in statements)
+    assert any("ON CONFLICT" in sql for sql in statements)
+    mock_raw_connection.commit.assert_called_once()
+
+def test_apply_changes_to_google_sheets_patches_rows(sample_clean_df, monkeypatch):
+    from utils.cdc import compute_changes
+    snapshot = compute_changes(sample_clean_df).next_snapshot
+    changed = pd.concat([sample_clean_df, sample_clean_df.iloc[[0]].assign(Title="New Product")], ignore_index=True)
+    changed.loc[1, 'Rating'] = 1.0
+    mock_spreadsheet, mock_worksheet = MagicMock(), MagicMock()
+    monkeypatch.setattr('utils.load._open_products_worksheet', lambda: (mock_spreadsheet, mock_worksheet))
+
+    assert apply_changes_to_google_sheets(compute_changes(changed, snapshot)) is True
+    mock_worksheet.clear.assert_not_called()
+    (ranges,), _ = mock_worksheet.batch_update.call_args
+    assert ranges[0]['range'] == "A3:G3" # Second data row, below the header
+    assert ranges[0]['values'][0][0] == "Cleaned Product B"
+    appended = mock_worksheet.append_rows.call_args.args[0]
+    assert appended[0][0] == "New Product"
+
+@pytest.fixture
+def fake_sheets_client(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr('gspread.service_account', lambda filename: client)
+    monkeypatch.setattr('utils.load.os.path.exists', lambda path: True)
+    monkeypatch.setattr('utils.load.time.sleep', lambda seconds: None)
+    return client
+
+def _large_df(rows):
+    return pd.DataFrame({
+        'Title': [f"Product {i}" for i in range(rows)],
+        'Price': [float(i) for i in range(rows)],
+        'Rating': [4.5] * rows,
+        'Colors': [3] * rows,
+        'Size': ["M"] * rows,
+        'Gender': ["Men"] * rows,
+        'Timestamp': [pd.Timestamp("2024-01-01 12:00:00")] * rows,
+    })
+
+def test_save_to_google_sheets_writes_in_chunks(fake_sheets_client, monkeypatch):
+    monkeypatch.setattr('utils.load.SHEETS_CHUNK_ROWS', 10)
+    df = _large_df(25)
+    assert save_to_google_sheets(df) is True
+
+    worksheet = fake_sheets_client.spreadsheet.worksheet("Products Data")
+    assert worksheet.calls.count('resize') == 1
+    assert worksheet.calls.count('batch_update') == 3 # 26 rows incl. header, 10 per chunk
+    values = worksheet.get_all_values()
+    assert values[0] == df.columns.tolist()
+    assert values[-1][:2] == ["Product 24", 24.0]
+    assert values[-1][-1] == "2024-01-01 12:00:00"
+
+def test_save_to_google_sheets_shrinks_stale_rows(fake_sheets_client):
+    assert save_to_google_sheets(_large_df(20)) is True
+    assert save_to_google_sheets(_large_df(5)) is True
+    assert len(fake_sheets_client.spreadsheet.worksheet("Products Data").get_all_values()) == 6
+
+def test_save_to_google_sheets_retries_quota_errors(fake_sheets_client, monkeypatch, caplog):
+    sleeps = []
+    monkeypatch.setattr('utils.load.time.sleep', sleeps.append)
+    spreadsheet = fake_sheets_client.spreadsheet
+    worksheet = spreadsheet.add_worksheet("Products Data", rows=1, cols=1)
+    worksheet.failures = [429, 429]
+
+    with caplog.at_level(logging.WARNING):
+        assert save_to_google_sheets(_large_df(3)) is True
+    assert sleeps == [1.0, 2.0]
+    assert "Google Sheets API returned 429" in caplog.text
+    assert len(worksheet.get_all_values()) == 4
+
+def test_save_to_google_sheets_retries_gateway_errors(fake_sheets_client, monkeypatch):
+    monkeypatch.setattr('utils.load.time.sleep', lambda seconds: None)
+    worksheet = fake_sheets_client.spreadsheet.add_worksheet("Products Data", rows=1, cols=1)
+    worksheet.failures = [502, 504]
+    assert save_to_google_sheets(_large_df(3)) is True
+    assert len(worksheet.get_all_values()) == 4
+
+def test_save_to_google_sheets_gives_up_on_non_retryable_errors(fake_sheets_client, caplog):
+    worksheet = fake_sheets_client.spreadsheet.add_worksheet("Products Data", rows=1, cols=1)
+    worksheet.failures = [403]
+    with caplog.at_level(logging.ERROR):
+        assert save_to_google_sheets(_large_df(3)) is False
+    assert worksheet.calls == ['resize']
+    assert "An unexpected error occurred during Google Sheets operation" in caplog.text
+
+def test_dispatch_sinks_runs_loaders_concurrently(sample_clean_df):
+    import threading
+    barrier = threading.Barrier(3, timeout=5) # Only passes if all three loaders run at once
+
+    def loader(df):
+        barrier.wait()
+        return True
+
+    results = dispatch_sinks(sample_clean_df, {'a': loader, 'b': loader, 'c': loader})
+    assert all(result['success'] for result in results.values())
+    assert all(result['rows'] == len(sample_clean_df) for result in results.values())
+
+def test_dispatch_sinks_isolates_failures_and_timeouts(sample_clean_df, caplog):
+    import threading
+    release = threading.Event()
+
+    def failing(df):
+        raise RuntimeError("sink exploded")
+
+    def slow(df):
+        release.wait(5)
+        return True
+
+    with caplog.at_level(logging.INFO):
+        results = dispatch_sinks(sample_clean_df, {
+            'ok': lambda df: (True, 1), # Partial (incremental) load reports its own row count
+            'failing': failing,
+            'rejected': lambda df: False,
+            'slow': slow,
+        }, timeouts={'slow': 0.1})
+    release.set()
+
+    assert results['ok'] == {'success': True, 'rows': 1, 'seconds': results['ok']['seconds'], 'error': None}
+    assert results['failing']['success'] is False and results['failing']['error'] == "sink exploded"
+    assert results['rejected']['success'] is False and results['rejected']['rows'] == 0
+    assert results['slow']['success'] is False and "timed out" in results['slow']['error']
+    assert "Load phase finished" in caplog.text
+
+def test_save_to_parquet_round_trip_keeps_types(sample_clean_df, tmp_path):
+    path = str(tmp_path / "products.parquet")
+    assert save_to_parquet(sample_clean_df, path, row_group_size=1) is True
+    assert pq.ParquetFile(path).metadata.num_row_groups == 2
+    pd.testing.assert_frame_equal(load_from_parquet(path), sample_clean_df, check_dtype=False)
+    loaded = load_from_parquet(path, columns=['Title', 'Price'])
+    assert list(loaded.columns) == ['Title', 'Price']
+    assert loaded['Price'].dtype == 'int64'
+
+def test_save_to_feather_round_trip(sample_clean_df, tmp_path):
+    path = str(tmp_path / "products.feather")
+    assert save_to_parquet(sample_clean_df, path, file_format='feather', compression='uncompressed') is True
+    loaded = load_from_parquet(path, columns=['Rating'], file_format='feather')
+    assert loaded['Rating'].tolist() == [4.5, 3.8]
+
+def test_save_to_parquet_partitions_by_run_date_and_gender(sample_clean_df, tmp_path):
+    path = str(tmp_path / "dataset")
+    assert save_to_parquet(sample_clean_df, path, partition_cols=['run_date', 'Gender']) is True
+    run_date = sample_clean_df['Timestamp'].iloc[0].strftime('%Y-%m-%d')
+    assert os.path.isdir(os.path.join(path, f"run_date={run_date}", "Gender=Men"))
+
+    men = load_from_parquet(path, columns=['Title'], filters=[('Gender', '=', 'Men')])
+    assert men['Title'].tolist() == ["Cleaned Product A"]
+    # Rewriting the same run replaces its partitions instead of duplicating rows
+    assert save_to_parquet(sample_clean_df, path, partition_cols=['run_date', 'Gender']) is True
+    assert len(load_from_parquet(path)) == 2
+
+def test_save_to_parquet_rejects_unknown_format(sample_clean_df, tmp_path, caplog):
+    with caplog.at_level(logging.ERROR):
+        assert save_to_parquet(sample_clean_df, str(tmp_path / "x"), file_format='orc') is False
+    assert "Unknown columnar file format 'orc'" in caplog.text
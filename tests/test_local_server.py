@@ -0,0 +1,72 @@
+import pytest
+import requests
+from utils.cache import PageCache
+from utils.extract import extract_all_products, iter_extract_chunks, fetch_page_content, TokenBucket
+from utils.fetcher import PageFetcher
+from utils.local_server import CatalogServer
+from utils.parsers import parse_cards_lxml
+from utils.synthetic import generate_catalog_pages
+
+@pytest.fixture
+def point_extractor_at(monkeypatch):
+    def point(server, pages):
+        monkeypatch.setattr('utils.extract.BASE_URL', server.url)
+        monkeypatch.setattr('utils.extract.MAX_PAGES', pages)
+    return point
+
+def test_serves_catalog_pages_with_site_pagination():
+    with CatalogServer(pages=3, products_per_page=5) as server:
+        first = requests.get(server.url + "/")
+        third = requests.get(server.url + "/page3")
+        missing = requests.get(server.url + "/page4")
+    assert first.status_code == 200 and third.status_code == 200
+    assert len(parse_cards_lxml(first.content)) == 5
+    assert "Page 3 of 3" in third.text
+    assert missing.status_code == 404
+    assert first.content.decode('utf-8') == generate_catalog_pages(15, per_page=5)[0]
+
+def test_etag_answers_304():
+    with CatalogServer(pages=1) as server:
+        etag = requests.get(server.url).headers['ETag']
+        assert requests.get(server.url, headers={'If-None-Match': etag}).status_code == 304
+        assert requests.get(server.url, headers={'If-None-Match': '"other"'}).status_code == 200
+
+def test_extract_end_to_end(point_extractor_at):
+    with CatalogServer(pages=4, products_per_page=10) as server:
+        point_extractor_at(server, 4)
+        df = extract_all_products(max_workers=4, rate_limiter=TokenBucket(rate=0))
+    assert len(df) == 40
+    assert server.stats[200] == 4
+
+def test_extract_discovers_page_count_beyond_max_pages(point_extractor_at):
+    with CatalogServer(pages=6, products_per_page=3) as server:
+        point_extractor_at(server, 2)
+        df = extract_all_products(max_workers=3, rate_limiter=TokenBucket(rate=0))
+        chunks = list(iter_extract_chunks(max_workers=2, rate_limiter=TokenBucket(rate=0)))
+    assert len(df) == 18
+    assert [len(chunk) for chunk in chunks] == [3] * 6
+    assert server.stats[404] == 0 # No page past the last one is requested
+
+def test_extract_retries_throttling_and_errors(point_extractor_at):
+    with CatalogServer(pages=5, products_per_page=2, error_rate=0.3, throttle_rate=0.3, retry_after=0,
+                       seed=7) as server:
+        point_extractor_at(server, 5)
+        with PageFetcher(max_retries=10, backoff_factor=0) as fetcher:
+            df = extract_all_products(max_workers=2, rate_limiter=TokenBucket(rate=0), fetcher=fetcher)
+    assert len(df) == 10
+    assert server.stats[429] + server.stats[503] > 0
+
+def test_max_requests_per_second_throttles():
+    with CatalogServer(pages=1, max_requests_per_second=2) as server:
+        statuses = [requests.get(server.url).status_code for _ in range(4)]
+    assert statuses[:2] == [200, 200]
+    assert 429 in statuses[2:]
+
+def test_conditional_get_against_local_server(point_extractor_at, tmp_path):
+    cache = PageCache(cache_dir=str(tmp_path))
+    with CatalogServer(pages=1) as server:
+        point_extractor_at(server, 1)
+        first = fetch_page_content(1, cache=cache)
+        second = fetch_page_content(1, cache=cache)
+    assert first == second
+    assert server.stats[304] == 1
@@ -0,0 +1,119 @@
+import pytest
+import pandas as pd
+import main
+from utils.artifacts import artifact_info
+
+@pytest.fixture
+def pipeline(sample_raw_df, tmp_path, monkeypatch):
+    """Runs main() with extraction and the sinks replaced; records what each stage received."""
+    calls = {'extract': [], 'sinks': []}
+    def fake_extract(max_workers=None, parse_workers=None, pages=None):
+        calls['extract'].append({'max_workers': max_workers, 'pages': pages})
+        return sample_raw_df.copy()
+    def fake_dispatch(df, sinks):
+        calls['sinks'].append(sorted(sinks))
+        return {name: {'success': name != 'Google Sheets' or calls.get('sheets_ok', False)} for name in sinks}
+    monkeypatch.setattr(main, 'extract_all_products', fake_extract)
+    monkeypatch.setattr(main, 'dispatch_sinks', fake_dispatch)
+    monkeypatch.setattr(main, 'write_run_report', lambda: None)
+    def run(*args):
+        return main.main(list(args) + ["--artifact-dir", str(tmp_path)])
+    run.calls = calls
+    return run
+
+def test_parse_pages():
+    assert main.parse_pages("3") == [3]
+    assert main.parse_pages("1-3,8,2") == [1, 2, 3, 8]
+    for bad in ("0-2", "5-3", "a"):
+        with pytest.raises(Exception):
+            main.parse_pages(bad)
+
+def test_full_run_selects_pages_workers_and_sinks(pipeline):
+    assert pipeline("--pages", "1-2", "--workers", "3", "--sinks", "csv", "parquet") == 0
+    assert pipeline.calls['extract'] == [{'max_workers': 3, 'pages': [1, 2]}]
+    assert pipeline.calls['sinks'] == [['CSV', 'Parquet']]
+
+def test_single_stages_hand_over_through_checkpoints(pipeline):
+    assert pipeline("--stage", "load") == 1 # Nothing checkpointed yet
+    assert pipeline("--stage", "extract") == 0
+    assert pipeline.calls['sinks'] == []
+    assert pipeline("--stage", "transform", "load", "--sinks", "sheets") == 1 # The Sheets load fails
+    pipeline.calls['sheets_ok'] = True
+    # Rerunning just the failed sink reads the transform checkpoint without extracting again
+    assert pipeline("--stage", "load", "--sinks", "sheets") == 0
+    assert len(pipeline.calls['extract']) == 1
+    assert pipeline.calls['sinks'] == [['Google Sheets'], ['Google Sheets']]
+
+def test_resume_skips_checkpointed_stages(pipeline):
+    assert pipeline("--stage", "extract") == 0
+    assert pipeline("--resume", "--sinks", "csv") == 0
+    assert len(pipeline.calls['extract']) == 1 # Resumed from the extract checkpoint
+    assert pipeline("--resume", "--sinks", "csv") == 0
+    assert len(pipeline.calls['extract']) == 2 # The previous run finished, so this one starts over
+    assert pipeline("--sinks", "csv") == 0 # Without --resume everything runs again
+    assert len(pipeline.calls['extract']) == 3
+
+def test_resume_reruns_only_the_failed_sinks(pipeline, tmp_path):
+    assert pipeline("--sinks", "csv", "sheets", "history") == 1 # The Sheets load fails
+    assert artifact_info('clean', str(tmp_path))['loaded_sinks'] == ['csv', 'history']
+    assert pipeline("--resume", "--sinks", "csv", "sheets", "history") == 1
+    pipeline.calls['sheets_ok'] = True
+    assert pipeline("--resume", "--sinks", "csv", "sheets", "history") == 0
+    assert pipeline.calls['sinks'] == [['CSV', 'Google Sheets', 'History'], ['Google Sheets'], ['Google Sheets']]
+    assert artifact_info('clean', str(tmp_path))['loaded'] is True
+    assert len(pipeline.calls['extract']) == 1
+
+def test_resume_after_failed_transform_does_not_load_stale_rows(pipeline, monkeypatch, tmp_path):
+    assert pipeline("--stage", "extract", "transform") == 0
+    stale_run = artifact_info('clean', str(tmp_path))['run_id']
+    real_transform = main.transform_data
+    monkeypatch.setattr(main, 'transform_data', lambda df: pd.DataFrame()) # Extract succeeds, transform fails
+    assert pipeline("--sinks", "csv") == 1
+    assert artifact_info('clean', str(tmp_path)) is None # The old transform output was dropped
+    monkeypatch.setattr(main, 'transform_data', real_transform)
+    assert pipeline("--resume", "--sinks", "csv") == 0
+    assert len(pipeline.calls['extract']) == 2 # Resumed from the new extract checkpoint
+    assert artifact_info('clean', str(tmp_path))['run_id'] != stale_run
+
+def test_resume_refuses_checkpoints_of_other_pages(pipeline):
+    assert pipeline("--stage", "extract", "--pages", "1-2") == 0
+    assert pipeline("--resume", "--pages", "1-3", "--sinks", "csv") == 1
+    assert pipeline("--resume", "--pages", "1-2", "--sinks", "csv") == 0
+    assert len(pipeline.calls['extract']) == 1
+
+def test_full_rewrites_drop_the_cdc_snapshot(sample_raw_df, tmp_path, monkeypatch):
+    from utils.cdc import compute_changes, save_snapshot, load_snapshot
+    monkeypatch.setattr(main, 'CDC_SNAPSHOT_DIR', str(tmp_path))
+    monkeypatch.setattr(main, 'INCREMENTAL_LOAD', False)
+    monkeypatch.setattr(main, 'save_to_csv', lambda df, *args, **kwargs: True)
+    monkeypatch.setattr(main, 'save_to_postgresql', lambda df, *args, **kwargs: True)
+    for sink in ('csv', 'postgresql'):
+        save_snapshot(compute_changes(sample_raw_df).next_snapshot, sink, str(tmp_path))
+
+    assert main.build_sinks(['csv'])['CSV'](sample_raw_df) is True
+    assert load_snapshot('csv', str(tmp_path)) is None
+    assert load_snapshot('postgresql', str(tmp_path)) is not None
+
+    monkeypatch.setattr(main, 'iter_extract_chunks', lambda **kwargs: iter([sample_raw_df.copy()]))
+    monkeypatch.setattr(main, 'write_run_report', lambda: None)
+    monkeypatch.setattr(main, 'DEDUP_FILTER_PATH', None)
+    assert main.run_streaming_etl_pipeline() is True
+    assert load_snapshot('postgresql', str(tmp_path)) is None
+
+def test_streaming_with_dedup_filter_into_an_empty_output_dir(sample_raw_df, tmp_path, monkeypatch):
+    csv_path = tmp_path / "out" / "products.csv"
+    csv_path.parent.mkdir()
+    monkeypatch.setattr(main, 'CSV_FILE_PATH', str(csv_path))
+    monkeypatch.setattr(main, 'DEDUP_FILTER_PATH', str(tmp_path / "seen.bloom"))
+    monkeypatch.setattr(main, 'CDC_SNAPSHOT_DIR', str(tmp_path / "cdc"))
+    monkeypatch.setattr(main, 'save_to_postgresql', lambda df, *args, **kwargs: True)
+    monkeypatch.setattr(main, 'write_run_report', lambda: None)
+    chunks = [sample_raw_df.iloc[:2], sample_raw_df.iloc[2:]]
+    monkeypatch.setattr(main, 'iter_extract_chunks', lambda **kwargs: iter(chunk.copy() for chunk in chunks))
+
+    assert main.run_streaming_etl_pipeline() is True
+    loaded = pd.read_csv(csv_path)
+    assert loaded['Title'].tolist() == ["Product A", "Product C"]
+    # A second run skips the products already loaded and leaves the file as it is
+    assert main.run_streaming_etl_pipeline() is True
+    assert pd.read_csv(csv_path)['Title'].tolist() == ["Product A", "Product C"]
@@ -0,0 +1,80 @@
+import json
+import pstats
+import pytest
+import requests_mock
+from utils.metrics import MetricsRecorder, METRICS, compare_reports
+from utils.config import BASE_URL
+from utils.extract import fetch_page_content, parse_product_data
+from utils.transform import transform_data
+from tests.test_extract import MOCK_HTML_PAGE_1_CONTENT
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    METRICS.reset()
+    yield
+    METRICS.reset()
+
+def test_stage_accumulates_calls():
+    recorder = MetricsRecorder(enabled=True)
+    for rows in (3, 4):
+        with recorder.stage('step', rows_in=rows) as stage:
+            stage.rows_out = rows - 1
+            stage.bytes = 10
+    stats = recorder.report()['stages']['step']
+    assert stats['calls'] == 2
+    assert stats['rows_in'] == 7 and stats['rows_out'] == 5 and stats['bytes'] == 20
+    assert stats['wall_seconds'] >= stats['max_wall_seconds'] >= 0
+    assert stats['cpu_seconds'] >= 0
+
+def test_disabled_recorder_records_nothing():
+    recorder = MetricsRecorder(enabled=False)
+    with recorder.stage('step') as stage:
+        stage.rows_out = 1
+    assert recorder.report()['stages'] == {}
+
+def test_instrumented_functions_report_bytes_and_rows():
+    with requests_mock.Mocker() as m:
+        m.get(BASE_URL, content=MOCK_HTML_PAGE_1_CONTENT.encode('utf-8'))
+        html = fetch_page_content(1)
+    rows = parse_product_data(html, 1)
+    stages = METRICS.report()['stages']
+    assert stages['fetch_page_content']['bytes'] == len(html)
+    assert stages['parse_product_data']['rows_out'] == len(rows)
+
+@pytest.mark.parametrize("engine", ["rowwise", "vectorized", "memoized"])
+def test_transform_records_each_cleaning_step(sample_raw_df, engine):
+    transform_data(sample_raw_df, engine=engine)
+    stages = METRICS.report()['stages']
+    for name in ('clean_price', 'convert_price_to_idr', 'clean_rating', 'clean_colors', 'clean_size', 'clean_gender'):
+        assert stages[name]['rows_in'] == len(sample_raw_df)
+
+def test_json_and_prometheus_output(tmp_path):
+    recorder = MetricsRecorder(enabled=True)
+    with recorder.stage('load:CSV', rows_in=2) as stage:
+        stage.rows_out = 2
+    recorder.write_json(tmp_path / "report.json")
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert report['stages']['load:CSV']['rows_out'] == 2
+
+    recorder.write_prometheus(str(tmp_path / "etl.prom"))
+    text = (tmp_path / "etl.prom").read_text()
+    assert "# TYPE etl_stage_wall_seconds gauge" in text
+    assert 'etl_stage_rows_out{stage="load:CSV"} 2' in text
+
+def test_cprofile_hook_writes_profiles(tmp_path):
+    recorder = MetricsRecorder(enabled=True, profiler='cprofile', profile_stages=['hot'])
+
+    with recorder.stage('hot'):
+        sum(range(1000))
+    with recorder.stage('cold'):
+        pass
+    paths = recorder.write_profiles(str(tmp_path))
+    assert [p.split('/')[-1] for p in paths] == ["hot.prof"]
+    assert pstats.Stats(paths[0]).total_calls > 0
+
+def test_compare_reports_flags_regressions():
+    baseline = {'stages': {'parse': {'wall_seconds': 1.0}, 'tiny': {'wall_seconds': 0.001}}}
+    report = {'stages': {'parse': {'wall_seconds': 1.5}, 'tiny': {'wall_seconds': 0.004},
+                         'new': {'wall_seconds': 9.0}}}
+    assert compare_reports(report, baseline, threshold=0.2) == ["parse: 1.000s -> 1.500s"]
+    assert compare_reports(report, baseline, threshold=0.6) == []
@@ -0,0 +1,54 @@
+import pytest
+import json
+import logging
+import sys
+from pathlib import Path
+from utils.parsers import parse_cards_bs4, parse_cards_lxml, get_parser_backend, parse_page_count
+from utils.extract import parse_product_data
+from tests.test_extract import MOCK_HTML_PAGE_1_CONTENT, MOCK_HTML_PAGE_2_CONTENT, MOCK_HTML_PAGE_EMPTY_CONTENT
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+FIXTURE_PAGES = sorted(FIXTURES_DIR.glob("catalog_page*.html"))
+
+@pytest.mark.parametrize("page_path", FIXTURE_PAGES, ids=lambda p: p.name)
+def test_lxml_backend_matches_bs4_on_fixture_pages(page_path):
+    html_bytes = page_path.read_bytes()
+    reference = parse_cards_bs4(html_bytes)
+    fast = parse_cards_lxml(html_bytes)
+    assert len(reference) > 0
+    # Byte-identical rows, including key order
+    assert json.dumps(fast, ensure_ascii=False).encode('utf-8') == json.dumps(reference, ensure_ascii=False).encode('utf-8')
+
+@pytest.mark.parametrize("html", [MOCK_HTML_PAGE_1_CONTENT, MOCK_HTML_PAGE_2_CONTENT, MOCK_HTML_PAGE_EMPTY_CONTENT, ""])
+def test_lxml_backend_matches_bs4_on_inline_markup(html):
+    assert parse_cards_lxml(html) == parse_cards_bs4(html)
+
+def test_fixture_edge_cases_are_covered():
+    rows = parse_cards_lxml((FIXTURES_DIR / "catalog_page2.html").read_bytes())
+    odd = rows[-2]
+    assert odd['Title'] == "Crewneck & Co 8"
+    assert odd['Price'] == "$75.50"
+    assert odd['Size'] == "Size: Unknown" # <p>Size: <span>S</span></p> has no single string
+    assert rows[-1]['Title'] == "Unknown Product"
+    assert rows[0]['Colors'] == "0 Colors" # "1 Color" never matches the "Colors" filter
+
+@pytest.mark.parametrize("backend", ["bs4", "lxml"])
+def test_parse_product_data_with_each_backend(backend):
+    products = parse_product_data(MOCK_HTML_PAGE_1_CONTENT, 1, backend=backend)
+    assert [p['Title'] for p in products] == ["Cool T-Shirt", "Awesome Jeans"]
+    assert products[0]['Timestamp'] == products[1]['Timestamp']
+
+def test_parse_product_data_unknown_backend(caplog):
+    with caplog.at_level(logging.ERROR):
+        assert parse_product_data(MOCK_HTML_PAGE_1_CONTENT, 3, backend="regex") == []
+    assert "Unknown parser backend 'regex'" in caplog.text
+
+def test_get_parser_backend_falls_back_without_lxml(monkeypatch, caplog):
+    monkeypatch.setitem(sys.modules, 'lxml', None)
+    with caplog.at_level(logging.WARNING):
+        assert get_parser_backend('lxml') is parse_cards_bs4
+    assert "falling back to the 'bs4' parser backend" in caplog.text
+
+def test_parse_page_count():
+    assert parse_page_count((FIXTURES_DIR / "catalog_page2.html").read_bytes()) == 50
+    assert parse_page_count("<html><body></body></html>") is None
@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# HTTP, parser and sink dependencies must not be imported before their stage runs
+DEFERRED_MODULES = ['requests', 'sqlalchemy', 'gspread', 'google.auth', 'bs4', 'lxml',
+                    'pyarrow.parquet', 'pyarrow.feather', 'pyarrow.csv']
+# Import time of main.py on top of pandas, which every run needs
+STARTUP_BUDGET_SECONDS = 0.25
+
+def run_python(statement):
+    """
+    Runs `statement` in a fresh interpreter under `python -X importtime`.
+    Returns ({module: cumulative import seconds}, set of modules imported by the end).
+    """
+    code = f"{statement}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times.setdefault(name.strip(), int(cumulative) / 1e6)
+    return times, set(json.loads(result.stdout.splitlines()[-1]))
+
+@pytest.fixture(scope="module")
+def main_import():
+    return run_python("import main")
+
+def test_main_defers_sink_and_parser_imports(main_import):
+    _, modules = main_import
+    assert [name for name in DEFERRED_MODULES if name in modules] == []
+
+def test_main_import_time_budget(main_import):
+    times, _ = main_import
+    own = times['main'] - times.get('pandas', 0)
+    assert own < STARTUP_BUDGET_SECONDS, f"importing main took {own:.3f}s on top of pandas"
+
+def test_deferred_dependencies_load_on_first_use():
+    _, modules = run_python("import utils.fetcher, utils.parsers\n"
+                            "utils.fetcher.PageFetcher()\n"
+                            "utils.parsers.get_parser_backend('lxml')(b'<html></html>')")
+    assert 'requests' in modules and 'lxml' in modules and 'bs4' in modules
+    assert 'sqlalchemy' not in modules and 'gspread' not in modules
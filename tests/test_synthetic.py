@@ -0,0 +1,53 @@
+import json
+import pytest
+from utils.synthetic import generate_raw_products, generate_catalog_pages, render_catalog_page
+from utils.parsers import parse_cards_bs4, parse_cards_lxml
+from utils.transform import transform_data
+from benchmarks.run_benchmarks import run_benchmarks, main as run_benchmarks_main
+
+def test_generated_rows_have_requested_shares():
+    df = generate_raw_products(20_000, invalid_price_share=0.1, not_rated_share=0.2, duplicate_share=0.0, seed=1)
+    assert len(df) == 20_000
+    assert (df['Price'] == "Price Unavailable").mean() == pytest.approx(0.1, abs=0.01)
+    assert (df['Rating'] == "Rating: Not Rated").mean() == pytest.approx(0.2 * 0.9, abs=0.01)
+    valid = df[df['Price'] != "Price Unavailable"] # Invalid cards all look alike
+    assert not valid.drop(columns='Timestamp').duplicated().any()
+
+def test_duplicates_repeat_earlier_rows():
+    df = generate_raw_products(10_000, invalid_price_share=0.0, duplicate_share=0.1, seed=2)
+    assert df.drop(columns='Timestamp').duplicated().mean() == pytest.approx(0.1, abs=0.02)
+
+def test_generation_is_deterministic_per_seed():
+    first = generate_raw_products(100, seed=3).drop(columns='Timestamp')
+    assert first.equals(generate_raw_products(100, seed=3).drop(columns='Timestamp'))
+    assert not first.equals(generate_raw_products(100, seed=4).drop(columns='Timestamp'))
+
+def test_rendered_pages_parse_back_to_the_raw_rows():
+    raw = generate_raw_products(45, seed=5).drop(columns='Timestamp').to_dict('records')
+    pages = generate_catalog_pages(45, seed=5)
+    assert len(pages) == 3
+    assert "Page 3 of 3" in pages[2] and "/page3" in pages[1]
+    parsed = [row for page in pages for row in parse_cards_lxml(page)]
+    assert parsed == raw
+    assert parse_cards_bs4(pages[0]) == parse_cards_lxml(pages[0])
+
+def test_rendered_titles_are_escaped():
+    row = {'Title': 'Tee <b>&</b>', 'Price': "$1.00", 'Rating': "Rating: ⭐ 4.0 / 5",
+           'Colors': "1 Colors", 'Size': "Size: M", 'Gender': "Gender: Men"}
+    assert parse_cards_lxml(render_catalog_page([row], 1, 1)) == [row]
+
+def test_synthetic_rows_survive_transform():
+    df = generate_raw_products(2_000, seed=6)
+    cleaned = transform_data(df)
+    assert 0 < len(cleaned) < len(df)
+    assert (cleaned['Title'] != "Unknown Product").all()
+
+def test_benchmark_runner_smoke(tmp_path, capsys):
+    results = run_benchmarks(products=500, pages=1, repeat=1, sheets_rows=100, output_dir=str(tmp_path))
+    assert {'parse_bs4', 'transform_vectorized', 'load_csv', 'load_parquet', 'load_sheets_fake'} <= set(results['stages'])
+
+    baseline = tmp_path / "baseline.json"
+    args = ["--products", "500", "--pages", "1", "--repeat", "1", "--sheets-rows", "100", "--baseline", str(baseline)]
+    assert run_benchmarks_main(args + ["--save-baseline"]) == 0
+    assert json.loads(baseline.read_text())['params']['products'] == 500
+    assert run_benchmarks_main(args + ["--threshold", "1000"]) == 0
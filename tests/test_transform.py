@@ -4,26 +4,15 @@ import numpy as np
 from datetime import datetime
 from utils.transform import (
     clean_price, convert_price_to_idr, clean_rating, clean_colors,
-    clean_size, clean_gender, transform_data
+    clean_size, clean_gender, transform_data,
+    clean_price_series, convert_price_to_idr_series, clean_rating_series,
+    clean_colors_series, clean_size_series, clean_gender_series,
+    memoized, clear_memoized_cleaners, map_unique
 )
+from utils.dedup import Deduplicator
 from utils.config import USD_TO_IDR_EXCHANGE_RATE # Pastikan ini diimpor
 import logging # Untuk caplog
 
-@pytest.fixture
-def sample_raw_df():
-    """Provides a sample raw DataFrame for testing transformations."""
-    now = datetime.now()
-    data = {
-        'Title': ["Product A", "Product B", "Unknown Product", "Product C", "Product A"],
-        'Price': ["$10.50", "Price Unavailable", "$5.00", "$20", "$10.50"],
-        'Rating': ["Rating: ⭐ 4.5 / 5", "Rating: Invalid Rating / 5", "Rating: ⭐ 3.0 / 5", "Rating: 2 / 5", "Rating: ⭐ 4.5 / 5"],
-        'Colors': ["3 Colors", "2 Colors", "1 Color", "No Colors Here", "3 Colors"],
-        'Size': ["Size: M", "Size: L", "Size: S", "Size: XL", "Size: M"],
-        'Gender': ["Gender: Men", "Gender: Women", "Gender: Unisex", "Gender: Men", "Gender: Men"],
-        'Timestamp': [now, now, now, now, now]
-    }
-    return pd.DataFrame(data)
-
 @pytest.fixture
 def empty_df():
     return pd.DataFrame()
@@ -151,8 +140,189 @@ def test_transform_data_type_error_handling(sample_raw_df, caplog, monkeypatch):
     monkeypatch.setattr('utils.transform.clean_size', faulty_clean_size)
     
     with caplog.at_level(logging.ERROR): # Tangkap ERROR dari transform_data
-        df_transformed = transform_data(sample_raw_df.copy()) 
+        df_transformed = transform_data(sample_raw_df.copy(), engine="rowwise") 
     
     assert "An error occurred during data transformation" in caplog.text
     assert "Simulated type error in clean_size" in caplog.text 
-    assert df_transformed.empty 
\ No newline at end of file
+    assert df_transformed.empty 
+
+def test_transform_data_vectorized_error_handling(sample_raw_df, caplog, monkeypatch):
+    """Test error handling when a vectorized cleaner fails."""
+    def faulty_clean_size_series(sizes):
+        raise TypeError("Simulated type error in clean_size_series")
+
+    monkeypatch.setattr('utils.transform.clean_size_series', faulty_clean_size_series)
+
+    with caplog.at_level(logging.ERROR):
+        df_transformed = transform_data(sample_raw_df.copy(), engine="vectorized")
+
+    assert "Simulated type error in clean_size_series" in caplog.text
+    assert df_transformed.empty
+
+def test_transform_data_unknown_engine(sample_raw_df, caplog):
+    with caplog.at_level(logging.ERROR):
+        assert transform_data(sample_raw_df, engine="spark").empty
+    assert "Unknown transform engine 'spark'" in caplog.text
+
+# --- Vectorized engine parity with the row-wise reference ---
+EDGE_PRICES = ["$10.50", "$1,234.56", "$20", "$ 12", "$5.", "$.5", "$1e3", "$٣.5", "Price Unavailable",
+               "", None, np.nan, "abc", "$102.15"]
+EDGE_RATINGS = ["Rating: ⭐ 4.5 / 5", "Rating: Not Rated", "Rating: ⭐ Invalid Rating / 5", "Rating: 3/5",
+                "", None, np.nan, "Some other text", "4", "Rating: ٤.٥ / 5", "Rating: ⭐ 3 / 5", "x", "5.0.1", "Rating:"]
+EDGE_COLORS = ["3 Colors", "1 Color", " 2 colors ", "No Colors Here", "", None, np.nan, "abc", "10Colors",
+               "5 Colours", "07 Colors", "Colors 3", "٣ Colors", "3"]
+EDGE_SIZES = ["Size: M", "Size: Extra Large", "Size: ", None, np.nan, "", "No Size Prefix", " Size: S ",
+              "Size: Size: L", "size: m", "Size:M", "Size: XL", "Size: XXL", "Size: S"]
+EDGE_GENDERS = ["Gender: Men", "Gender: Women", "Gender: ", None, np.nan, "", "No Gender Prefix",
+                " Gender: Unisex ", "Gender: Gender: Men", "gender: men", "Gender:Men", "Gender: Unisex",
+                "Gender: Men", "Gender: Women"]
+
+@pytest.mark.parametrize("values, vectorized, rowwise", [
+    (EDGE_PRICES, clean_price_series, clean_price),
+    (EDGE_RATINGS, clean_rating_series, clean_rating),
+    (EDGE_COLORS, clean_colors_series, clean_colors),
+    (EDGE_SIZES, clean_size_series, clean_size),
+    (EDGE_GENDERS, clean_gender_series, clean_gender),
+    ([10, "3 Colors", None], clean_colors_series, clean_colors), # Mixed types take the fallback path
+    ([4.5, "Rating: 3/5", None], clean_rating_series, clean_rating),
+])
+def test_vectorized_cleaners_match_rowwise(values, vectorized, rowwise):
+    series = pd.Series(values, dtype=object)
+    expected = series.apply(rowwise)
+    result = vectorized(series)
+    pd.testing.assert_series_equal(result, expected, check_dtype=False)
+
+def test_convert_price_to_idr_series_matches_rowwise():
+    prices = pd.Series([10.5, np.nan, 0.0, 1234.56])
+    pd.testing.assert_series_equal(convert_price_to_idr_series(prices), prices.apply(convert_price_to_idr))
+
+def test_transform_data_engines_agree():
+    now = datetime.now()
+    n = len(EDGE_PRICES)
+    raw = pd.DataFrame({
+        'Title': [f"Product {i % 5}" for i in range(n)],
+        'Price': EDGE_PRICES,
+        'Rating': EDGE_RATINGS,
+        'Colors': EDGE_COLORS,
+        'Size': EDGE_SIZES,
+        'Gender': EDGE_GENDERS,
+        'Timestamp': [now] * n,
+    })
+    rowwise = transform_data(raw, engine="rowwise")
+    vectorized = transform_data(raw, engine="vectorized")
+    assert not rowwise.empty
+    pd.testing.assert_frame_equal(vectorized, rowwise)
+    pd.testing.assert_frame_equal(transform_data(raw, engine="memoized"), rowwise)
+
+# --- Memoized cleaners ---
+@pytest.mark.parametrize("values, rowwise", [
+    (EDGE_RATINGS, clean_rating),
+    (EDGE_COLORS, clean_colors),
+    (EDGE_SIZES, clean_size),
+    (EDGE_GENDERS, clean_gender),
+    ([10, "3 Colors", None, "3 Colors"], clean_colors),
+    ([], clean_size),
+])
+def test_map_unique_matches_rowwise(values, rowwise):
+    series = pd.Series(values * 3, dtype=object, index=range(100, 100 + 3 * len(values)))
+    pd.testing.assert_series_equal(map_unique(series, memoized(rowwise)), series.apply(rowwise))
+
+def test_map_unique_cleans_each_distinct_value_once():
+    calls = []
+    def cleaner(value):
+        calls.append(value)
+        return clean_size(value)
+    sizes = pd.Series(["Size: M", "Size: L", "Size: M", None, "Size: L"] * 1000)
+    result = map_unique(sizes, cleaner)
+    assert result.tolist()[:5] == ["M", "L", "M", "Unknown", "L"]
+    assert len(calls) == 2 + 1000 # Distinct strings once, nulls per row
+
+def test_memoized_cleaner_caches_strings_only():
+    calls = []
+    def cleaner(value):
+        calls.append(value)
+        return clean_gender(value)
+    cached = memoized(cleaner, maxsize=2)
+    assert [cached("Gender: Men") for _ in range(3)] == ["Men"] * 3
+    assert cached(None) == cached(None) == "Unknown"
+    assert calls == ["Gender: Men", None, None]
+    assert cached.cache_info().hits == 2
+    assert memoized(cleaner, maxsize=2) is cached
+    clear_memoized_cleaners()
+    assert cached("Gender: Men") == "Men" and calls[-1] == "Gender: Men"
+
+def test_cleaned_labels_are_interned():
+    assert clean_size("Size: " + "XL") is clean_size("Size: XL ")
+    assert clean_gender("Gender: " + "Unisex") is clean_gender("Gender: Unisex")
+
+# --- Compact output schema ---
+def test_transform_data_compact_schema(sample_raw_df):
+    standard = transform_data(sample_raw_df.copy())
+    compact = transform_data(sample_raw_df.copy(), schema="compact")
+
+    assert isinstance(compact['Size'].dtype, pd.CategoricalDtype)
+    assert isinstance(compact['Gender'].dtype, pd.CategoricalDtype)
+    assert compact['Rating'].dtype == 'float32'
+    assert compact['Colors'].dtype == 'int8'
+    assert pd.api.types.is_string_dtype(compact['Title']) and compact['Title'].dtype != object
+    assert compact['Price'].dtype == 'float64'
+
+    # Same content, just narrower storage
+    pd.testing.assert_frame_equal(compact.astype(standard.dtypes.to_dict()), standard)
+
+def test_compact_schema_shrinks_memory():
+    now = datetime.now()
+    n = 5000
+    raw = pd.DataFrame({
+        'Title': [f"T-shirt {i % 50}" for i in range(n)],
+        'Price': [f"${i % 400 + 10}.99" for i in range(n)],
+        'Rating': ["Rating: ⭐ 4.5 / 5"] * n,
+        'Colors': ["3 Colors"] * n,
+        'Size': [["Size: S", "Size: M", "Size: L"][i % 3] for i in range(n)],
+        'Gender': [["Gender: Men", "Gender: Women"][i % 2] for i in range(n)],
+        'Timestamp': [now] * n,
+    })
+    standard = transform_data(raw)
+    compact = transform_data(raw, schema="compact")
+    assert compact.memory_usage(deep=True).sum() * 3 < standard.memory_usage(deep=True).sum()
+
+def test_transform_data_unknown_schema(sample_raw_df, caplog):
+    with caplog.at_level(logging.ERROR):
+        assert transform_data(sample_raw_df, schema="tiny").empty
+    assert "Unknown output schema 'tiny'" in caplog.text
+
+# --- Streaming (chunk-wise) transformation ---
+def test_transform_data_chunks_deduplicate_across_chunks(sample_raw_df):
+    batch = transform_data(sample_raw_df.copy())
+    deduplicator = Deduplicator()
+    chunks = [transform_data(sample_raw_df.iloc[i:i + 1].copy(), deduplicator=deduplicator)
+              for i in range(len(sample_raw_df))]
+    streamed = pd.concat([chunk for chunk in chunks if not chunk.empty])
+    # Product A appears in the first and last chunk; only the first survives
+    pd.testing.assert_frame_equal(streamed, batch)
+    assert len(deduplicator) == len(batch)
+
+
+def test_transform_data_reuses_unchanged_pages(sample_raw_df, tmp_path, monkeypatch):
+    """Test that only pages whose raw rows changed are cleaned again, with the same result."""
+    from utils import transform
+    from utils.cache import TransformCache
+    cache = TransformCache(cache_dir=str(tmp_path))
+    cleaned_rows = []
+    real_engine = transform.TRANSFORM_ENGINES['memoized']
+
+    def counting_engine(df):
+        cleaned_rows.append(len(df))
+        real_engine(df)
+
+    monkeypatch.setitem(transform.TRANSFORM_ENGINES, 'memoized', counting_engine)
+    raw = sample_raw_df.assign(Page=[1, 1, 2, 2, 3])
+    first = transform_data(raw, engine='memoized', cache=cache)
+    again = transform_data(raw, engine='memoized', cache=cache)
+    raw.loc[3, 'Price'] = "$30"
+    changed = transform_data(raw, engine='memoized', cache=cache)
+
+    assert cleaned_rows == [5, 2] # Everything, nothing, then only page 2
+    pd.testing.assert_frame_equal(first, again)
+    pd.testing.assert_frame_equal(changed, transform_data(raw, engine='memoized'))
+    pd.testing.assert_frame_equal(first, transform_data(sample_raw_df, engine='memoized'))
@@ -0,0 +1,102 @@
+import json
+import os
+from datetime import datetime
+import pandas as pd
+from .config import ARTIFACT_DIR
+import logging
+
+# Feather (Arrow IPC) round-trips the frames with their dtypes and reads back without
+# parsing; without pyarrow the artifacts are pickled instead. pyarrow is imported on first use.
+
+# Intermediate results that can be checkpointed, in pipeline order: the extract output and the
+# transform output. Each is derived from the one before it.
+ARTIFACT_STAGES = ('raw', 'clean')
+
+def _artifact_paths(stage, artifact_dir):
+    if stage not in ARTIFACT_STAGES:
+        raise ValueError(f"Unknown artifact '{stage}'. Choose one of: {', '.join(ARTIFACT_STAGES)}")
+    return os.path.join(artifact_dir, f"{stage}.data"), os.path.join(artifact_dir, f"{stage}.json")
+
+def save_artifact(df, stage, artifact_dir=ARTIFACT_DIR, **metadata):
+    """
+    Checkpoints `df` as the `stage` artifact ('raw' or 'clean') in `artifact_dir`, with a
+    JSON sidecar holding its format, row count, creation time and any `metadata`.
+    Both files are written atomically. The artifacts of later stages are deleted first, as
+    they were derived from the one being replaced. Returns True on success.
+    """
+    data_path, meta_path = _artifact_paths(stage, artifact_dir)
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        feather = None
+    file_format = 'feather' if feather is not None else 'pickle'
+    try:
+        for later_stage in ARTIFACT_STAGES[ARTIFACT_STAGES.index(stage) + 1:]:
+            delete_artifact(later_stage, artifact_dir)
+        os.makedirs(artifact_dir, exist_ok=True)
+        tmp_path = f"{data_path}.tmp"
+        if file_format == 'feather':
+            # lz4 keeps the file small at close to memcpy speed
+            feather.write_feather(df.reset_index(drop=True), tmp_path, compression='lz4')
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, data_path)
+        meta = {'stage': stage, 'format': file_format, 'rows': len(df),
+                'created_at': datetime.now().isoformat(timespec='seconds'), **metadata}
+        _write_info(meta_path, meta)
+        logging.info(f"Checkpointed {len(df)} {stage} row(s) to {data_path}")
+        return True
+    except Exception as e:
+        logging.error(f"Error checkpointing {stage} artifact to {artifact_dir}: {e}")
+        return False
+
+def _write_info(meta_path, meta):
+    with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+def delete_artifact(stage, artifact_dir=ARTIFACT_DIR):
+    """Removes the `stage` artifact, if any."""
+    for path in _artifact_paths(stage, artifact_dir):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def update_artifact_info(stage, artifact_dir=ARTIFACT_DIR, **metadata):
+    """Adds `metadata` to the sidecar of the `stage` artifact. Returns False if there is no such artifact."""
+    info = artifact_info(stage, artifact_dir)
+    if info is None:
+        return False
+    _write_info(_artifact_paths(stage, artifact_dir)[1], {**info, **metadata})
+    return True
+
+def artifact_info(stage, artifact_dir=ARTIFACT_DIR):
+    """Returns the metadata of the `stage` artifact, or None if there is none."""
+    data_path, meta_path = _artifact_paths(stage, artifact_dir)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read artifact metadata {meta_path}: {e}")
+        return None
+
+def load_artifact(stage, artifact_dir=ARTIFACT_DIR):
+    """Returns the `stage` artifact as a DataFrame, or None if there is none (or it cannot be read)."""
+    info = artifact_info(stage, artifact_dir)
+    if info is None:
+        return None
+    data_path, _ = _artifact_paths(stage, artifact_dir)
+    try:
+        if info['format'] == 'feather':
+            import pyarrow.feather as feather
+            df = feather.read_feather(data_path)
+        else:
+            df = pd.read_pickle(data_path)
+    except Exception as e:
+        logging.error(f"Error reading {stage} artifact {data_path}: {e}")
+        return None
+    logging.info(f"Loaded {len(df)} {stage} row(s) checkpointed at {info['created_at']} from {data_path}")
+    return df
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import pandas as pd
+from .config import (
+    PAGE_CACHE_DIR, PAGE_CACHE_MAX_BYTES, PAGE_CACHE_TTL_SECONDS, TRANSFORM_CACHE_DIR, TRANSFORM_CACHE_MAX_BYTES
+)
+import logging
+
+def content_hash(content):
+    """Returns the SHA-256 hex digest of a page body (bytes or str)."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+class PageCache:
+    """
+    On-disk page cache keyed by URL.
+    Each entry keeps the raw body, its ETag/Last-Modified validators, a content hash and
+    the rows parsed from that body, so an unchanged page needs neither a download nor a parse.
+    Entries older than `ttl_seconds` are discarded; once the cache grows past `max_bytes`
+    the least recently used entries are evicted. The size of every file is tracked in memory,
+    so the directory is only scanned when the cache is opened or goes over `max_bytes`.
+    """
+    def __init__(self, cache_dir=PAGE_CACHE_DIR, max_bytes=PAGE_CACHE_MAX_BYTES,
+                 ttl_seconds=PAGE_CACHE_TTL_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._file_bytes = {} # Path -> size of every .json/.html file of the cache
+        self._total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._lock:
+            self._evict()
+
+    def __len__(self):
+        with self._lock:
+            return sum(1 for path in self._file_bytes if path.endswith('.json'))
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.html")
+
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.tmp{threading.get_ident()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._total_bytes += len(data) - self._file_bytes.get(path, 0)
+        self._file_bytes[path] = len(data)
+
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        self._total_bytes -= self._file_bytes.pop(path, 0)
+
+    def _remove(self, url):
+        for path in self._paths(url):
+            self._remove_file(path)
+
+    def get(self, url):
+        """Returns the metadata of a live entry for `url`, or None if missing/expired."""
+        meta_path, body_path = self._paths(url)
+        with self._lock:
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if time.time() - meta.get('stored_at', 0) > self.ttl_seconds or not os.path.exists(body_path):
+                self._remove(url)
+                return None
+            os.utime(meta_path) # Mark as recently used for LRU eviction
+            return meta
+
+    def get_body(self, url):
+        """Returns the cached body for `url`, or None."""
+        if self.get(url) is None:
+            return None
+        _, body_path = self._paths(url)
+        try:
+            with open(body_path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def conditional_headers(self, url):
+        """Builds If-None-Match / If-Modified-Since headers from the cached validators."""
+        meta = self.get(url)
+        if meta is None:
+            return {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store_response(self, url, content, etag=None, last_modified=None):
+        """Stores a freshly downloaded body; parsed rows survive if the content is unchanged."""
+        digest = content_hash(content)
+        meta_path, body_path = self._paths(url)
+        with self._lock:
+            previous = self.get(url)
+            rows = previous.get('rows') if previous and previous.get('content_hash') == digest else None
+            meta = {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'content_hash': digest,
+                'stored_at': time.time(),
+                'rows': rows,
+            }
+            self._write_atomic(body_path, content if isinstance(content, bytes) else content.encode('utf-8'))
+            self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def touch(self, url):
+        """Refreshes the TTL of an entry after a successful revalidation (HTTP 304)."""
+        meta_path, _ = self._paths(url)
+        with self._lock:
+            meta = self.get(url)
+            if meta is not None:
+                meta['stored_at'] = time.time()
+                self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+
+    def get_rows(self, url, content):
+        """Returns the rows previously parsed from `content`, or None if unknown."""
+        meta = self.get(url)
+        if meta is None or meta.get('rows') is None or meta.get('content_hash') != content_hash(content):
+            return None
+        return meta['rows']
+
+    def store_rows(self, url, content, rows):
+        """Remembers the rows parsed from `content` (values must be JSON serialisable)."""
+        meta_path, _ = self._paths(url)
+        with self._lock:
+            meta = self.get(url)
+            if meta is None or meta.get('content_hash') != content_hash(content):
+                return
+            meta['rows'] = rows
+            self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Rescans the cache directory (picking up other writers), then evicts LRU entries over `max_bytes`."""
+        entries = []
+        self._file_bytes = {}
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            meta_path = os.path.join(self.cache_dir, name)
+            body_path = meta_path[:-len('.json')] + '.html'
+            try:
+                self._file_bytes[meta_path] = os.path.getsize(meta_path)
+                if os.path.exists(body_path):
+                    self._file_bytes[body_path] = os.path.getsize(body_path)
+                entries.append((os.path.getmtime(meta_path), meta_path, body_path))
+            except OSError:
+                continue
+        self._total_bytes = sum(self._file_bytes.values())
+        entries.sort() # Least recently used first
+        while self._total_bytes > self.max_bytes and entries:
+            _, meta_path, body_path = entries.pop(0)
+            size = self._file_bytes.get(meta_path, 0) + self._file_bytes.get(body_path, 0)
+            self._remove_file(meta_path)
+            self._remove_file(body_path)
+            logging.info(f"Evicted page cache entry {os.path.basename(meta_path)} ({size} bytes).")
+
+class TransformCache:
+    """
+    On-disk cache of transformed page results, keyed by a hash of the page's raw rows
+    (see utils.transform.page_content_key). Each entry is one pickled DataFrame; once the
+    cache grows past `max_bytes` the least recently used entries are evicted. Entry sizes are
+    tracked in memory, so the directory is only scanned on open or when over `max_bytes`.
+    """
+    def __init__(self, cache_dir=TRANSFORM_CACHE_DIR, max_bytes=TRANSFORM_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._entry_bytes = {} # Path -> size of every entry
+        self._total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._lock:
+            self._evict()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entry_bytes)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """Returns the DataFrame stored under `key`, or None."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                df = pd.read_pickle(path)
+                os.utime(path) # Mark as recently used for LRU eviction
+                return df
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                logging.warning(f"Discarding unreadable transform cache entry {key}: {e}")
+                self._remove(path)
+                return None
+
+    def put(self, key, df):
+        """Stores `df` under `key`, then evicts least recently used entries over `max_bytes`."""
+        path = self._path(key)
+        tmp_path = f"{path}.tmp{threading.get_ident()}"
+        with self._lock:
+            df.to_pickle(tmp_path)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+            self._total_bytes += size - self._entry_bytes.get(path, 0)
+            self._entry_bytes[path] = size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        self._total_bytes -= self._entry_bytes.pop(path, 0)
+
+    def _evict(self):
+        """Rescans the cache directory (picking up other writers), then evicts LRU entries over `max_bytes`."""
+        entries = []
+        self._entry_bytes = {}
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                self._entry_bytes[path] = os.path.getsize(path)
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        self._total_bytes = sum(self._entry_bytes.values())
+        entries.sort() # Least recently used first
+        while self._total_bytes > self.max_bytes and entries:
+            _, path = entries.pop(0)
+            size = self._entry_bytes.get(path, 0)
+            self._remove(path)
+            logging.info(f"Evicted transform cache entry {os.path.basename(path)} ({size} bytes).")
@@ -0,0 +1,144 @@
+import os
+import threading
+import pandas as pd
+from .config import CDC_SNAPSHOT_DIR
+import logging
+
+# Primary key of the products table; a row is identified by these columns across runs
+KEY_COLUMNS = ['Title', 'Size', 'Gender', 'Colors']
+# Columns left out of the row hash: the extraction time changes on every run
+VOLATILE_COLUMNS = ['Timestamp']
+HASH_COLUMN = '_row_hash'
+
+def row_hashes(df):
+    """Returns a uint64 hash per row over the key and payload columns (volatile columns excluded)."""
+    columns = [column for column in df.columns if column not in VOLATILE_COLUMNS]
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+def _key_index(frame):
+    return pd.MultiIndex.from_frame(frame[KEY_COLUMNS].astype(object))
+
+class ChangeSet:
+    """
+    Delta between the last loaded snapshot and the current frame.
+    `inserts`/`updates` hold full rows, `deletes` only the key columns. `update_positions`
+    are the 0-based positions of the updated rows in the snapshot (i.e. in the loaded order,
+    which row-ordered sinks such as Google Sheets rely on). `next_snapshot` is what the sink
+    holds once the changes are applied.
+    """
+    def __init__(self, current, inserts, updates, update_positions, deletes, next_snapshot, initial):
+        self.current = current
+        self.inserts = inserts
+        self.updates = updates
+        self.update_positions = update_positions
+        self.deletes = deletes
+        self.next_snapshot = next_snapshot
+        self.initial = initial
+
+    @property
+    def has_changes(self):
+        return self.initial or not (self.inserts.empty and self.updates.empty and self.deletes.empty)
+
+    @property
+    def requires_rewrite(self):
+        """True when an ordered sink cannot be patched in place (first load or deleted rows)."""
+        return self.initial or not self.deletes.empty
+
+    @property
+    def rows_written(self):
+        """Rows a sink has to write (or delete) to apply this change set."""
+        if self.initial:
+            return len(self.current)
+        return len(self.inserts) + len(self.updates) + len(self.deletes)
+
+    def summary(self):
+        if self.initial:
+            return f"initial load of {len(self.current)} rows"
+        return f"{len(self.inserts)} insert(s), {len(self.updates)} update(s), {len(self.deletes)} delete(s)"
+
+def compute_changes(df, snapshot=None):
+    """
+    Compares `df` against `snapshot` (as returned by load_snapshot; None means nothing was
+    loaded yet) and returns a ChangeSet. Rows sharing a primary key are collapsed, keeping the
+    last, so incrementally loaded sinks hold one row per key like the PostgreSQL table does.
+    """
+    current = df.drop_duplicates(subset=KEY_COLUMNS, keep='last').reset_index(drop=True)
+    if len(current) < len(df):
+        logging.warning(f"{len(df) - len(current)} row(s) share a primary key ({', '.join(KEY_COLUMNS)}) "
+                        f"with a later row; the incremental load keeps only the last of each.")
+    hashes = row_hashes(current)
+    current_snapshot = current[KEY_COLUMNS].astype(object)
+    current_snapshot[HASH_COLUMN] = hashes
+
+    if snapshot is None:
+        return ChangeSet(current, current, current.iloc[:0], [], current[KEY_COLUMNS].iloc[:0],
+                         current_snapshot, initial=True)
+
+    positions = _key_index(snapshot).get_indexer(_key_index(current))
+    is_insert = positions == -1
+    is_update = ~is_insert
+    if is_update.any():
+        is_update &= snapshot[HASH_COLUMN].to_numpy()[positions] != hashes
+    is_delete = ~_key_index(snapshot).isin(_key_index(current))
+
+    inserts = current[is_insert]
+    updates = current[is_update]
+    deletes = snapshot.loc[is_delete, KEY_COLUMNS].reset_index(drop=True)
+
+    if is_delete.any():
+        next_snapshot = current_snapshot # Ordered sinks are rewritten in the current order
+    else:
+        # Updated rows keep their place, inserted rows are appended after the existing ones
+        next_snapshot = snapshot.copy()
+        next_snapshot.iloc[positions[is_update], next_snapshot.columns.get_loc(HASH_COLUMN)] = hashes[is_update]
+        next_snapshot = pd.concat([next_snapshot, current_snapshot[is_insert]], ignore_index=True)
+
+    return ChangeSet(current, inserts, updates, positions[is_update].tolist(), deletes,
+                     next_snapshot, initial=False)
+
+def _snapshot_path(sink, snapshot_dir):
+    return os.path.join(snapshot_dir, f"{sink}.pkl")
+
+def load_snapshot(sink, snapshot_dir=CDC_SNAPSHOT_DIR):
+    """Returns the last snapshot saved for `sink`, or None if there is none (or it is unreadable)."""
+    path = _snapshot_path(sink, snapshot_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_pickle(path)
+    except Exception as e:
+        logging.warning(f"Could not read CDC snapshot {path}, doing a full load: {e}")
+        return None
+
+def drop_snapshot(sink, snapshot_dir=CDC_SNAPSHOT_DIR):
+    """
+    Deletes the snapshot of `sink`. Call it whenever the sink is rewritten outside
+    load_with_cdc, so the next incremental load starts with a full load.
+    """
+    try:
+        os.remove(_snapshot_path(sink, snapshot_dir))
+        logging.info(f"Dropped the CDC snapshot of {sink}; its next incremental load is a full load.")
+    except FileNotFoundError:
+        pass
+
+def save_snapshot(snapshot, sink, snapshot_dir=CDC_SNAPSHOT_DIR):
+    """Atomically writes the snapshot of `sink`."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = _snapshot_path(sink, snapshot_dir)
+    tmp_path = f"{path}.tmp{threading.get_ident()}"
+    snapshot.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+def load_with_cdc(df, sink, apply_changes, snapshot_dir=CDC_SNAPSHOT_DIR):
+    """
+    Loads `df` into `sink` incrementally: computes the delta against the sink's last snapshot,
+    passes it to `apply_changes(changes)` and, if that returns True, saves the new snapshot.
+    Each sink keeps its own snapshot, so a failed sink is simply retried against its old state.
+    Returns (success, rows_written).
+    """
+    changes = compute_changes(df, load_snapshot(sink, snapshot_dir))
+    logging.info(f"CDC for {sink}: {changes.summary()}")
+    success = apply_changes(changes)
+    if success:
+        save_snapshot(changes.next_snapshot, sink, snapshot_dir)
+    return success, (changes.rows_written if success else 0)
@@ -3,9 +3,82 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-BASE_URL = "https://fashion-studio.dicoding.dev"
-MAX_PAGES = 50
+# Override both to point the extractor at another catalog, e.g. the local stand-in server
+# (python -m utils.local_server)
+BASE_URL = os.getenv("BASE_URL", "https://fashion-studio.dicoding.dev").rstrip('/')
+MAX_PAGES = int(os.getenv("MAX_PAGES", "50")) # Pages crawled when the page count cannot be discovered
 USD_TO_IDR_EXCHANGE_RATE = 16000.0
+TRANSFORM_ENGINE = "memoized" # 'memoized' (clean each distinct raw value once), 'vectorized' or 'rowwise' (reference clean_* functions)
+CLEAN_CACHE_SIZE = 4096 # Raw values remembered per memoized clean_* function
+PARSE_FAILURE_SAMPLE_SIZE = 5 # Offending values kept per column and reason for the parse failure summary
+OUTPUT_SCHEMA = "standard" # 'standard' or 'compact' (categorical/float32/int8/Arrow string columns)
+
+# Extraction concurrency and politeness limits
+EXTRACT_MAX_WORKERS = 8 # 1 = fetch pages sequentially
+MAX_CONCURRENT_REQUESTS_PER_HOST = 4
+REQUESTS_PER_SECOND = 10.0 # Token-bucket refill rate, 0 disables rate limiting
+RATE_LIMIT_BURST = 5
+
+# Pagination: read the page count from page 1 ("Page 1 of N") instead of assuming MAX_PAGES
+DISCOVER_PAGE_COUNT = True
+EMPTY_PAGE_STOP = 3 # Without a discovered count, stop after this many consecutive empty pages (0 = never)
+
+# HTTP session tuning
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+HTTP_TIMEOUT = 10 # Seconds
+HTTP_POOL_SIZE = 10 # Pooled keep-alive connections per host
+HTTP_MAX_RETRIES = 3 # Retries for connection errors and 429/5xx responses
+HTTP_BACKOFF_FACTOR = 0.5 # Exponential backoff: 0.5s, 1s, 2s, ...
+
+# Conditional-GET page cache
+USE_PAGE_CACHE = True
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", os.path.join(".cache", "pages"))
+PAGE_CACHE_MAX_BYTES = 100 * 1024 * 1024
+PAGE_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# HTML parsing: 'lxml' (single-pass, falls back to 'bs4' if lxml is missing) or 'bs4'
+PARSER_BACKEND = "lxml"
+PARSE_WORKERS = 0 # >0 parses pages in a process pool decoupled from fetching
+PARSE_QUEUE_SIZE = 16 # Max fetched-but-unparsed pages held in memory by the parse pipeline
+
+# Per-page transform cache: cleaned columns of each page, keyed by a hash of its raw rows,
+# so only pages whose content changed are cleaned again
+USE_TRANSFORM_CACHE = True
+TRANSFORM_CACHE_DIR = os.getenv("TRANSFORM_CACHE_DIR", os.path.join(".cache", "transform"))
+TRANSFORM_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# Streaming mode: extract, transform and load chunk by chunk instead of one full DataFrame
+STREAMING_MODE = False
+STREAM_CHUNK_SIZE = None # Rows per chunk; None yields one chunk per page
+
+# Checkpoints between stages (raw rows after extract, clean rows after transform), so a run
+# can be resumed or a single stage rerun: python main.py --stage load --sinks sheets
+SAVE_ARTIFACTS = True
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", os.path.join(".cache", "artifacts"))
+
+# Cross-run deduplication for streaming runs: with a filter path set, a persisted Bloom filter
+# skips products already emitted by earlier runs and the stream is appended to the sinks.
+# Delete the file to start over.
+DEDUP_FILTER_PATH = os.getenv("DEDUP_FILTER_PATH")
+DEDUP_FILTER_CAPACITY = 1_000_000 # Keys the filter is sized for
+DEDUP_FILTER_ERROR_RATE = 0.001 # False-positive rate (new rows wrongly skipped) at capacity
+
+# Incremental (change-data-capture) loading: each sink only receives the rows that changed
+# since its last successful load. Rows sharing a key (Title/Size/Gender/Colors) are collapsed
+# to the last one. Full writes (streaming or non-incremental runs) drop the sink's snapshot.
+# Delete CDC_SNAPSHOT_DIR to force a full reload.
+INCREMENTAL_LOAD = True
+CDC_SNAPSHOT_DIR = os.getenv("CDC_SNAPSHOT_DIR", os.path.join(".cache", "cdc"))
+
+# Run metrics: per-stage wall/CPU time, peak RSS, rows and bytes
+METRICS_ENABLED = True
+METRICS_REPORT_PATH = "run_report.json" # JSON run report, None disables it
+METRICS_PROMETHEUS_PATH = os.getenv("METRICS_PROMETHEUS_PATH") # Prometheus text file, e.g. for node_exporter
+METRICS_BASELINE_PATH = os.getenv("METRICS_BASELINE_PATH") # Earlier run report to check for regressions
+METRICS_REGRESSION_THRESHOLD = 0.2 # Warn when a stage is >20% slower than the baseline
+PROFILER = None # 'cprofile' or 'pyinstrument' to profile the stages in PROFILE_STAGES
+PROFILE_STAGES = () # Stage names, e.g. ('parse_product_data', 'clean_price'); '*' profiles all
+PROFILE_DIR = "profiles"
 
 # PostgreSQL Configuration
 DB_USER = os.getenv("DB_USER", "fashionETLadmin") 
@@ -14,10 +87,36 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME", "fashion_products")
 POSTGRES_TABLE_NAME = "products"
+POSTGRES_LOAD_METHOD = "copy" # 'copy' (COPY into staging + merge) or 'to_sql'
 
 # Google Sheets Configuration
 GOOGLE_SHEETS_CREDENTIALS_FILE = "google-sheets-api.json"
 GOOGLE_SHEET_NAME = os.getenv("GOOGLE_SHEET_NAME", "Fashion Studio Products")
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
+SHEETS_CHUNK_ROWS = 2000 # Rows per batch_update request
+SHEETS_MAX_RETRIES = 5 # Retries for 429 (quota) and transient 5xx responses
+SHEETS_BACKOFF_SECONDS = 1.0 # Exponential backoff: 1s, 2s, 4s, ...
+
+CSV_FILE_PATH = "products.csv"
+# CSV writer: 'pandas' writes the established products.csv format. 'pyarrow' is a multithreaded
+# writer about 10x faster, but its output differs: every string is quoted, whole-number floats
+# lose their '.0' and timestamps get nanoseconds. Keep one writer per file, since appends would
+# otherwise mix the two formats.
+CSV_ENGINE = "pandas"
+CSV_READ_ENGINE = "pyarrow" # load_from_csv: 'pyarrow' (multithreaded; 'pandas' if pyarrow is missing) or 'pandas'
+CSV_COMPRESSION = None # 'gzip', 'zstd' or 'none'; None infers it from the file extension (.gz, .zst)
+CSV_CHUNK_ROWS = 100_000 # Rows converted and written per batch
+
+# Columnar (Parquet) sink
+SAVE_PARQUET = True
+PARQUET_FILE_PATH = "products.parquet"
+PARQUET_COMPRESSION = "zstd" # 'zstd', 'snappy', 'gzip', 'lz4' or 'none'
+PARQUET_ROW_GROUP_SIZE = 64 * 1024 # Rows per row group
+PARQUET_PARTITION_COLS = None # e.g. ['run_date', 'Gender'] writes a partitioned dataset directory
+
+# Append-only, date-partitioned history of every run (price/rating tracking)
+RECORD_HISTORY = True
+HISTORY_DIR = os.getenv("HISTORY_DIR", "history")
 
-CSV_FILE_PATH = "products.csv"
\ No newline at end of file
+# Load phase: the sinks run concurrently; a sink running longer than this is reported as failed
+SINK_TIMEOUT_SECONDS = 900
\ No newline at end of file
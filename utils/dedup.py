@@ -0,0 +1,154 @@
+import json
+import math
+import os
+import numpy as np
+import pandas as pd
+from .config import DEDUP_FILTER_CAPACITY, DEDUP_FILTER_ERROR_RATE
+import logging
+
+# Columns that identify a duplicate product row
+DEDUP_KEY_COLUMNS = ['Title', 'Price', 'Size', 'Gender', 'Colors']
+
+_FINGERPRINT_PRIME = np.uint64(0x100000001B3)
+
+def _column_hashes(values):
+    # Hashing the distinct values once pays off for low-cardinality columns (Size, Gender)
+    # but costs a factorize for near-unique ones (Title); judge by a sample. Either way
+    # the hashes are the same.
+    sample = values.iloc[:1000]
+    categorize = sample.nunique(dropna=False) < len(sample) // 2
+    return pd.util.hash_pandas_object(values, index=False, categorize=categorize).to_numpy()
+
+def key_fingerprints(df, key_columns=DEDUP_KEY_COLUMNS):
+    """Returns a 64-bit fingerprint per row over `key_columns` (stable across processes and runs)."""
+    fingerprints = np.zeros(len(df), dtype=np.uint64)
+    for column in key_columns:
+        fingerprints = (fingerprints ^ _column_hashes(df[column])) * _FINGERPRINT_PRIME
+    return fingerprints
+
+class BloomFilter:
+    """
+    Bloom filter over 64-bit fingerprints, sized for `capacity` keys at `error_rate`
+    false positives. Never reports a key it was given as unseen; may wrongly report an
+    unseen key as seen with probability ~`error_rate` while it holds at most `capacity` keys.
+    """
+    def __init__(self, capacity=DEDUP_FILTER_CAPACITY, error_rate=DEDUP_FILTER_ERROR_RATE):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate between 0 and 1")
+        self.capacity = int(capacity)
+        self.error_rate = float(error_rate)
+        self.num_bits = max(int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 64)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, fingerprints):
+        # Double hashing: bit i of a key is h1 + i*h2 (mod num_bits), with uint64 wrap-around
+        h1 = np.asarray(fingerprints, dtype=np.uint64)
+        h2 = ((h1 * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(29)) | np.uint64(1)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.num_bits)
+
+    def contains(self, fingerprints):
+        """Returns a boolean array: True where the fingerprint was (probably) added before."""
+        positions = self._positions(fingerprints)
+        bits = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+    def add(self, fingerprints):
+        self.count += int((~self.contains(fingerprints)).sum()) # Keys added again do not count twice
+        positions = self._positions(fingerprints).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+        if self.count > self.capacity:
+            logging.warning(f"Bloom filter holds {self.count} keys, more than its capacity of {self.capacity}; "
+                            f"its false-positive rate is now above {self.error_rate}.")
+
+    def save(self, path):
+        """Writes the filter to `path` atomically."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        header = json.dumps({'capacity': self.capacity, 'error_rate': self.error_rate,
+                             'num_bits': self.num_bits, 'num_hashes': self.num_hashes, 'count': self.count})
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(header.encode('utf-8') + b"\n")
+            f.write(self.bits.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            bits = np.frombuffer(f.read(), dtype=np.uint8).copy()
+        bloom = cls(header['capacity'], header['error_rate'])
+        if (bloom.num_bits, bloom.num_hashes, len(bloom.bits)) != (header['num_bits'], header['num_hashes'], len(bits)):
+            raise ValueError(f"Bloom filter file {path} does not match its header")
+        bloom.bits = bits
+        bloom.count = header['count']
+        return bloom
+
+    @classmethod
+    def open(cls, path, capacity=DEDUP_FILTER_CAPACITY, error_rate=DEDUP_FILTER_ERROR_RATE):
+        """Loads the filter saved at `path`, or returns a new empty one if there is none (or it is unreadable)."""
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Could not read Bloom filter {path}, starting a new one: {e}")
+        return cls(capacity, error_rate)
+
+class Deduplicator:
+    """
+    Drops rows whose key (`key_columns`) was already seen: earlier in the same frame, in an
+    earlier frame passed to this instance (e.g. earlier chunks of a stream) or, with a
+    `seen_filter` (BloomFilter), in an earlier run. Keys seen in this run are kept as 64-bit
+    fingerprints, 8 bytes per key; call commit() to add them to the filter once the run's
+    rows have been loaded.
+    """
+    def __init__(self, key_columns=DEDUP_KEY_COLUMNS, seen_filter=None):
+        self.key_columns = list(key_columns)
+        self.seen_filter = seen_filter
+        # Sorted arrays of fingerprints, each at least twice as long as the next. A chunk's
+        # new keys are appended as a run and merged like a binary counter, so every key is
+        # merged O(log n) times and a lookup searches O(log n) runs.
+        self._runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    def _seen_in_run(self, fingerprints):
+        seen = np.zeros(len(fingerprints), dtype=bool)
+        for run in self._runs:
+            positions = np.searchsorted(run, fingerprints)
+            seen |= run[np.minimum(positions, len(run) - 1)] == fingerprints
+        return seen
+
+    def _add(self, fingerprints):
+        self._runs.append(np.sort(fingerprints))
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            newer = self._runs.pop()
+            self._runs[-1] = np.sort(np.concatenate([self._runs[-1], newer]), kind='stable')
+
+    def new_rows(self, df):
+        """Returns a boolean mask of the rows of `df` whose key was not seen before, and marks them seen."""
+        if df.empty:
+            return np.zeros(0, dtype=bool)
+        fingerprints = key_fingerprints(df, self.key_columns)
+        is_new = ~pd.Series(fingerprints).duplicated(keep='first').to_numpy()
+        is_new &= ~self._seen_in_run(fingerprints)
+        if self.seen_filter is not None:
+            is_new &= ~self.seen_filter.contains(fingerprints)
+        if is_new.any():
+            self._add(fingerprints[is_new])
+        return is_new
+
+    def drop_duplicates(self, df):
+        """Returns the rows of `df` whose key was not seen before."""
+        return df[self.new_rows(df)]
+
+    def commit(self, path=None):
+        """Adds the keys seen in this run to the filter and, with `path`, saves the filter there."""
+        if self.seen_filter is None:
+            return
+        self.seen_filter.add(np.concatenate(self._runs) if self._runs else np.empty(0, dtype=np.uint64))
+        if path:
+            self.seen_filter.save(path)
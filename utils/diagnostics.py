@@ -0,0 +1,92 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .config import PARSE_FAILURE_SAMPLE_SIZE
+import logging
+
+class ParseDiagnostics:
+    """
+    Counts parse failures per (column, reason) and keeps up to `sample_size` distinct
+    offending values of each, so a dirty page costs a counter increment per bad value
+    instead of a formatted log line. With `keep_records` the reported failures are also
+    kept in `records`, for replaying them later (see replay_parse_failures).
+    """
+    def __init__(self, sample_size=PARSE_FAILURE_SAMPLE_SIZE, keep_records=False):
+        self.sample_size = sample_size
+        self.counts = Counter()
+        self.samples = {}
+        self.records = [] if keep_records else None
+
+    def record(self, column, reason, value, message, args, count=1):
+        key = (column, reason)
+        self.counts[key] += count
+        samples = self.samples.setdefault(key, [])
+        if len(samples) < self.sample_size and repr(value) not in samples:
+            samples.append(repr(value))
+        if self.records is not None:
+            self.records.append((column, reason, value, message, args))
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def summary(self):
+        """Returns {'<column>: <reason>': {'count', 'samples'}} for every failure kind, most frequent first."""
+        return {f"{column}: {reason}": {'count': count, 'samples': list(self.samples[(column, reason)])}
+                for (column, reason), count in self.counts.most_common()}
+
+    def log_summary(self, level=logging.WARNING):
+        """Logs one message with the counts and sample values of all parse failures, if any."""
+        if not self.counts or not logging.getLogger().isEnabledFor(level):
+            return
+        lines = [f"{kind}: {stats['count']} (e.g. {', '.join(stats['samples'])})"
+                 for kind, stats in self.summary().items()]
+        logging.log(level, f"{self.total} value(s) could not be parsed:\n  " + "\n  ".join(lines))
+
+_ACTIVE = ContextVar('parse_diagnostics', default=None)
+
+def active_parse_diagnostics():
+    """Returns the collector of the current scope, or None."""
+    return _ACTIVE.get()
+
+@contextmanager
+def collect_parse_failures(sample_size=PARSE_FAILURE_SAMPLE_SIZE, keep_records=False):
+    """Collects the parse failures reported in the enclosed block into a new ParseDiagnostics."""
+    diagnostics = ParseDiagnostics(sample_size, keep_records)
+    token = _ACTIVE.set(diagnostics)
+    try:
+        yield diagnostics
+    finally:
+        _ACTIVE.reset(token)
+
+@contextmanager
+def parse_failure_scope():
+    """
+    Collects parse failures for a whole run and logs one summary at the end. Inside an
+    enclosing scope it reuses that scope's collector, so nested runs (e.g. transform_data
+    per chunk in a streaming run) add to the outer summary.
+    """
+    diagnostics = _ACTIVE.get()
+    if diagnostics is not None:
+        yield diagnostics
+        return
+    with collect_parse_failures() as diagnostics:
+        yield diagnostics
+    diagnostics.log_summary()
+
+def report_parse_failure(column, reason, value, message, *args, count=1):
+    """
+    Reports a value of `column` that could not be parsed. Inside a collection scope it is
+    only counted; otherwise `message % args` is logged as a warning (formatted only if
+    warnings are enabled).
+    """
+    diagnostics = _ACTIVE.get()
+    if diagnostics is not None:
+        diagnostics.record(column, reason, value, message, args, count)
+    else:
+        logging.warning(message, *args)
+
+def replay_parse_failures(records, count=1):
+    """Reports `records` (ParseDiagnostics.records) again, e.g. for a cached result used `count` times."""
+    for column, reason, value, message, args in records:
+        report_parse_failure(column, reason, value, message, *args, count=count)
@@ -1,115 +1,383 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 from datetime import datetime
+import multiprocessing
 import time
-from .config import BASE_URL, MAX_PAGES
+import threading
+import queue
+from collections import deque
+from itertools import chain, islice
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from .config import (
+    BASE_URL, MAX_PAGES, EXTRACT_MAX_WORKERS, MAX_CONCURRENT_REQUESTS_PER_HOST,
+    REQUESTS_PER_SECOND, RATE_LIMIT_BURST, HTTP_POOL_SIZE, USE_PAGE_CACHE, PARSER_BACKEND,
+    PARSE_WORKERS, PARSE_QUEUE_SIZE, DISCOVER_PAGE_COUNT, EMPTY_PAGE_STOP
+)
+from .fetcher import PageFetcher, get_default_fetcher
+from .cache import PageCache
+from .parsers import get_parser_backend, parse_page_count
+from .metrics import instrumented
 import logging
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-def fetch_page_content(page_number):
+class TokenBucket:
     """
-    Fetches the HTML content of a specific page.
-    Includes error handling for network requests.
+    Thread-safe token bucket used to rate limit outgoing requests.
+    Tokens refill at `rate` per second up to `capacity`; a rate of 0 disables limiting.
     """
-    url = "" # Inisialisasi variabel url
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=RATE_LIMIT_BURST):
+        self.rate = float(rate)
+        self.capacity = float(max(1, capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then consumes it."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+def _host_semaphore(url):
+    """Returns the semaphore that caps concurrent requests to the host of `url`."""
+    host = urlparse(url).netloc
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS_PER_HOST)
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+def build_page_url(page_number):
+    """Builds the catalog URL for a page number."""
     if page_number == 1:
         # Halaman pertama adalah BASE_URL itu sendiri
-        url = BASE_URL 
-    else:
-        # Untuk halaman 2 dan seterusnya, gunakan format /page{nomor_halaman}
-        url = f"{BASE_URL}/page{page_number}"
+        return BASE_URL
+    # Untuk halaman 2 dan seterusnya, gunakan format /page{nomor_halaman}
+    return f"{BASE_URL}/page{page_number}"
+
+@instrumented('fetch_page_content', bytes_out=lambda content: len(content or b''))
+def fetch_page_content(page_number, fetcher=None, cache=None):
+    """
+    Fetches the HTML content of a specific page through a pooled PageFetcher
+    (the shared default one unless `fetcher` is given).
+    With a PageCache the request is conditional (If-None-Match/If-Modified-Since)
+    and a 304 response returns the cached body.
+    Includes error handling for network requests.
+    """
+    import requests
+    url = build_page_url(page_number)
+    if fetcher is None:
+        fetcher = get_default_fetcher()
     
     logging.info(f"Attempting to fetch URL: {url}") # Untuk debugging URL
 
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        headers = cache.conditional_headers(url) if cache is not None else None
+        response = fetcher.get(url, headers=headers)
+        if response.status_code == 304 and cache is not None:
+            cached_body = cache.get_body(url)
+            if cached_body is not None:
+                logging.info(f"Page {page_number} not modified, using cached copy.")
+                cache.touch(url)
+                return cached_body
+            response = fetcher.get(url) # Cache entry vanished, fetch unconditionally
         response.raise_for_status()
+        if cache is not None:
+            cache.store_response(url, response.content, response.headers.get('ETag'),
+                                 response.headers.get('Last-Modified'))
         return response.content
     except requests.exceptions.RequestException as e:
         logging.error(f"Error fetching page {page_number} from URL {url}: {e}") 
         return None
 
-def parse_product_data(html_content, page_number):
+@instrumented('parse_product_data', rows_out=len)
+def parse_product_data(html_content, page_number, backend=None):
     """
-    Parses product data from the HTML content of a page.
+    Parses product data from the HTML content of a page. Every row is stamped with the
+    extraction Timestamp and its Page number.
+    `backend` selects the card parser ('lxml' or 'bs4', PARSER_BACKEND by default).
     Includes error handling for parsing issues.
     """
-    products_on_page = []
     extraction_timestamp = datetime.now()
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        product_cards = soup.find_all('div', class_='collection-card')
+        parse_cards = get_parser_backend(backend or PARSER_BACKEND)
+        products_on_page = parse_cards(html_content)
 
-        if not product_cards:
+        if not products_on_page:
             logging.warning(f"No product cards found on page {page_number}.")
             return []
 
-        for card in product_cards:
-            title_tag = card.find('h3', class_='product-title')
-            title = title_tag.text.strip() if title_tag else "Unknown Product"
-
-            price_container = card.find('div', class_='price-container')
-            price_tag_p = card.find('p', class_='price') # For "Price Unavailable"
-
-            if price_container and price_container.find('span', class_='price'):
-                price = price_container.find('span', class_='price').text.strip()
-            elif price_tag_p:
-                price = price_tag_p.text.strip()
-            else:
-                price = "Price Unavailable" # Fallback
-
-            rating_tag = card.find('p', string=lambda text: text and "Rating:" in text)
-            rating = rating_tag.text.strip() if rating_tag else "Rating: Invalid Rating / 5"
-            
-            colors_tag = card.find('p', string=lambda text: text and "Colors" in text)
-            colors = colors_tag.text.strip() if colors_tag else "0 Colors"
-
-            size_tag = card.find('p', string=lambda text: text and "Size:" in text)
-            size = size_tag.text.strip() if size_tag else "Size: Unknown"
-
-            gender_tag = card.find('p', string=lambda text: text and "Gender:" in text)
-            gender = gender_tag.text.strip() if gender_tag else "Gender: Unknown"
-
-            products_on_page.append({
-                'Title': title,
-                'Price': price,
-                'Rating': rating,
-                'Colors': colors,
-                'Size': size,
-                'Gender': gender,
-                'Timestamp': extraction_timestamp
-            })
+        for product in products_on_page:
+            product['Timestamp'] = extraction_timestamp
+            product['Page'] = page_number
         return products_on_page
     except Exception as e:
         logging.error(f"Error parsing product data on page {page_number}: {e}")
         return [] # Return empty list on parsing error for this page
 
-def extract_all_products():
+def _rows_from_cache(cache, page_num, html_content):
+    """Returns cached rows for an unchanged page, stamped with a fresh extraction time."""
+    cached_rows = cache.get_rows(build_page_url(page_num), html_content)
+    if cached_rows is None:
+        return None
+    extraction_timestamp = datetime.now()
+    return [dict(row, Timestamp=extraction_timestamp, Page=page_num) for row in cached_rows]
+
+def _fetch_page(page_num, rate_limiter=None, fetcher=None, cache=None):
+    """
+    Fetches a single page, honouring the per-host concurrency limit and the shared
+    rate limiter. Returns (html_content, cached_rows); cached_rows is set when the
+    page content is unchanged and its rows can be served from `cache`.
+    """
+    url = build_page_url(page_num)
+    logging.info(f"Fetching data from page {page_num}...")
+    with _host_semaphore(url):
+        if rate_limiter is not None:
+            rate_limiter.acquire() # Be respectful to the server
+        html_content = fetch_page_content(page_num, fetcher, cache)
+    if not html_content:
+        logging.warning(f"Skipping page {page_num} due to fetch error.")
+        return None, None
+    cached_rows = _rows_from_cache(cache, page_num, html_content) if cache is not None else None
+    if cached_rows is not None:
+        logging.info(f"Page {page_num} unchanged, reusing {len(cached_rows)} cached row(s).")
+    return html_content, cached_rows
+
+def _finish_page(page_num, html_content, products_from_page, cache=None):
+    """Logs empty pages and remembers freshly parsed rows in `cache`."""
+    if not products_from_page:
+        logging.warning(f"No products extracted from page {page_num}.")
+    elif cache is not None:
+        cache.store_rows(build_page_url(page_num), html_content, [
+            {key: value for key, value in row.items() if key not in ('Timestamp', 'Page')} for row in products_from_page
+        ])
+    return products_from_page
+
+def _extract_page(page_num, rate_limiter=None, fetcher=None, cache=None):
+    """Like extract_page, but returns (html_content, rows) so callers can read the pagination too."""
+    html_content, cached_rows = _fetch_page(page_num, rate_limiter, fetcher, cache)
+    if not html_content:
+        return None, []
+    if cached_rows is not None:
+        return html_content, cached_rows
+    return html_content, _finish_page(page_num, html_content, parse_product_data(html_content, page_num), cache)
+
+def extract_page(page_num, rate_limiter=None, fetcher=None, cache=None):
+    """
+    Fetches and parses a single page in the calling thread. Rows of a page whose
+    content hash is unchanged are served from `cache` without parsing.
+    Returns the list of product rows (may be empty).
+    """
+    return _extract_page(page_num, rate_limiter, fetcher, cache)[1]
+
+def _plan_pages(pages, rate_limiter, fetcher, cache):
+    """
+    Decides which pages a run crawls. Explicit `pages` are crawled as given. Otherwise page 1
+    is extracted first and the page count read from its pagination footer, so the crawl covers
+    exactly pages 2..N; when the footer is missing (or DISCOVER_PAGE_COUNT is off) pages up to
+    MAX_PAGES are crawled, stopping after EMPTY_PAGE_STOP consecutive empty pages.
+    Returns (rows of page 1 or [], remaining page numbers, stop_after_empty).
+    """
+    if pages is not None:
+        return [], pages, 0
+    if not DISCOVER_PAGE_COUNT:
+        return [], range(1, MAX_PAGES + 1), EMPTY_PAGE_STOP
+    html_content, first_rows = _extract_page(1, rate_limiter, fetcher, cache)
+    page_count = parse_page_count(html_content) if html_content else None
+    if page_count is None:
+        logging.info(f"No page count found on page 1, crawling up to {MAX_PAGES} page(s).")
+        return first_rows, range(2, MAX_PAGES + 1), EMPTY_PAGE_STOP
+    logging.info(f"Catalog has {page_count} page(s).")
+    return first_rows, range(2, page_count + 1), 0
+
+def _iter_page_rows(page_numbers, max_workers, rate_limiter, fetcher, cache, stop_after_empty=0):
+    """
+    Yields the rows of each page in `page_numbers`, in page order. With max_workers > 1 a
+    sliding window of up to 2 * max_workers upcoming pages is fetched ahead in a thread pool;
+    otherwise pages are extracted one by one in the calling thread.
+    With `stop_after_empty`, stops after that many consecutive pages without rows and
+    cancels the pages fetched ahead that have not started yet.
     """
-    Extracts product data from all pages (1 to MAX_PAGES).
+    page_numbers = iter(page_numbers)
+    empty_run = 0
+
+    def reached_end(page_num, rows):
+        nonlocal empty_run
+        empty_run = 0 if rows else empty_run + 1
+        if stop_after_empty and empty_run >= stop_after_empty:
+            logging.info(f"Stopping at page {page_num} after {empty_run} consecutive empty page(s).")
+            return True
+        return False
+
+    if max_workers <= 1:
+        for page_num in page_numbers:
+            rows = extract_page(page_num, rate_limiter, fetcher, cache)
+            yield rows
+            if reached_end(page_num, rows):
+                return
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract") as executor:
+        in_flight = deque(
+            (page_num, executor.submit(extract_page, page_num, rate_limiter, fetcher, cache))
+            for page_num in islice(page_numbers, 2 * max_workers)
+        )
+        while in_flight:
+            page_num, future = in_flight.popleft()
+            rows = future.result()
+            if reached_end(page_num, rows):
+                for _, pending in in_flight:
+                    pending.cancel()
+                yield rows
+                return
+            next_page = next(page_numbers, None)
+            if next_page is not None:
+                in_flight.append((next_page, executor.submit(extract_page, next_page, rate_limiter, fetcher, cache)))
+            yield rows
+
+def _produce_raw_page(page_num, raw_pages, stop, rate_limiter, fetcher, cache):
+    """
+    Producer for the parse pipeline: fetches one page and puts
+    (page_num, html_content, cached_rows) on the bounded `raw_pages` queue.
+    Blocks while the queue is full so fetching cannot outrun parsing.
+    """
+    item = (page_num, None, None)
+    try:
+        if not stop.is_set():
+            html_content, cached_rows = _fetch_page(page_num, rate_limiter, fetcher, cache)
+            item = (page_num, html_content, cached_rows)
+    finally:
+        # Always report the page, otherwise the consumer would wait for it forever
+        while not stop.is_set():
+            try:
+                raw_pages.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+def _parse_pool_context():
+    """
+    Start method of the parse processes. They are started while fetch threads run, and a
+    forked child could inherit a lock one of them holds (e.g. the metrics lock), so workers
+    come from a fork server (spawned where that is unavailable) instead.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+def _extract_with_parse_pool(page_numbers, fetch_workers, parse_workers, rate_limiter, fetcher, cache):
+    """
+    Producer/consumer extraction: `fetch_workers` threads push raw HTML onto a bounded
+    queue and a ProcessPoolExecutor of `parse_workers` parses it on separate cores.
+    Like _iter_page_rows, only a sliding window of 2 * fetch_workers pages is submitted
+    for fetching; at most PARSE_QUEUE_SIZE raw pages and 2 * parse_workers parse jobs are
+    held at once. Returns the rows of every page, in page order.
+    """
+    upcoming_pages = iter(page_numbers)
+    raw_pages = queue.Queue(maxsize=PARSE_QUEUE_SIZE)
+    stop = threading.Event()
+    rows_by_page = {}
+    pending = {}
+
+    def collect(done_futures):
+        for future in done_futures:
+            page_num, html_content = pending.pop(future)
+            rows_by_page[page_num] = _finish_page(page_num, html_content, future.result(), cache)
+
+    def submit_next_fetch():
+        """Submits the fetch of the next page, if any; returns how many fetches were submitted."""
+        page_num = next(upcoming_pages, None)
+        if page_num is None:
+            return 0
+        fetch_pool.submit(_produce_raw_page, page_num, raw_pages, stop, rate_limiter, fetcher, cache)
+        return 1
+
+    with ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="extract") as fetch_pool, \
+            ProcessPoolExecutor(max_workers=parse_workers, mp_context=_parse_pool_context()) as parse_pool:
+        try:
+            in_flight = sum(submit_next_fetch() for _ in range(2 * fetch_workers))
+            while in_flight:
+                page_num, html_content, cached_rows = raw_pages.get()
+                in_flight -= 1
+                in_flight += submit_next_fetch() # Keep the fetch window full
+                if not html_content:
+                    rows_by_page[page_num] = []
+                    continue
+                if cached_rows is not None:
+                    rows_by_page[page_num] = cached_rows
+                    continue
+                while len(pending) >= 2 * parse_workers: # Backpressure on the parse stage
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending[parse_pool.submit(parse_product_data, html_content, page_num)] = (page_num, html_content)
+            collect(list(pending))
+        finally:
+            stop.set() # Unblock producers if the consumer bailed out early
+    return [row for page_num in page_numbers for row in rows_by_page.get(page_num, [])]
+
+def _prepare_extraction(max_workers, rate_limiter, fetcher, cache):
+    """Fills in the default worker count, rate limiter, page cache and fetcher of a run."""
+    if max_workers is None:
+        max_workers = EXTRACT_MAX_WORKERS
+    if rate_limiter is None:
+        rate_limiter = TokenBucket()
+    if cache is None and USE_PAGE_CACHE:
+        cache = PageCache()
+    owns_fetcher = fetcher is None
+    if owns_fetcher:
+        fetcher = PageFetcher(pool_size=max(HTTP_POOL_SIZE, max_workers))
+    return max_workers, rate_limiter, fetcher, cache, owns_fetcher
+
+def _finish_extraction(fetcher, owns_fetcher):
+    """Logs the HTTP stats of a run and closes the fetcher if the run created it."""
+    stats = fetcher.stats_summary()
+    logging.info(f"HTTP stats: {stats['requests']} request(s), {stats['errors']} error(s), "
+                 f"{stats['bytes']} bytes, mean {stats['mean_seconds']:.3f}s, max {stats['max_seconds']:.3f}s")
+    if owns_fetcher:
+        fetcher.close()
+
+def extract_all_products(max_workers=None, rate_limiter=None, fetcher=None, cache=None, parse_workers=None,
+                         pages=None):
+    """
+    Extracts product data from every catalog page, or only the page numbers in `pages`.
+    The page count is discovered from page 1 (see _plan_pages), so the crawl stops where the
+    catalog does. Pages are fetched by a pool of `max_workers` threads (EXTRACT_MAX_WORKERS by
+    default) sharing one pooled PageFetcher, at most 2 * max_workers pages ahead of the one
+    being collected; rows are always returned in page order.
+    With `parse_workers` > 0 (PARSE_WORKERS by default) parsing runs in a separate
+    process pool fed through a bounded queue instead of in the fetching threads.
+    Unless a `cache` is passed, the on-disk PageCache is used when USE_PAGE_CACHE is set.
     Returns a Pandas DataFrame.
     Includes error handling for overall extraction process.
     """
-    all_products_data = []
-    logging.info(f"Starting extraction from {BASE_URL}...")
+    if parse_workers is None:
+        parse_workers = PARSE_WORKERS
+    max_workers, rate_limiter, fetcher, cache, owns_fetcher = _prepare_extraction(
+        max_workers, rate_limiter, fetcher, cache
+    )
+    logging.info(f"Starting extraction from {BASE_URL} with {max_workers} worker(s)...")
     try:
-        for page_num in range(1, MAX_PAGES + 1):
-            logging.info(f"Fetching data from page {page_num}/{MAX_PAGES}...")
-            html_content = fetch_page_content(page_num)
-            if html_content:
-                products_from_page = parse_product_data(html_content, page_num)
-                if products_from_page:
-                    all_products_data.extend(products_from_page)
-                else:
-                    logging.warning(f"No products extracted from page {page_num}.")
-            else:
-                logging.warning(f"Skipping page {page_num} due to fetch error.")
-            time.sleep(0.5) # Be respectful to the server
+        all_products_data, page_numbers, stop_after_empty = _plan_pages(pages, rate_limiter, fetcher, cache)
+        if parse_workers > 0:
+            # Pages are parsed out of order here, so the empty-page stop does not apply
+            all_products_data += _extract_with_parse_pool(
+                page_numbers, max(max_workers, 1), parse_workers, rate_limiter, fetcher, cache
+            )
+        else:
+            for products_from_page in _iter_page_rows(page_numbers, max_workers, rate_limiter, fetcher, cache,
+                                                      stop_after_empty):
+                all_products_data.extend(products_from_page)
 
         if not all_products_data:
             logging.warning("No data was extracted from any page.")
@@ -120,4 +388,33 @@ def extract_all_products():
         return df
     except Exception as e:
         logging.error(f"An critical error occurred during the extraction process: {e}")
-        return pd.DataFrame() # Return empty DataFrame on critical failure
\ No newline at end of file
+        return pd.DataFrame() # Return empty DataFrame on critical failure
+    finally:
+        _finish_extraction(fetcher, owns_fetcher)
+
+def iter_extract_chunks(chunk_size=None, max_workers=None, rate_limiter=None, fetcher=None, cache=None, pages=None):
+    """
+    Streaming counterpart of extract_all_products: yields DataFrames of raw rows in page
+    order, one per page or, with `chunk_size`, batches of at least that many rows.
+    `pages` limits extraction to those page numbers; otherwise the page count is discovered
+    as in extract_all_products.
+    At most 2 * max_workers pages are fetched ahead of the consumer, so memory is bounded
+    by the chunk size rather than by the catalog size.
+    """
+    max_workers, rate_limiter, fetcher, cache, owns_fetcher = _prepare_extraction(
+        max_workers, rate_limiter, fetcher, cache
+    )
+    logging.info(f"Starting streaming extraction from {BASE_URL} with {max_workers} worker(s)...")
+    try:
+        first_rows, page_numbers, stop_after_empty = _plan_pages(pages, rate_limiter, fetcher, cache)
+        pending_rows = []
+        for products_from_page in chain([first_rows], _iter_page_rows(page_numbers, max_workers, rate_limiter,
+                                                                      fetcher, cache, stop_after_empty)):
+            pending_rows.extend(products_from_page)
+            if pending_rows and (chunk_size is None or len(pending_rows) >= chunk_size):
+                yield pd.DataFrame(pending_rows)
+                pending_rows = []
+        if pending_rows:
+            yield pd.DataFrame(pending_rows)
+    finally:
+        _finish_extraction(fetcher, owns_fetcher)
\ No newline at end of file
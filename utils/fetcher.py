@@ -0,0 +1,93 @@
+import threading
+import time
+from .config import (
+    USER_AGENT, HTTP_TIMEOUT, HTTP_POOL_SIZE, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR
+)
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+class PageFetcher:
+    """
+    Shared HTTP fetcher that owns a pooled requests.Session.
+    Connections are kept alive and reused across pages; 429/5xx responses and
+    connection errors are retried with exponential backoff (honouring Retry-After).
+    Every request is timed and recorded in `stats`.
+    """
+    def __init__(self, pool_size=HTTP_POOL_SIZE, max_retries=HTTP_MAX_RETRIES,
+                 backoff_factor=HTTP_BACKOFF_FACTOR, timeout=HTTP_TIMEOUT):
+        # requests is imported by the first fetcher, so runs served from artifacts never load it
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False, # Let raise_for_status() report the final response
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.stats = []
+        self._stats_lock = threading.Lock()
+
+    def get(self, url, headers=None):
+        """Performs a GET through the pooled session and records its timing."""
+        start = time.perf_counter()
+        status = None
+        size = 0
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            status = response.status_code
+            size = len(response.content)
+            return response
+        finally:
+            with self._stats_lock:
+                self.stats.append({
+                    'url': url,
+                    'status': status,
+                    'elapsed': time.perf_counter() - start,
+                    'bytes': size,
+                })
+
+    def stats_summary(self):
+        """Returns aggregate request count, errors, bytes and latency figures."""
+        with self._stats_lock:
+            stats = list(self.stats)
+        if not stats:
+            return {'requests': 0, 'errors': 0, 'bytes': 0, 'total_seconds': 0.0,
+                    'mean_seconds': 0.0, 'max_seconds': 0.0}
+        elapsed = [s['elapsed'] for s in stats]
+        return {
+            'requests': len(stats),
+            'errors': sum(1 for s in stats if s['status'] is None or s['status'] >= 400),
+            'bytes': sum(s['bytes'] for s in stats),
+            'total_seconds': sum(elapsed),
+            'mean_seconds': sum(elapsed) / len(elapsed),
+            'max_seconds': max(elapsed),
+        }
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+_default_fetcher = None
+_default_fetcher_lock = threading.Lock()
+
+def get_default_fetcher():
+    """Returns the process-wide fetcher used when none is passed explicitly."""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = PageFetcher()
+        return _default_fetcher
@@ -0,0 +1,179 @@
+import json
+import os
+import threading
+import pandas as pd
+from .config import HISTORY_DIR
+import logging
+
+KEY_COLUMNS = ['Title', 'Size', 'Gender', 'Colors']
+RUN_COLUMN = 'RunTimestamp'
+INDEX_FILE = '_index.json'
+KEY_INDEX_FILE = '_keys.parquet'
+KEY_INDEX_ROW_GROUP_SIZE = 8192 # Small row groups keep a Title lookup to a few thousand rows
+
+def _differs(before, after):
+    return ~((before == after) | (before.isna() & after.isna()))
+
+class HistoryStore:
+    """
+    Append-only history of every loaded run, for price and rating tracking.
+    Each run is one Parquet file under `run_date=YYYY-MM-DD/`, sorted by Title so row-group
+    statistics can skip unrelated rows. `_index.json` maps every run to its file.
+    `_keys.parquet` lists the partitions every product key appears in, sorted by Title, so a
+    query reads the few row groups of its Title and only opens the run files it needs.
+    """
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._index = self._read_index()
+
+    def _index_path(self):
+        return os.path.join(self.root, INDEX_FILE)
+
+    def _key_index_path(self):
+        return os.path.join(self.root, KEY_INDEX_FILE)
+
+    def _read_index(self):
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'runs': {}}
+
+    def _read_key_index(self, filters=None):
+        if not os.path.exists(self._key_index_path()):
+            return None
+        import pyarrow.parquet as pq
+        return pq.read_table(self._key_index_path(), filters=filters).to_pandas()
+
+    def _write_key_index(self, keys):
+        keys = keys.drop_duplicates().sort_values(KEY_COLUMNS + ['run_date'], kind='stable', ignore_index=True)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        tmp_path = f"{self._key_index_path()}.tmp"
+        pq.write_table(pa.Table.from_pandas(keys, preserve_index=False), tmp_path,
+                       row_group_size=KEY_INDEX_ROW_GROUP_SIZE, compression='zstd')
+        os.replace(tmp_path, self._key_index_path())
+
+    def _write_index(self):
+        tmp_path = f"{self._index_path()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path())
+
+    def runs(self):
+        """Returns the ids of the recorded runs, oldest first."""
+        return sorted(self._index['runs'])
+
+    def append(self, df, run_timestamp=None):
+        """
+        Records `df` as the run at `run_timestamp` and returns its run id. By default the run
+        is timestamped by its latest row Timestamp (the scrape time), so loading the same
+        scrape again is recognised as the same run.
+        Runs are never rewritten: recording a run id again with the same product keys is a
+        no-op (a retried load), with other keys it raises ValueError.
+        """
+        if run_timestamp is None and 'Timestamp' in df.columns and df['Timestamp'].notna().any():
+            run_timestamp = pd.to_datetime(df['Timestamp']).max()
+        run_timestamp = pd.Timestamp(run_timestamp if run_timestamp is not None else pd.Timestamp.now())
+        run_id = run_timestamp.strftime('%Y%m%dT%H%M%S')
+        run_date = run_timestamp.strftime('%Y-%m-%d')
+        relative_path = os.path.join(f"run_date={run_date}", f"run-{run_id}.parquet")
+        path = os.path.join(self.root, relative_path)
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        with self._lock:
+            if run_id in self._index['runs']:
+                if not self._same_keys(run_id, df):
+                    raise ValueError(f"Run '{run_id}' is already recorded in the history store with other products")
+                logging.info(f"Run {run_id} is already recorded in history store {self.root}; skipping.")
+                return run_id
+            rows = df.assign(**{RUN_COLUMN: run_timestamp}).sort_values('Title', kind='stable')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            pq.write_table(pa.Table.from_pandas(rows, preserve_index=False), tmp_path, compression='zstd')
+            os.replace(tmp_path, path)
+
+            keys = rows[KEY_COLUMNS].drop_duplicates().assign(run_date=run_date)
+            known_keys = self._read_key_index()
+            self._write_key_index(keys if known_keys is None else pd.concat([known_keys, keys], ignore_index=True))
+            self._index['runs'][run_id] = {'file': relative_path, 'date': run_date, 'rows': len(rows)}
+            self._write_index()
+        logging.info(f"Recorded run {run_id} ({len(rows)} rows) in history store {self.root}")
+        return run_id
+
+    def _same_keys(self, run_id, df):
+        """Whether the stored run `run_id` holds exactly the product keys of `df`."""
+        stored = self._read_run(run_id, columns=KEY_COLUMNS)
+        def key_set(frame):
+            return set(frame[KEY_COLUMNS].astype(str).itertuples(index=False, name=None))
+        return len(stored) == len(df) and key_set(stored) == key_set(df)
+
+    def _read_run(self, run_id, columns=None, filters=None):
+        import pyarrow.parquet as pq
+        path = os.path.join(self.root, self._index['runs'][run_id]['file'])
+        table = pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+        return table.to_pandas()
+
+    def _resolve_run(self, run_id):
+        if run_id not in self._index['runs']:
+            raise KeyError(f"Unknown run '{run_id}'")
+        return run_id
+
+    def latest_snapshot(self, columns=None):
+        """Returns the rows of the most recent run (an empty DataFrame if nothing was recorded)."""
+        runs = self.runs()
+        if not runs:
+            return pd.DataFrame(columns=columns)
+        return self._read_run(runs[-1], columns=columns)
+
+    def price_series(self, title, size=None, gender=None, colors=None):
+        """
+        Returns Price and Rating over time for every variant of `title` (optionally narrowed by
+        size/gender/colors), one row per run, sorted by RunTimestamp.
+        Only partitions the key index lists for the matching keys are read.
+        """
+        wanted = {'Size': size, 'Gender': gender, 'Colors': colors}
+        filters = [('Title', '=', title)] + [(column, '=', value) for column, value in wanted.items()
+                                             if value is not None]
+        keys = self._read_key_index(filters=filters)
+        dates = set(keys['run_date']) if keys is not None else set()
+
+        columns = [RUN_COLUMN] + KEY_COLUMNS + ['Price', 'Rating']
+        frames = [self._read_run(run_id, columns=columns, filters=filters)
+                  for run_id, run in self._index['runs'].items() if run['date'] in dates]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True).sort_values(RUN_COLUMN, ignore_index=True)
+
+    def changes_between(self, run_a, run_b):
+        """
+        Compares two runs by product key. Returns one row per key that was added, removed or
+        whose Price/Rating changed, with the values of both runs and a 'change' column.
+        """
+        columns = KEY_COLUMNS + ['Price', 'Rating']
+        before = self._read_run(self._resolve_run(run_a), columns=columns).drop_duplicates(KEY_COLUMNS, keep='last')
+        after = self._read_run(self._resolve_run(run_b), columns=columns).drop_duplicates(KEY_COLUMNS, keep='last')
+        merged = before.merge(after, on=KEY_COLUMNS, how='outer', suffixes=('_before', '_after'), indicator=True)
+
+        changed = (_differs(merged['Price_before'], merged['Price_after'])
+                   | _differs(merged['Rating_before'], merged['Rating_after']))
+        merged['change'] = 'changed'
+        merged.loc[merged['_merge'] == 'left_only', 'change'] = 'removed'
+        merged.loc[merged['_merge'] == 'right_only', 'change'] = 'added'
+        keep = (merged['_merge'] != 'both') | changed
+        return merged.loc[keep].drop(columns='_merge').reset_index(drop=True)
+
+def record_history(df, root=HISTORY_DIR, run_timestamp=None):
+    """Appends `df` to the history store as a new run. Returns True on success."""
+    if df.empty:
+        logging.warning("DataFrame is empty. Skipping history record.")
+        return False
+    try:
+        HistoryStore(root).append(df, run_timestamp=run_timestamp)
+        return True
+    except Exception as e:
+        logging.error(f"Error recording run in history store {root}: {e}")
+        return False
@@ -1,23 +1,102 @@
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine, text
-import gspread
 from .config import (
-    CSV_FILE_PATH, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME,
+    CSV_FILE_PATH, CSV_ENGINE, CSV_READ_ENGINE, CSV_COMPRESSION, CSV_CHUNK_ROWS, OUTPUT_SCHEMA, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME,
     POSTGRES_TABLE_NAME, GOOGLE_SHEETS_CREDENTIALS_FILE,
-    GOOGLE_SHEET_NAME, GOOGLE_SHEET_ID
+    GOOGLE_SHEET_NAME, GOOGLE_SHEET_ID, POSTGRES_LOAD_METHOD,
+    SHEETS_CHUNK_ROWS, SHEETS_MAX_RETRIES, SHEETS_BACKOFF_SECONDS, SINK_TIMEOUT_SECONDS,
+    PARQUET_FILE_PATH, PARQUET_COMPRESSION, PARQUET_ROW_GROUP_SIZE
 )
+import importlib.util
+import io
 import logging
 import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from .metrics import record_stage
+from .transform import OUTPUT_DTYPES
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Sink dependencies (SQLAlchemy, gspread, pyarrow) are imported inside the functions that use
+# them, so a run only pays for the sinks it uses. pyarrow is optional; without it the columnar
+# sink is unavailable and CSV files are written and read by pandas.
 
-def save_to_csv(df, file_path=CSV_FILE_PATH):
-    """Saves DataFrame to a CSV file."""
+# Compression inferred from the CSV file extension when none is configured
+CSV_COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+
+def _csv_engine(engine):
+    if engine not in ('pyarrow', 'pandas'):
+        raise ValueError(f"Unknown CSV engine '{engine}'. Choose 'pyarrow' or 'pandas'.")
+    if engine == 'pyarrow' and importlib.util.find_spec('pyarrow') is None:
+        logging.warning("pyarrow is not installed, falling back to the 'pandas' CSV engine.")
+        return 'pandas'
+    return engine
+
+def _csv_compression(file_path, compression):
+    compression = compression or CSV_COMPRESSION
+    if compression is None:
+        compression = CSV_COMPRESSION_EXTENSIONS.get(os.path.splitext(str(file_path))[1].lower(), 'none')
+    if compression not in ('none', 'gzip', 'zstd'):
+        raise ValueError(f"Unknown CSV compression '{compression}'. Choose 'gzip', 'zstd' or 'none'.")
+    return None if compression == 'none' else compression
+
+def _write_csv(df, path, engine, compression, chunk_rows, header):
+    """Writes `df` as a new CSV file at `path`, converting and writing `chunk_rows` rows at a time."""
+    if engine == 'pandas':
+        df.to_csv(path, index=False, encoding='utf-8', header=header, chunksize=chunk_rows,
+                  compression=compression)
+        return
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    with pa.OSFile(str(path), 'wb') as raw_sink:
+        sink = pa.CompressedOutputStream(raw_sink, compression) if compression else raw_sink
+        schema = writer = None
+        for start in range(0, len(df), chunk_rows):
+            table = pa.Table.from_pandas(df.iloc[start:start + chunk_rows], schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pacsv.CSVWriter(sink, schema, write_options=pacsv.WriteOptions(include_header=header))
+            writer.write_table(table)
+        writer.close()
+        if compression:
+            sink.close()
+
+def _append_file(source_path, target_path):
+    """Appends `source_path` to `target_path`; the target is truncated back to its old size if that fails."""
+    size = os.path.getsize(target_path)
+    try:
+        with open(source_path, 'rb') as source, open(target_path, 'ab') as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+            target.flush()
+            os.fsync(target.fileno())
+    except BaseException:
+        os.truncate(target_path, size)
+        raise
+
+def save_to_csv(df, file_path=CSV_FILE_PATH, mode='w', engine=None, compression=None, chunk_rows=CSV_CHUNK_ROWS):
+    """
+    Saves DataFrame to a CSV file.
+    mode='a' appends the rows without a header, for incremental (streaming) loads; a file
+    that does not exist yet is always written with its header.
+    `engine` is 'pandas' or 'pyarrow' (multithreaded Arrow writer, formats values differently;
+    see CSV_ENGINE); CSV_ENGINE by default.
+    `compression` is 'gzip', 'zstd' or 'none' (CSV_COMPRESSION, else inferred from the extension);
+    appended batches become extra gzip members/zstd frames, which readers decode as one stream.
+    Rows are written to a temporary file first, then renamed over (or appended to) `file_path`,
+    so a failed write never leaves a truncated file behind.
+    """
     if df.empty:
         logging.warning("DataFrame is empty. Skipping CSV save.")
         return False
+    tmp_path = f"{file_path}.tmp"
+    append = mode == 'a' and os.path.exists(file_path)
     try:
-        df.to_csv(file_path, index=False, encoding='utf-8')
+        engine = _csv_engine(engine or CSV_ENGINE)
+        _write_csv(df, tmp_path, engine, _csv_compression(file_path, compression), chunk_rows, header=not append)
+        if append:
+            _append_file(tmp_path, file_path)
+        else:
+            os.replace(tmp_path, file_path)
         logging.info(f"Data successfully saved to CSV: {file_path}")
         return True
     except IOError as e:
@@ -26,36 +105,241 @@ def save_to_csv(df, file_path=CSV_FILE_PATH):
     except Exception as e:
         logging.error(f"An unexpected error occurred while saving to CSV {file_path}: {e}")
         return False
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# pandas dtype of Arrow-backed string columns (the compact schema's Title)
+_ARROW_STRING_DTYPE = 'string[pyarrow]'
+
+def _arrow_csv_type(dtype):
+    import pyarrow as pa
+    if dtype == 'category':
+        return pa.dictionary(pa.int32(), pa.string()) # Converted straight to a pandas Categorical
+    try:
+        numpy_dtype = np.dtype(dtype)
+    except TypeError: # pandas string dtypes
+        return pa.string()
+    return pa.string() if numpy_dtype == object else pa.from_numpy_dtype(numpy_dtype)
+
+def load_from_csv(file_path=CSV_FILE_PATH, columns=None, schema=None, engine=None, compression=None):
+    """
+    Reads a CSV file written by save_to_csv with the dtypes of the output `schema`
+    ('standard' or 'compact', OUTPUT_SCHEMA by default), so no column is type-inferred.
+    Only `columns` are read. The 'pyarrow' engine (CSV_READ_ENGINE by default) parses blocks of
+    the file on multiple threads; `compression` is resolved as in save_to_csv.
+    """
+    engine = _csv_engine(engine or CSV_READ_ENGINE)
+    compression = _csv_compression(file_path, compression)
+    dtypes = {column: dtype for column, dtype in OUTPUT_DTYPES[schema or OUTPUT_SCHEMA].items()
+              if columns is None or column in columns}
+    if engine == 'pyarrow':
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        convert_options = pacsv.ConvertOptions(
+            column_types={column: _arrow_csv_type(dtype) for column, dtype in dtypes.items()},
+            include_columns=list(columns or []),
+        )
+        with pa.input_stream(str(file_path), compression=compression) as source:
+            table = pacsv.read_csv(source, read_options=pacsv.ReadOptions(use_threads=True),
+                                   convert_options=convert_options)
+        # Arrow-backed string columns keep the Arrow buffers instead of becoming Python objects
+        keep_arrow_strings = all(dtypes.get(field.name) == _ARROW_STRING_DTYPE
+                                 for field in table.schema if field.type == pa.string())
+        df = table.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get if keep_arrow_strings else None)
+    else:
+        df = pd.read_csv(file_path, usecols=columns, compression=compression, encoding='utf-8',
+                         dtype={column: dtype for column, dtype in dtypes.items() if column != 'Timestamp'})
+        if 'Timestamp' in df.columns:
+            df['Timestamp'] = pd.to_datetime(df['Timestamp'], format='ISO8601')
+    return df.astype({column: dtype for column, dtype in dtypes.items() if column in df.columns})
+
+# Columns the columnar sink can partition by; 'run_date' is derived from Timestamp
+RUN_DATE_COLUMN = 'run_date'
+
+def _with_run_date(df):
+    return df.assign(**{RUN_DATE_COLUMN: pd.to_datetime(df['Timestamp']).dt.strftime('%Y-%m-%d')})
+
+def save_to_parquet(df, path=PARQUET_FILE_PATH, file_format='parquet', compression=PARQUET_COMPRESSION,
+                    row_group_size=PARQUET_ROW_GROUP_SIZE, partition_cols=None):
+    """
+    Saves DataFrame as a typed columnar file, so readers can load only the columns they need
+    without re-parsing text.
+    file_format='parquet' writes row groups of `row_group_size` rows; 'feather' writes Arrow IPC
+    (use compression='uncompressed' there to make memory-mapped reads zero-copy).
+    partition_cols (e.g. ['run_date', 'Gender']) writes a Hive-partitioned Parquet dataset under
+    `path` instead of one file; partitions written by this call replace earlier ones.
+    """
+    if df.empty:
+        logging.warning("DataFrame is empty. Skipping Parquet save.")
+        return False
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+    except ImportError: # pyarrow is optional; only the columnar sink needs it
+        logging.error("pyarrow is not installed. Install it to save Parquet/Feather files.")
+        return False
+    try:
+        if partition_cols:
+            if file_format != 'parquet':
+                raise ValueError("Partitioning is only supported for file_format='parquet'")
+            if RUN_DATE_COLUMN in partition_cols and RUN_DATE_COLUMN not in df.columns:
+                df = _with_run_date(df)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            pq.write_to_dataset(table, path, partition_cols=partition_cols, compression=compression,
+                                row_group_size=row_group_size, existing_data_behavior='delete_matching')
+        else:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            # Written to a temporary file first so readers never see a half-written file
+            tmp_path = f"{path}.tmp"
+            if file_format == 'parquet':
+                pq.write_table(table, tmp_path, compression=compression, row_group_size=row_group_size)
+            elif file_format == 'feather':
+                feather.write_feather(table, tmp_path, compression=compression)
+            else:
+                raise ValueError(f"Unknown columnar file format '{file_format}'. Expected 'parquet' or 'feather'.")
+            os.replace(tmp_path, path)
+        logging.info(f"Data successfully saved to {file_format.capitalize()}: {path}")
+        return True
+    except Exception as e:
+        logging.error(f"Error saving data to {file_format.capitalize()} {path}: {e}")
+        return False
+
+def load_from_parquet(path=PARQUET_FILE_PATH, columns=None, filters=None, file_format='parquet'):
+    """
+    Reads a file or partitioned dataset written by save_to_parquet, memory-mapped.
+    Only `columns` are read; `filters` (pyarrow DNF, e.g. [('Gender', '=', 'Men')]) prune
+    partitions and row groups before any data is decoded.
+    """
+    if file_format == 'feather':
+        import pyarrow.feather as feather
+        table = feather.read_table(path, columns=columns, memory_map=True)
+    else:
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+    return table.to_pandas()
+
+def apply_changes_to_csv(changes, file_path=CSV_FILE_PATH):
+    """
+    Applies a cdc.ChangeSet to the CSV file: nothing is written when nothing changed,
+    pure inserts are appended, anything else rewrites the file.
+    """
+    if os.path.exists(file_path):
+        if not changes.has_changes:
+            logging.info(f"No changes for CSV {file_path}; skipping write.")
+            return True
+        if not changes.requires_rewrite and changes.updates.empty:
+            return save_to_csv(changes.inserts, file_path, mode='a')
+    return save_to_csv(changes.current, file_path)
+
+# Columns of the primary key of the products table
+PRODUCTS_KEY_COLUMNS = ['Title', 'Size', 'Gender', 'Colors']
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+def _create_products_table_sql(table_name):
+    # Column names are quoted so they match the DataFrame (and to_sql) column names exactly
+    return f"""
+            CREATE TABLE IF NOT EXISTS {table_name} (
+                "Title" TEXT,
+                "Price" DOUBLE PRECISION,
+                "Rating" FLOAT,
+                "Colors" INTEGER,
+                "Size" TEXT,
+                "Gender" TEXT,
+                "Timestamp" TIMESTAMP WITHOUT TIME ZONE,
+                PRIMARY KEY ("Title", "Size", "Gender", "Colors")
+            );
+            """
+
+def _copy_frame(cursor, staging_table, frame):
+    """Streams `frame` into the (truncated) staging table with COPY ... FROM STDIN."""
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    columns = ", ".join(_quote(column) for column in frame.columns)
+    cursor.execute(f"TRUNCATE {staging_table}")
+    cursor.copy_expert(f"COPY {staging_table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def _copy_to_postgresql(engine, df, table_name, if_exists, deletes=None):
+    """
+    Bulk-loads `df` with COPY ... FROM STDIN into an UNLOGGED staging table, then merges the
+    staging rows into the keyed products table in the same transaction. if_exists='replace'
+    recreates the table (with its primary key); 'append' upserts on the primary key.
+    Rows whose keys are in `deletes` are removed in the same transaction.
+    Returns the number of rows merged.
+    """
+    # ON CONFLICT cannot touch the same key twice in one statement; the last row wins
+    rows = df.drop_duplicates(subset=PRODUCTS_KEY_COLUMNS, keep='last')
+    if len(rows) < len(df):
+        logging.info(f"Collapsed {len(df) - len(rows)} row(s) sharing a primary key before COPY.")
 
-def save_to_postgresql(df, table_name=POSTGRES_TABLE_NAME):
-    """Saves DataFrame to a PostgreSQL table."""
+    staging_table = f"{table_name}_staging"
+    columns = ", ".join(_quote(column) for column in rows.columns)
+    key_columns = ", ".join(_quote(column) for column in PRODUCTS_KEY_COLUMNS)
+    updates = ", ".join(f"{_quote(column)} = EXCLUDED.{_quote(column)}"
+                        for column in rows.columns if column not in PRODUCTS_KEY_COLUMNS)
+
+    raw_connection = engine.raw_connection()
+    try:
+        cursor = raw_connection.cursor()
+        if if_exists == 'replace':
+            cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+        cursor.execute(_create_products_table_sql(table_name))
+        cursor.execute(f"CREATE UNLOGGED TABLE IF NOT EXISTS {staging_table} (LIKE {table_name} INCLUDING DEFAULTS)")
+        if deletes is not None and not deletes.empty:
+            _copy_frame(cursor, staging_table, deletes[PRODUCTS_KEY_COLUMNS])
+            matches = " AND ".join(f"t.{_quote(column)} = s.{_quote(column)}" for column in PRODUCTS_KEY_COLUMNS)
+            cursor.execute(f"DELETE FROM {table_name} t USING {staging_table} s WHERE {matches}")
+        if not rows.empty:
+            _copy_frame(cursor, staging_table, rows)
+            cursor.execute(
+                f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {staging_table} "
+                f"ON CONFLICT ({key_columns}) DO UPDATE SET {updates}"
+            )
+        cursor.execute(f"TRUNCATE {staging_table}")
+        raw_connection.commit()
+    except Exception:
+        raw_connection.rollback()
+        raise
+    finally:
+        raw_connection.close()
+    return len(rows)
+
+def save_to_postgresql(df, table_name=POSTGRES_TABLE_NAME, if_exists='replace', method=None):
+    """
+    Saves DataFrame to a PostgreSQL table.
+    method='copy' (POSTGRES_LOAD_METHOD by default) streams the rows through COPY into a
+    staging table and merges them into the keyed table in one transaction; method='to_sql'
+    uses DataFrame.to_sql.
+    if_exists='append' adds the rows to the existing table, for incremental (streaming) loads.
+    """
     if df.empty:
         logging.warning("DataFrame is empty. Skipping PostgreSQL save.")
         return False
+    method = method or POSTGRES_LOAD_METHOD
     
     connection_string_from_env = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     logging.info(f"INFO: Using connection string from .env: postgresql://{DB_USER}:*****@{DB_HOST}:{DB_PORT}/{DB_NAME}")
     connection_string_to_use = connection_string_from_env
 
     try:
+        from sqlalchemy import create_engine, text
         engine = create_engine(connection_string_to_use)
-        with engine.connect() as connection:
-            create_table_query = text(f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                Title TEXT,
-                Price BIGINT,
-                Rating FLOAT,
-                Colors INTEGER,
-                Size TEXT,
-                Gender TEXT,
-                Timestamp TIMESTAMP WITHOUT TIME ZONE,
-                PRIMARY KEY (Title, Size, Gender, Colors) 
-            );
-            """)
-            connection.execute(create_table_query)
-            connection.commit()
+        if method == 'copy':
+            start = time.perf_counter()
+            row_count = _copy_to_postgresql(engine, df, table_name, if_exists)
+            elapsed = time.perf_counter() - start
+            logging.info(f"Copied {row_count} rows into {table_name} in {elapsed:.2f}s "
+                         f"({row_count / elapsed if elapsed > 0 else float('inf'):.0f} rows/s)")
+        else:
+            with engine.connect() as connection:
+                connection.execute(text(_create_products_table_sql(table_name)))
+                connection.commit()
 
-            df.to_sql(table_name, engine, if_exists='replace', index=False)
+                df.to_sql(table_name, engine, if_exists=if_exists, index=False)
         logging.info(f"Data successfully saved to PostgreSQL table: {table_name}")
         return True
     except FileNotFoundError:
@@ -68,16 +352,60 @@ def save_to_postgresql(df, table_name=POSTGRES_TABLE_NAME):
         logging.error(f"Error saving data to PostgreSQL table {table_name}: {e}")
         return False
 
-def save_to_google_sheets(df):
-    if df.empty:
-        logging.warning("DataFrame is empty. Skipping Google Sheets save.")
+def apply_changes_to_postgresql(changes, table_name=POSTGRES_TABLE_NAME):
+    """
+    Applies a cdc.ChangeSet to the PostgreSQL table: inserts and updates are upserted with
+    INSERT ... ON CONFLICT DO UPDATE and deleted keys removed, all in one transaction.
+    The first load (no snapshot yet) replaces the table.
+    """
+    if not changes.has_changes:
+        logging.info(f"No changes for PostgreSQL table {table_name}; skipping load.")
+        return True
+    if changes.initial:
+        return save_to_postgresql(changes.current, table_name, if_exists='replace', method='copy')
+
+    upserts = pd.concat([changes.inserts, changes.updates])
+    try:
+        from sqlalchemy import create_engine
+        engine = create_engine(f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
+        _copy_to_postgresql(engine, upserts, table_name, 'append', deletes=changes.deletes)
+        logging.info(f"Applied {changes.summary()} to PostgreSQL table: {table_name}")
+        return True
+    except Exception as e:
+        logging.error(f"Error applying changes to PostgreSQL table {table_name}: {e}")
         return False
 
+def _sheet_values(df):
+    """
+    Converts `df` into JSON-serialisable rows for the Sheets API, one column at a time
+    and without copying the frame. Works for both the standard and the compact schema.
+    """
+    columns = []
+    for column_name in df.columns:
+        column = df[column_name]
+        if pd.api.types.is_datetime64_any_dtype(column):
+            values = column.astype(str).tolist()
+        elif column.dtype == 'float32':
+            # Round-trip through the float32 repr so 3.9 is written as 3.9, not 3.9000000953674316
+            values = column.astype(str).astype('float64').tolist()
+        else:
+            values = column.tolist() # Python scalars, also for categorical/string/int8 columns
+        columns.append(values)
+    return [list(row) for row in zip(*columns)]
+
+WORKSHEET_TITLE = "Products Data"
+
+def _open_products_worksheet():
+    """
+    Opens (or creates) the spreadsheet and its 'Products Data' worksheet.
+    Returns (spreadsheet, worksheet), or None after logging why it could not.
+    """
     if not os.path.exists(GOOGLE_SHEETS_CREDENTIALS_FILE):
         logging.error(f"Google Sheets credentials file not found: {GOOGLE_SHEETS_CREDENTIALS_FILE}")
         logging.error("Please ensure 'google-sheets-api.json' is in the project root directory.")
-        return False
+        return None
         
+    import gspread
     try:
         logging.info(f"gspread module imported: {gspread} (Version: {gspread.__version__})")
         logging.info(f"Attempting to init client with: gspread.service_account(filename='{GOOGLE_SHEETS_CREDENTIALS_FILE}')")
@@ -97,13 +425,13 @@ def save_to_google_sheets(df):
                 logging.error(f"API error opening Google Sheet by URL (with ID '{GOOGLE_SHEET_ID}'): {e}.")
                 # Pesan error sudah cukup jelas tanpa email SA di sini
                 logging.error(f"Ensure the sheet is shared with your service account as Editor and Google Drive/Sheets APIs are enabled.")
-                return False 
+                return None 
             except gspread.exceptions.SpreadsheetNotFound:
                 logging.error(f"Google Sheet with ID '{GOOGLE_SHEET_ID}' not found via URL. Ensure ID is correct, sheet exists, and shared with your service account as Editor.")
-                return False
+                return None
             except Exception as e_url:
                 logging.error(f"Unexpected error opening Google Sheet by URL (with ID '{GOOGLE_SHEET_ID}'): {e_url}")
-                return False
+                return None
         
         elif GOOGLE_SHEET_NAME:
             logging.info(f"GOOGLE_SHEET_ID not found or not used. Attempting to open/create Google Sheet by name: {GOOGLE_SHEET_NAME}")
@@ -119,38 +447,179 @@ def save_to_google_sheets(df):
                     logging.info(f"Ensure it's shared appropriately as Editor if others need access.")
                 except Exception as e_create:
                     logging.error(f"Error creating sheet by name '{GOOGLE_SHEET_NAME}': {e_create}")
-                    return False
+                    return None
             except gspread.exceptions.APIError as e:
                 logging.error(f"API error opening Google Sheet by name '{GOOGLE_SHEET_NAME}': {e}.")
                 logging.error(f"Ensure the sheet (if it exists) is shared with your service account as Editor and Google Drive/Sheets APIs are enabled.")
-                return False
+                return None
             except Exception as e_open_name:
                 logging.error(f"Error opening sheet by name '{GOOGLE_SHEET_NAME}': {e_open_name}")
-                return False
+                return None
         
         if not spreadsheet:
             logging.error(f"Could not open or create Google Sheet. Verify GOOGLE_SHEET_ID/GOOGLE_SHEET_NAME in .env, sharing permissions, and API status in GCP.")
-            return False
+            return None
 
-        worksheet_title = "Products Data"
+        worksheet_title = WORKSHEET_TITLE
         try:
             worksheet = spreadsheet.worksheet(worksheet_title)
             logging.info(f"Using existing worksheet: '{worksheet_title}'")
         except gspread.exceptions.WorksheetNotFound:
             logging.info(f"Worksheet '{worksheet_title}' not found. Creating new one.")
             worksheet = spreadsheet.add_worksheet(title=worksheet_title, rows="1", cols="1")
-        
-        worksheet.clear()
-        
-        df_gsp = df.copy()
-        if 'Timestamp' in df_gsp.columns:
-            df_gsp['Timestamp'] = df_gsp['Timestamp'].astype(str)
+        return spreadsheet, worksheet
+
+    except Exception as e:
+        logging.error(f"An unexpected error occurred during Google Sheets operation: {e}")
+        return None
+
+# Sheets API errors worth retrying: quota exhaustion and transient server/gateway errors
+# (the same codes utils.fetcher retries)
+SHEETS_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+def _call_sheets_api(func, *args, **kwargs):
+    """
+    Calls a gspread method, retrying quota (429) and transient 5xx errors with exponential
+    backoff (honouring Retry-After when the API sends it).
+    """
+    import gspread
+    for attempt in range(SHEETS_MAX_RETRIES + 1):
+        try:
+            return func(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            if e.code not in SHEETS_RETRY_STATUS_CODES or attempt == SHEETS_MAX_RETRIES:
+                raise
+            retry_after = e.response.headers.get('Retry-After') if e.response is not None else None
+            delay = float(retry_after) if retry_after else SHEETS_BACKOFF_SECONDS * (2 ** attempt)
+            logging.warning(f"Google Sheets API returned {e.code}; retrying in {delay:.1f}s "
+                            f"(attempt {attempt + 1}/{SHEETS_MAX_RETRIES}).")
+            time.sleep(delay)
+
+def _write_sheet_rows(worksheet, values, chunk_rows=None):
+    """
+    Writes `values` (header included) from A1 in fixed-size row chunks, one batch_update per chunk.
+    The worksheet is resized to fit exactly once up front, so no clear() is needed and a
+    failure partway leaves the previous data in the rows not yet written instead of an empty sheet.
+    """
+    import gspread
+    chunk_rows = chunk_rows or SHEETS_CHUNK_ROWS
+    column_count = len(values[0])
+    _call_sheets_api(worksheet.resize, rows=len(values), cols=column_count)
+    for start in range(0, len(values), chunk_rows):
+        chunk = values[start:start + chunk_rows]
+        cell_range = (f"{gspread.utils.rowcol_to_a1(start + 1, 1)}:"
+                      f"{gspread.utils.rowcol_to_a1(start + len(chunk), column_count)}")
+        _call_sheets_api(worksheet.batch_update, [{'range': cell_range, 'values': chunk}])
+    return (len(values) + chunk_rows - 1) // chunk_rows
+
+def save_to_google_sheets(df):
+    if df.empty:
+        logging.warning("DataFrame is empty. Skipping Google Sheets save.")
+        return False
 
-        worksheet.update([df_gsp.columns.values.tolist()] + df_gsp.values.tolist())
-        logging.info(f"Data successfully saved to Google Sheet: '{spreadsheet.title}', Worksheet: '{worksheet_title}'")
+    opened = _open_products_worksheet()
+    if opened is None:
+        return False
+    spreadsheet, worksheet = opened
+
+    try:
+        chunk_count = _write_sheet_rows(worksheet, [df.columns.tolist()] + _sheet_values(df))
+        logging.info(f"Data successfully saved to Google Sheet: '{spreadsheet.title}', Worksheet: '{WORKSHEET_TITLE}' "
+                     f"({len(df)} rows in {chunk_count} batch(es))")
         logging.info(f"Sheet URL: {spreadsheet.url}")
         return True
            
     except Exception as e:
         logging.error(f"An unexpected error occurred during Google Sheets operation: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def _row_ranges(positions, values, column_count):
+    """
+    Groups sheet rows (0-based data positions, header excluded) into contiguous A1 ranges
+    for a single batch_update call.
+    """
+    import gspread
+    ranges = []
+    for position, row in sorted(zip(positions, values), key=lambda item: item[0]):
+        if ranges and position == ranges[-1]['end'] + 1:
+            ranges[-1]['values'].append(row)
+            ranges[-1]['end'] = position
+        else:
+            ranges.append({'start': position, 'end': position, 'values': [row]})
+    return [
+        {'range': f"{gspread.utils.rowcol_to_a1(r['start'] + 2, 1)}:{gspread.utils.rowcol_to_a1(r['end'] + 2, column_count)}",
+         'values': r['values']}
+        for r in ranges
+    ]
+
+def apply_changes_to_google_sheets(changes):
+    """
+    Applies a cdc.ChangeSet to the worksheet: updated rows are rewritten in place with one
+    batched range update and inserted rows appended. The first load, or any delete, rewrites
+    the worksheet since removing rows would shift the positions of all rows below them.
+    """
+    if not changes.has_changes:
+        logging.info("No changes for Google Sheets; skipping load.")
+        return True
+    if changes.requires_rewrite:
+        return save_to_google_sheets(changes.current)
+
+    opened = _open_products_worksheet()
+    if opened is None:
+        return False
+    spreadsheet, worksheet = opened
+    try:
+        if not changes.updates.empty:
+            _call_sheets_api(worksheet.batch_update, _row_ranges(
+                changes.update_positions, _sheet_values(changes.updates), len(changes.updates.columns)))
+        if not changes.inserts.empty:
+            _call_sheets_api(worksheet.append_rows, _sheet_values(changes.inserts), table_range='A1')
+        logging.info(f"Applied {changes.summary()} to Google Sheet: '{spreadsheet.title}', Worksheet: '{WORKSHEET_TITLE}'")
+        return True
+    except Exception as e:
+        logging.error(f"An unexpected error occurred during Google Sheets operation: {e}")
+        return False
+
+def _run_sink(name, loader, df):
+    start = time.perf_counter()
+    with record_stage(f"load:{name}", rows_in=len(df)) as stage:
+        outcome = loader(df)
+        # Loaders return True/False, or (success, rows_written) when they write only part of the frame
+        success, rows = outcome if isinstance(outcome, tuple) else (outcome, len(df))
+        stage.rows_out = rows if success else 0
+    return bool(success), (rows if success else 0), time.perf_counter() - start
+
+def dispatch_sinks(df, sinks, timeouts=None, default_timeout=SINK_TIMEOUT_SECONDS):
+    """
+    Runs the loaders in `sinks` (name -> callable(df)) concurrently, so the load phase takes
+    as long as the slowest sink. A sink that raises or exceeds its timeout (`timeouts[name]`,
+    else `default_timeout` seconds) is reported as failed without affecting the others; a timed-out
+    loader cannot be interrupted and finishes in the background.
+    Returns {name: {'success', 'rows', 'seconds', 'error'}} and logs a summary.
+    """
+    timeouts = timeouts or {}
+    results = {}
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max(len(sinks), 1), thread_name_prefix="sink")
+    try:
+        futures = {name: executor.submit(_run_sink, name, loader, df) for name, loader in sinks.items()}
+        for name, future in futures.items():
+            timeout = timeouts.get(name, default_timeout)
+            remaining = None if timeout is None else max(start + timeout - time.perf_counter(), 0)
+            try:
+                success, rows, seconds = future.result(timeout=remaining)
+                results[name] = {'success': success, 'rows': rows, 'seconds': seconds, 'error': None}
+            except FutureTimeoutError:
+                results[name] = {'success': False, 'rows': 0, 'seconds': time.perf_counter() - start,
+                                 'error': f"timed out after {timeout}s"}
+            except Exception as e:
+                results[name] = {'success': False, 'rows': 0, 'seconds': time.perf_counter() - start,
+                                 'error': str(e)}
+    finally:
+        executor.shutdown(wait=False)
+
+    logging.info(f"Load phase finished in {time.perf_counter() - start:.2f}s:")
+    for name, result in results.items():
+        status = "OK" if result['success'] else f"FAILED ({result['error'] or 'loader reported failure'})"
+        logging.info(f"  {name:<15} {status:<10} {result['seconds']:8.2f}s {result['rows']:>9} rows")
+    return results
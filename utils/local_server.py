@@ -0,0 +1,188 @@
+"""
+Local stand-in for the Fashion Studio site, for offline end-to-end and load testing.
+
+    python -m utils.local_server --pages 50 --port 8000 --latency 0.05 --error-rate 0.02
+    BASE_URL=http://127.0.0.1:8000 python main.py
+
+Serves synthetic catalog pages (utils/synthetic.py) with the site's `collection-card` markup
+at `/` and `/page{n}`, with optional latency, random 5xx errors, 429 throttling and ETags.
+"""
+import argparse
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .synthetic import generate_catalog_pages, PRODUCTS_PER_PAGE
+import logging
+
+_PAGE_PATH_PATTERN = re.compile(r'^/page(\d+)/?$')
+
+class _CatalogRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real site
+
+    def log_message(self, format, *args):
+        logging.debug(f"local_server: {format % args}")
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+        self.server.catalog.record(status)
+
+    def do_GET(self):
+        catalog = self.server.catalog
+        if catalog.latency:
+            time.sleep(catalog.latency)
+        if catalog.should_throttle():
+            self._send(429, b"Too Many Requests", {"Retry-After": str(catalog.retry_after)})
+            return
+        if catalog.error_rate and catalog.random() < catalog.error_rate:
+            self._send(503, b"Service Unavailable")
+            return
+
+        page_number = catalog.page_number(self.path)
+        if page_number is None:
+            self._send(404, b"Not Found")
+            return
+        body, etag = catalog.pages[page_number - 1]
+        headers = {"ETag": etag, "Content-Type": "text/html; charset=utf-8"} if catalog.etags else \
+            {"Content-Type": "text/html; charset=utf-8"}
+        if catalog.etags and self.headers.get("If-None-Match") == etag:
+            self._send(304, headers={"ETag": etag})
+            return
+        self._send(200, body, headers)
+
+    do_HEAD = do_GET
+
+class CatalogServer:
+    """
+    Threaded HTTP server serving `pages` synthetic catalog pages on `host`:`port` (0 picks a free port).
+    - latency: seconds added to every response
+    - error_rate: share of requests answered with 503
+    - throttle_rate: share of requests answered with 429 (with Retry-After: `retry_after`)
+    - max_requests_per_second: requests above this rate (over a 1s window) are answered with 429
+    - etags: send ETags and answer matching If-None-Match requests with 304
+    `stats` counts the responses sent per status code.
+    """
+    def __init__(self, pages=50, products_per_page=PRODUCTS_PER_PAGE, latency=0.0, error_rate=0.0,
+                 throttle_rate=0.0, max_requests_per_second=None, retry_after=1, etags=True,
+                 host="127.0.0.1", port=0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_requests_per_second = max_requests_per_second
+        self.retry_after = retry_after
+        self.etags = etags
+        self.pages = []
+        for html in generate_catalog_pages(pages * products_per_page, per_page=products_per_page, seed=seed):
+            body = html.encode('utf-8')
+            self.pages.append((body, f'"{hashlib.sha256(body).hexdigest()[:16]}"'))
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._recent_requests = deque()
+        self._httpd = ThreadingHTTPServer((host, port), _CatalogRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.catalog = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def random(self):
+        with self._lock:
+            return self._random.random()
+
+    def page_number(self, path):
+        path = path.split('?', 1)[0]
+        if path in ('', '/'):
+            number = 1
+        else:
+            match = _PAGE_PATH_PATTERN.match(path)
+            if not match:
+                return None
+            number = int(match.group(1))
+        return number if 1 <= number <= len(self.pages) else None
+
+    def should_throttle(self):
+        if self.throttle_rate and self.random() < self.throttle_rate:
+            return True
+        if not self.max_requests_per_second:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._recent_requests and now - self._recent_requests[0] > 1.0:
+                self._recent_requests.popleft()
+            if len(self._recent_requests) >= self.max_requests_per_second:
+                return True
+            self._recent_requests.append(now)
+            return False
+
+    def record(self, status):
+        with self._lock:
+            self.stats[status] += 1
+
+    def start(self):
+        """Serves in a background thread and returns the base URL."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, kwargs={'poll_interval': 0.05},
+                                        name="catalog-server", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def close(self):
+        self._httpd.server_close()
+
+    def stop(self):
+        """Stops a server started with start()."""
+        self._httpd.shutdown()
+        self.close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in of the Fashion Studio catalog.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--products-per-page", type=int, default=PRODUCTS_PER_PAGE)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--max-rps", type=float, help="Answer requests above this rate with 429")
+    parser.add_argument("--no-etags", action="store_true", help="Disable ETag/If-None-Match support")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = CatalogServer(pages=args.pages, products_per_page=args.products_per_page, latency=args.latency,
+                           error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                           max_requests_per_second=args.max_rps, etags=not args.no_etags,
+                           host=args.host, port=args.port, seed=args.seed)
+    print(f"Serving {args.pages} catalog pages at {server.url} (set BASE_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main()
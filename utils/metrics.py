@@ -0,0 +1,228 @@
+import cProfile
+import functools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from .config import METRICS_ENABLED, PROFILER, PROFILE_STAGES, PROFILE_DIR
+
+try:
+    import resource
+except ImportError: # Not available on Windows; peak RSS is then reported as None
+    resource = None
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError: # pyinstrument is optional; PROFILER='cprofile' needs only the stdlib
+    PyinstrumentProfiler = None
+
+def peak_rss_bytes():
+    """Returns the peak resident set size of this process in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024 # Linux reports KiB
+
+class StageRecord:
+    """Measurements of one call of a stage; the caller fills in rows_out/bytes."""
+    def __init__(self, rows_in=None):
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.bytes = None
+
+class MetricsRecorder:
+    """
+    Thread-safe per-stage metrics: call count, wall time, CPU time of the calling thread,
+    peak RSS seen at the end of a call, rows in/out and bytes, summed over all calls.
+    Stages named in `profile_stages` ('*' for all) are also profiled with `profiler`
+    ('cprofile' or 'pyinstrument').
+    """
+    def __init__(self, enabled=METRICS_ENABLED, profiler=PROFILER, profile_stages=PROFILE_STAGES):
+        self.enabled = enabled
+        self.profiler = profiler
+        self.profile_stages = set(profile_stages or ())
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = datetime.now()
+            self._start_wall = time.perf_counter()
+            self._start_cpu = time.process_time()
+            self.stages = {}
+            self._profiles = {}
+
+    def _profiling(self, name):
+        return self.profiler and ('*' in self.profile_stages or name in self.profile_stages)
+
+    def _start_profiler(self, name):
+        if not self._profiling(name):
+            return None
+        try:
+            if self.profiler == 'pyinstrument':
+                if PyinstrumentProfiler is None:
+                    return None
+                profiler = PyinstrumentProfiler()
+                profiler.start()
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+            return profiler
+        except (RuntimeError, ValueError): # Another profiler is already active in this thread
+            return None
+
+    def _stop_profiler(self, name, profiler):
+        if self.profiler == 'pyinstrument':
+            profiler.stop()
+            with self._lock:
+                self._profiles.setdefault(name, []).append(profiler.output_text())
+        else:
+            profiler.disable()
+            with self._lock:
+                if name in self._profiles:
+                    self._profiles[name].add(profiler)
+                else:
+                    self._profiles[name] = pstats.Stats(profiler)
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Measures the enclosed block as one call of stage `name`; yields a StageRecord."""
+        record = StageRecord(rows_in)
+        if not self.enabled:
+            yield record
+            return
+        profiler = self._start_profiler(name)
+        start_wall, start_cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        finally:
+            wall, cpu = time.perf_counter() - start_wall, time.thread_time() - start_cpu
+            if profiler is not None:
+                self._stop_profiler(name, profiler)
+            peak_rss = peak_rss_bytes()
+            with self._lock:
+                stats = self.stages.setdefault(name, {
+                    'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'max_wall_seconds': 0.0,
+                    'peak_rss_bytes': None, 'rows_in': 0, 'rows_out': 0, 'bytes': 0,
+                })
+                stats['calls'] += 1
+                stats['wall_seconds'] += wall
+                stats['cpu_seconds'] += cpu
+                stats['max_wall_seconds'] = max(stats['max_wall_seconds'], wall)
+                if peak_rss is not None:
+                    stats['peak_rss_bytes'] = max(stats['peak_rss_bytes'] or 0, peak_rss)
+                stats['rows_in'] += record.rows_in or 0
+                stats['rows_out'] += record.rows_out or 0
+                stats['bytes'] += record.bytes or 0
+
+    def report(self):
+        """Returns the run report as a JSON-serialisable dict."""
+        with self._lock:
+            stages = {name: dict(stats) for name, stats in self.stages.items()}
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_seconds': time.perf_counter() - self._start_wall,
+            'cpu_seconds': time.process_time() - self._start_cpu,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'stages': stages,
+        }
+
+    def write_json(self, path):
+        """Writes the run report as JSON to `path`."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def to_prometheus(self):
+        """Returns the run report in the Prometheus text exposition format."""
+        report = self.report()
+        lines = []
+        for metric, help_text in (
+            ('wall_seconds', "Wall-clock time of the ETL run"),
+            ('cpu_seconds', "Process CPU time of the ETL run"),
+            ('peak_rss_bytes', "Peak resident set size of the ETL run"),
+        ):
+            if report[metric] is not None:
+                lines += [f"# HELP etl_run_{metric} {help_text}", f"# TYPE etl_run_{metric} gauge",
+                          f"etl_run_{metric} {report[metric]}"]
+        for metric, help_text in (
+            ('calls', "Calls of the stage"),
+            ('wall_seconds', "Total wall-clock time of the stage"),
+            ('cpu_seconds', "Total CPU time of the stage's threads"),
+            ('max_wall_seconds', "Slowest call of the stage"),
+            ('rows_in', "Rows passed into the stage"),
+            ('rows_out', "Rows produced by the stage"),
+            ('bytes', "Bytes handled by the stage"),
+        ):
+            lines += [f"# HELP etl_stage_{metric} {help_text}", f"# TYPE etl_stage_{metric} gauge"]
+            for name, stats in sorted(report['stages'].items()):
+                lines.append(f'etl_stage_{metric}{{stage="{name}"}} {stats[metric]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Writes the Prometheus text output to `path` (e.g. for the node_exporter textfile collector)."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def write_profiles(self, profile_dir=PROFILE_DIR):
+        """Writes the collected profiles to `profile_dir`: <stage>.prof (cProfile) or <stage>.txt."""
+        with self._lock:
+            profiles = dict(self._profiles)
+        if not profiles:
+            return []
+        os.makedirs(profile_dir, exist_ok=True)
+        paths = []
+        for name, profile in profiles.items():
+            file_name = name.replace(':', '_').replace(' ', '_')
+            if isinstance(profile, pstats.Stats):
+                path = os.path.join(profile_dir, f"{file_name}.prof")
+                profile.dump_stats(path)
+            else:
+                path = os.path.join(profile_dir, f"{file_name}.txt")
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write("\n".join(profile))
+            paths.append(path)
+        return paths
+
+METRICS = MetricsRecorder()
+
+def record_stage(name, rows_in=None):
+    """Measures a block as one call of stage `name` on the process-wide recorder."""
+    return METRICS.stage(name, rows_in=rows_in)
+
+def instrumented(name, rows_out=None, bytes_out=None):
+    """
+    Decorator recording every call of the function as stage `name`.
+    `rows_out`/`bytes_out` compute those counts from the function's return value.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with record_stage(name) as record:
+                result = func(*args, **kwargs)
+                if rows_out is not None:
+                    record.rows_out = rows_out(result)
+                if bytes_out is not None:
+                    record.bytes = bytes_out(result)
+                return result
+        return wrapper
+    return decorator
+
+def compare_reports(report, baseline, threshold=0.2, min_seconds=0.05):
+    """
+    Returns a message for every stage whose wall time grew by more than `threshold`
+    (a fraction) compared to `baseline`; stages faster than `min_seconds` are ignored as noise.
+    """
+    regressions = []
+    for name, stats in report['stages'].items():
+        previous = baseline.get('stages', {}).get(name)
+        if not previous or max(stats['wall_seconds'], previous['wall_seconds']) < min_seconds:
+            continue
+        if stats['wall_seconds'] > previous['wall_seconds'] * (1 + threshold):
+            regressions.append(f"{name}: {previous['wall_seconds']:.3f}s -> {stats['wall_seconds']:.3f}s")
+    return regressions
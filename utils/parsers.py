@@ -0,0 +1,169 @@
+import importlib.util
+import re
+import logging
+
+# Parser libraries are imported inside the backends, on the first parse (runs served from the
+# page cache parse nothing). lxml is optional; the BeautifulSoup backend is always available.
+
+# Pagination footer of every catalog page, e.g. "Page 1 of 50"
+_PAGE_COUNT_RE = re.compile(rb'Page\s+\d+\s+of\s+(\d+)')
+
+# Fallback values used by every backend when a field is missing from a card
+DEFAULT_TITLE = "Unknown Product"
+DEFAULT_PRICE = "Price Unavailable"
+DEFAULT_RATING = "Rating: Invalid Rating / 5"
+DEFAULT_COLORS = "0 Colors"
+DEFAULT_SIZE = "Size: Unknown"
+DEFAULT_GENDER = "Gender: Unknown"
+
+def _card_row(title, price, rating, colors, size, gender):
+    return {
+        'Title': title,
+        'Price': price,
+        'Rating': rating,
+        'Colors': colors,
+        'Size': size,
+        'Gender': gender,
+    }
+
+def parse_cards_bs4(html_content):
+    """
+    Reference backend: BeautifulSoup with the stdlib html.parser.
+    Returns one dict of raw field strings per `collection-card`.
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    rows = []
+    for card in soup.find_all('div', class_='collection-card'):
+        title_tag = card.find('h3', class_='product-title')
+        title = title_tag.text.strip() if title_tag else DEFAULT_TITLE
+
+        price_container = card.find('div', class_='price-container')
+        price_tag_p = card.find('p', class_='price') # For "Price Unavailable"
+
+        if price_container and price_container.find('span', class_='price'):
+            price = price_container.find('span', class_='price').text.strip()
+        elif price_tag_p:
+            price = price_tag_p.text.strip()
+        else:
+            price = DEFAULT_PRICE # Fallback
+
+        rating_tag = card.find('p', string=lambda text: text and "Rating:" in text)
+        rating = rating_tag.text.strip() if rating_tag else DEFAULT_RATING
+
+        colors_tag = card.find('p', string=lambda text: text and "Colors" in text)
+        colors = colors_tag.text.strip() if colors_tag else DEFAULT_COLORS
+
+        size_tag = card.find('p', string=lambda text: text and "Size:" in text)
+        size = size_tag.text.strip() if size_tag else DEFAULT_SIZE
+
+        gender_tag = card.find('p', string=lambda text: text and "Gender:" in text)
+        gender = gender_tag.text.strip() if gender_tag else DEFAULT_GENDER
+
+        rows.append(_card_row(title, price, rating, colors, size, gender))
+    return rows
+
+def _has_class(element, class_name):
+    return class_name in (element.get('class') or '').split()
+
+def _single_string(element, comment_tag):
+    """
+    Mirrors BeautifulSoup's `Tag.string`: the only string inside `element`, or None.
+    `comment_tag` is lxml's etree.Comment, the tag of comment nodes.
+    """
+    while True:
+        if element.tag is comment_tag:
+            return element.text
+        children = list(element)
+        if not children:
+            return element.text or None
+        if element.text or len(children) != 1 or children[0].tail:
+            return None
+        element = children[0]
+
+def parse_cards_lxml(html_content):
+    """
+    Fast backend: libxml2 via lxml, extracting every field of a card in a single pass
+    over its descendants instead of one `find` scan per field.
+    Produces the same rows as `parse_cards_bs4` for well-formed catalog pages.
+    """
+    import lxml.html as lxml_html
+    from lxml import etree
+    if isinstance(html_content, bytes):
+        from bs4 import UnicodeDammit
+        # Decode exactly like BeautifulSoup does so both backends see the same text
+        html_content = UnicodeDammit(html_content, is_html=True).unicode_markup
+    if not html_content.strip():
+        return []
+    root = lxml_html.document_fromstring(html_content)
+    rows = []
+    for card in root.iter('div'):
+        if not _has_class(card, 'collection-card'):
+            continue
+        title_tag = price_container = price_tag_p = None
+        rating = colors = size = gender = None
+        for element in card.iterdescendants():
+            tag = element.tag
+            if tag == 'h3':
+                if title_tag is None and _has_class(element, 'product-title'):
+                    title_tag = element
+            elif tag == 'div':
+                if price_container is None and _has_class(element, 'price-container'):
+                    price_container = element
+            elif tag == 'p':
+                if price_tag_p is None and _has_class(element, 'price'):
+                    price_tag_p = element
+                text = _single_string(element, etree.Comment)
+                if not text:
+                    continue
+                if rating is None and "Rating:" in text:
+                    rating = element.text_content().strip()
+                if colors is None and "Colors" in text:
+                    colors = element.text_content().strip()
+                if size is None and "Size:" in text:
+                    size = element.text_content().strip()
+                if gender is None and "Gender:" in text:
+                    gender = element.text_content().strip()
+
+        price_span = None
+        if price_container is not None:
+            price_span = next(
+                (span for span in price_container.iterdescendants('span') if _has_class(span, 'price')), None
+            )
+        if price_span is not None:
+            price = price_span.text_content().strip()
+        elif price_tag_p is not None:
+            price = price_tag_p.text_content().strip()
+        else:
+            price = DEFAULT_PRICE
+
+        rows.append(_card_row(
+            title_tag.text_content().strip() if title_tag is not None else DEFAULT_TITLE,
+            price,
+            rating if rating is not None else DEFAULT_RATING,
+            colors if colors is not None else DEFAULT_COLORS,
+            size if size is not None else DEFAULT_SIZE,
+            gender if gender is not None else DEFAULT_GENDER,
+        ))
+    return rows
+
+PARSER_BACKENDS = {
+    'bs4': parse_cards_bs4,
+    'lxml': parse_cards_lxml,
+}
+
+def get_parser_backend(name):
+    """Returns the card parser for `name`, falling back to 'bs4' if lxml is unavailable."""
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend '{name}'. Choose one of: {', '.join(PARSER_BACKENDS)}")
+    if name == 'lxml' and importlib.util.find_spec('lxml') is None:
+        logging.warning("lxml is not installed, falling back to the 'bs4' parser backend.")
+        return parse_cards_bs4
+    return PARSER_BACKENDS[name]
+
+def parse_page_count(html_content):
+    """Returns the total page count from a page's pagination footer, or None if it has none."""
+    if isinstance(html_content, str):
+        html_content = html_content.encode('utf-8')
+    match = _PAGE_COUNT_RE.search(html_content or b'')
+    return int(match.group(1)) if match else None
@@ -0,0 +1,107 @@
+import html
+import numpy as np
+import pandas as pd
+
+# Vocabulary of the Fashion Studio catalog
+PRODUCT_TYPES = ["T-shirt", "Hoodie", "Pants", "Outerwear", "Jacket", "Shirt", "Sweater", "Dress"]
+SIZES = ["S", "M", "L", "XL", "XXL"]
+GENDERS = ["Men", "Women", "Unisex"]
+PRODUCTS_PER_PAGE = 20
+
+def generate_raw_products(n_products, invalid_price_share=0.05, not_rated_share=0.05,
+                          duplicate_share=0.05, seed=0):
+    """
+    Returns `n_products` raw rows shaped like parse_product_data output (one DataFrame of raw
+    field strings plus Timestamp). Built with numpy, so 10M rows take seconds.
+    - invalid_price_share: 'Unknown Product' cards with 'Price Unavailable' and an invalid rating
+    - not_rated_share: valid products with 'Rating: Not Rated'
+    - duplicate_share: rows that repeat an earlier row exactly
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n_products)
+    types = np.array(PRODUCT_TYPES, dtype=object)[rng.integers(0, len(PRODUCT_TYPES), n_products)]
+    titles = pd.Series(types + " " + (ids + 1).astype(str).astype(object))
+    prices = pd.Series("$" + np.char.mod("%.2f", rng.uniform(5, 500, n_products).round(2)).astype(object))
+    ratings = pd.Series("Rating: ⭐ " + np.char.mod("%.1f", rng.integers(10, 51, n_products) / 10).astype(object) + " / 5")
+    colors = pd.Series(rng.integers(1, 6, n_products).astype(str).astype(object) + " Colors")
+    sizes = pd.Series("Size: " + np.array(SIZES, dtype=object)[rng.integers(0, len(SIZES), n_products)])
+    genders = pd.Series("Gender: " + np.array(GENDERS, dtype=object)[rng.integers(0, len(GENDERS), n_products)])
+
+    invalid = rng.random(n_products) < invalid_price_share
+    titles[invalid] = "Unknown Product"
+    prices[invalid] = "Price Unavailable"
+    ratings[invalid] = "Rating: ⭐ Invalid Rating / 5"
+    ratings[~invalid & (rng.random(n_products) < not_rated_share)] = "Rating: Not Rated"
+
+    df = pd.DataFrame({'Title': titles, 'Price': prices, 'Rating': ratings, 'Colors': colors,
+                       'Size': sizes, 'Gender': genders})
+    # Duplicates copy a random earlier row (row 0 has nothing to copy)
+    duplicates = np.flatnonzero(rng.random(n_products) < duplicate_share)
+    duplicates = duplicates[duplicates > 0]
+    if len(duplicates):
+        sources = (rng.random(len(duplicates)) * duplicates).astype(int)
+        df.iloc[duplicates] = df.iloc[sources].to_numpy()
+    df['Timestamp'] = pd.Timestamp.now()
+    return df
+
+def _card_html(row):
+    title = html.escape(row['Title'])
+    if row['Price'] == "Price Unavailable":
+        price = f'<p class="price">{html.escape(row["Price"])}</p>'
+    else:
+        price = f'<div class="price-container"><span class="price">{html.escape(row["Price"])}</span></div>'
+    details = "\n".join(
+        f'                <p style="font-size: 14px; color: #777;">{html.escape(row[field])}</p>'
+        for field in ('Rating', 'Colors', 'Size', 'Gender')
+    )
+    return f"""        <div class="collection-card">
+            <div style="position: relative;">
+                <img src="https://picsum.photos/280/350?random=1" class="collection-image" alt="{title}">
+            </div>
+            <div class="product-details">
+                <h3 class="product-title">{title}</h3>
+                {price}
+{details}
+            </div>
+        </div>
+"""
+
+def render_catalog_page(rows, page_number, total_pages):
+    """Renders raw rows (dicts of raw field strings) as a catalog page with the site's markup and pagination."""
+    previous_link = ""
+    if page_number > 1:
+        href = "/" if page_number == 2 else f"/page{page_number - 1}"
+        previous_link = f'<li class="page-item previous"><a class="page-link" href="{href}">Previous</a></li>'
+    next_link = ""
+    if page_number < total_pages:
+        next_link = f'<li class="page-item next"><a class="page-link" href="/page{page_number + 1}">Next</a></li>'
+    cards = "".join(_card_html(row) for row in rows)
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Fashion Studio</title>
+</head>
+<body>
+    <div class="container">
+        <h1>Fashion Studio</h1>
+        <div id="collectionList" class="collection-grid">
+{cards}        </div>
+        <div class="pagination">
+            <ul class="pagination">
+                {previous_link}
+                <li class="page-item current"><span class="page-link">Page {page_number} of {total_pages}</span></li>
+                {next_link}
+            </ul>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+def generate_catalog_pages(n_products, per_page=PRODUCTS_PER_PAGE, **shares):
+    """Returns the HTML of every catalog page for `n_products` synthetic products (see generate_raw_products)."""
+    rows = generate_raw_products(n_products, **shares).drop(columns='Timestamp').to_dict('records')
+    total_pages = max((len(rows) + per_page - 1) // per_page, 1)
+    return [render_catalog_page(rows[i * per_page:(i + 1) * per_page], i + 1, total_pages)
+            for i in range(total_pages)]
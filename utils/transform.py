@@ -1,10 +1,22 @@
 import pandas as pd
 import numpy as np
 import re # Impor modul regex
-from .config import USD_TO_IDR_EXCHANGE_RATE
+import sys
+import hashlib
+import importlib.util
+from functools import lru_cache
+from .config import (
+    USD_TO_IDR_EXCHANGE_RATE, TRANSFORM_ENGINE, OUTPUT_SCHEMA, CLEAN_CACHE_SIZE, USE_TRANSFORM_CACHE
+)
+from .cache import TransformCache
+from .metrics import record_stage
+from .dedup import Deduplicator, key_fingerprints
+from .diagnostics import report_parse_failure, replay_parse_failures, collect_parse_failures, parse_failure_scope
 import logging
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Patterns of the row-wise cleaners, compiled once
+_RATING_NUMBER_RE = re.compile(r'(\d+(\.\d+)?)')
+_COLORS_RE = re.compile(r"(\d+)\s*(Color|Colors)", re.IGNORECASE)
 
 def clean_price(price_str):
     """Cleans and converts price string to float (USD) or NaN."""
@@ -13,7 +25,7 @@ def clean_price(price_str):
             return np.nan
         return float(price_str.replace('$', '').replace(',', ''))
     except (ValueError, TypeError) as e:
-        logging.warning(f"Could not parse price '{price_str}': {e}")
+        report_parse_failure('Price', type(e).__name__, price_str, "Could not parse price '%s': %s", price_str, e)
         return np.nan
 
 # utils/transform.py
@@ -25,7 +37,7 @@ def convert_price_to_idr(price_usd):
         # Biarkan sebagai float untuk mengakomodasi nilai desimal
         return float(price_usd * USD_TO_IDR_EXCHANGE_RATE) # Ubah int() menjadi float()
     except (ValueError, TypeError) as e:
-        logging.warning(f"Could not convert price '{price_usd}' to IDR: {e}")
+        report_parse_failure('Price', type(e).__name__, price_usd, "Could not convert price '%s' to IDR: %s", price_usd, e)
         return np.nan
 
 def clean_rating(rating_str):
@@ -44,18 +56,19 @@ def clean_rating(rating_str):
         # Hilangkan bagian "Rating: " dan emoji bintang "⭐" serta spasi ekstra
         # Menggunakan regex untuk mencari angka desimal (atau integer)
         # Pola ini mencari satu atau lebih digit, diikuti opsional oleh titik dan satu atau lebih digit
-        match = re.search(r'(\d+(\.\d+)?)', rating_str)
+        match = _RATING_NUMBER_RE.search(rating_str)
         
         if match:
             rating_value_str = match.group(1) # Ambil angka yang cocok
             return float(rating_value_str)
         else:
             # Jika tidak ada angka yang cocok setelah pembersihan awal
-            logging.warning(f"Could not extract numeric rating from '{rating_str}' after basic cleaning.")
+            report_parse_failure('Rating', 'no number', rating_str,
+                                 "Could not extract numeric rating from '%s' after basic cleaning.", rating_str)
             return np.nan
 
     except Exception as e: # Tangkap exception yang lebih umum juga
-        logging.warning(f"Could not parse rating '{rating_str}': {e}")
+        report_parse_failure('Rating', type(e).__name__, rating_str, "Could not parse rating '%s': %s", rating_str, e)
         return np.nan
 
 def clean_colors(colors_str):
@@ -68,14 +81,16 @@ def clean_colors(colors_str):
         s = str(colors_str).strip()
         
         # Cari angka di awal string, diikuti oleh "Color" atau "Colors"
-        match = re.match(r"(\d+)\s*(Color|Colors)", s, re.IGNORECASE) # re.IGNORECASE untuk menangani "color" atau "colors"
+        match = _COLORS_RE.match(s) # re.IGNORECASE untuk menangani "color" atau "colors"
         if match:
             return int(match.group(1))
         
-        logging.warning(f"Could not parse numeric colors from '{colors_str}', defaulting to 0.")
+        report_parse_failure('Colors', 'no color count', colors_str,
+                             "Could not parse numeric colors from '%s', defaulting to 0.", colors_str)
         return 0 # Jika format tidak cocok atau tidak ada angka
     except (ValueError, TypeError) as e:
-        logging.warning(f"Error parsing colors '{colors_str}': {e}, defaulting to 0.")
+        report_parse_failure('Colors', type(e).__name__, colors_str,
+                             "Error parsing colors '%s': %s, defaulting to 0.", colors_str, e)
         return 0
 
 def clean_size(size_str):
@@ -83,9 +98,9 @@ def clean_size(size_str):
     try:
         if not size_str or "Size: " not in size_str:
             return "Unknown"
-        return size_str.replace('Size: ', '').strip()
+        return sys.intern(size_str.replace('Size: ', '').strip()) # Few distinct sizes; share one object each
     except TypeError as e:
-        logging.warning(f"Could not parse size '{size_str}': {e}")
+        report_parse_failure('Size', type(e).__name__, size_str, "Could not parse size '%s': %s", size_str, e)
         return "Unknown"
 
 
@@ -94,14 +109,297 @@ def clean_gender(gender_str):
     try:
         if not gender_str or "Gender: " not in gender_str:
             return "Unknown"
-        return gender_str.replace('Gender: ', '').strip()
+        return sys.intern(gender_str.replace('Gender: ', '').strip())
     except TypeError as e:
-        logging.warning(f"Could not parse gender '{gender_str}': {e}")
+        report_parse_failure('Gender', type(e).__name__, gender_str, "Could not parse gender '%s': %s", gender_str, e)
         return "Unknown"
 
-def transform_data(df_raw):
+# --- Vectorized column cleaners ---
+# Each cleaner recognises the exact shapes the catalog produces ("$1,234.56",
+# "Rating: ⭐ 4.8 / 5", "3 Colors", "Size: M", ...) with anchored, ASCII-only patterns and
+# converts them with pandas string accessors (Arrow compute kernels when pyarrow is
+# installed). Any other non-empty value is handed to its row-wise clean_* function, which
+# stays the reference implementation, so results are identical to the row-wise engine.
+
+_PRICE_PATTERN = r'\$(?:[0-9]{1,3}(?:,[0-9]{3})+|[0-9]+)(?:\.[0-9]+)?'
+_RATING_PATTERN = r'Rating: (?:⭐ )?[0-9]+(?:\.[0-9]+)? ?/ ?5'
+_COLORS_PATTERN = r'[0-9]+ Colors?'
+_LABEL_VALUE_PATTERN = r'[A-Za-z0-9]+(?: [A-Za-z0-9]+)*'
+
+# Arrow-backed string kernels when pyarrow is installed (pandas imports it on first use)
+_STRING_DTYPE = "string[pyarrow]" if importlib.util.find_spec('pyarrow') is not None else object
+
+def _as_strings(series):
+    """Returns `series` as a string column, or None if it holds non-string values."""
+    if pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty'):
+        return None
+    return series.astype(_STRING_DTYPE)
+
+def _as_mask(result):
+    """Turns a `.str` predicate result (NA for nulls) into a plain boolean mask."""
+    return result.eq(True).to_numpy(dtype=bool, na_value=False)
+
+def _fill_rest(result, values, fast, row_cleaner):
+    """Cleans the non-null values the fast path did not match with the row-wise reference function."""
+    rest = ~fast & values.notna().to_numpy(dtype=bool)
+    if rest.any():
+        result[rest] = values[rest].map(row_cleaner).to_numpy()
+    return result
+
+def clean_price_series(prices):
+    """Vectorized `clean_price`: price strings to float USD or NaN."""
+    strings = _as_strings(prices)
+    if strings is None:
+        return prices.apply(clean_price).astype('float64')
+    result = np.full(len(prices), np.nan)
+    fast = _as_mask(strings.str.fullmatch(_PRICE_PATTERN))
+    result[fast] = strings[fast].str.replace('$', '', regex=False).str.replace(',', '', regex=False).astype('float64').to_numpy()
+    return pd.Series(_fill_rest(result, prices, fast, clean_price), index=prices.index)
+
+def convert_price_to_idr_series(prices_usd):
+    """Vectorized `convert_price_to_idr`: USD floats to IDR floats (NaN stays NaN)."""
+    if not pd.api.types.is_numeric_dtype(prices_usd):
+        return prices_usd.apply(convert_price_to_idr).astype('float64')
+    return prices_usd.astype('float64') * USD_TO_IDR_EXCHANGE_RATE
+
+def clean_rating_series(ratings):
+    """Vectorized `clean_rating`: rating strings to float or NaN."""
+    strings = _as_strings(ratings)
+    if strings is None:
+        return ratings.apply(clean_rating).astype('float64')
+    result = np.full(len(ratings), np.nan)
+    fast = _as_mask(strings.str.fullmatch(_RATING_PATTERN))
+    numbers = strings[fast].str.replace(r'^Rating: (?:⭐ )?', '', regex=True).str.replace(r' ?/ ?5$', '', regex=True)
+    result[fast] = numbers.astype('float64').to_numpy()
+    return pd.Series(_fill_rest(result, ratings, fast, clean_rating), index=ratings.index)
+
+def clean_colors_series(colors):
+    """Vectorized `clean_colors`: '5 Colors'/'1 Color' strings to int, 0 otherwise."""
+    strings = _as_strings(colors)
+    if strings is None:
+        return colors.apply(clean_colors).astype('int64')
+    result = np.zeros(len(colors), dtype='int64')
+    fast = _as_mask(strings.str.fullmatch(_COLORS_PATTERN))
+    result[fast] = strings[fast].str.replace(r' Colors?$', '', regex=True).astype('int64').to_numpy()
+    return pd.Series(_fill_rest(result, colors, fast, clean_colors), index=colors.index)
+
+def _strip_label_series(values, prefix, row_cleaner):
+    strings = _as_strings(values)
+    if strings is None:
+        return values.apply(row_cleaner)
+    result = np.full(len(values), "Unknown", dtype=object)
+    fast = _as_mask(strings.str.fullmatch(prefix + _LABEL_VALUE_PATTERN))
+    result[fast] = strings[fast].str.slice(len(prefix)).astype(object).to_numpy()
+    return pd.Series(_fill_rest(result, values, fast, row_cleaner), index=values.index)
+
+def clean_size_series(sizes):
+    """Vectorized `clean_size`: 'Size: M' strings to 'M', 'Unknown' otherwise."""
+    return _strip_label_series(sizes, 'Size: ', clean_size)
+
+def clean_gender_series(genders):
+    """Vectorized `clean_gender`: 'Gender: Men' strings to 'Men', 'Unknown' otherwise."""
+    return _strip_label_series(genders, 'Gender: ', clean_gender)
+
+# --- Memoized cleaners ---
+# Raw Rating/Colors/Size/Gender strings take only a few dozen distinct values, so each
+# distinct raw string is cleaned once: row-wise through a bounded LRU keyed on the raw
+# string, column-wise by cleaning the unique values of the column and mapping them back.
+
+_MEMOIZED_CLEANERS = {}
+
+def memoized(cleaner, maxsize=None):
+    """
+    Returns `cleaner` wrapped in a bounded LRU cache (CLEAN_CACHE_SIZE entries by default)
+    keyed on the raw string. Non-string values are passed through uncached. Parse failures
+    are cached with the result and reported again on every cache hit.
+    """
+    key = (cleaner, maxsize)
+    if key not in _MEMOIZED_CLEANERS:
+        @lru_cache(maxsize=maxsize or CLEAN_CACHE_SIZE)
+        def cached(value):
+            with collect_parse_failures(keep_records=True) as failures:
+                result = cleaner(value)
+            return result, tuple(failures.records)
+        def memoized_cleaner(value):
+            if type(value) is not str:
+                return cleaner(value)
+            result, failures = cached(value)
+            if failures:
+                replay_parse_failures(failures)
+            return result
+        memoized_cleaner.cache_info = cached.cache_info
+        memoized_cleaner.cache_clear = cached.cache_clear
+        _MEMOIZED_CLEANERS[key] = memoized_cleaner
+    return _MEMOIZED_CLEANERS[key]
+
+def clear_memoized_cleaners():
+    """Empties the LRU cache of every memoized cleaner."""
+    for memoized_cleaner in _MEMOIZED_CLEANERS.values():
+        memoized_cleaner.cache_clear()
+
+def map_unique(values, cleaner):
+    """
+    Cleans a column by applying `cleaner` once per distinct non-null value; nulls are
+    cleaned per row. Parse failures of a distinct value count once per row holding it.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    occurrences = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    cleaned = []
+    for value, count in zip(uniques, occurrences):
+        with collect_parse_failures(keep_records=True) as failures:
+            cleaned.append(cleaner(value))
+        replay_parse_failures(failures.records, count=int(count))
+    nulls = np.flatnonzero(codes < 0)
+    if len(nulls):
+        codes = codes.copy()
+        codes[nulls] = len(cleaned) + np.arange(len(nulls))
+        cleaned += [cleaner(value) for value in values.iloc[nulls]]
+    lookup = pd.Series(cleaned, dtype=None if cleaned else object).to_numpy() # Same dtype inference as Series.apply
+    return pd.Series(lookup.take(codes), index=values.index)
+
+# Steps of the memoized engine that clean low-cardinality columns; the others use <name>_series
+MEMOIZED_STEPS = ('clean_rating', 'clean_colors', 'clean_size', 'clean_gender')
+
+# Cleaning steps: (clean_* function name, target column, source column). The rowwise engine
+# applies the function per value, the vectorized engine calls its <name>_series counterpart.
+# Each step is recorded as a metrics stage under the function name.
+CLEANING_STEPS = [
+    ('clean_price', 'Price_USD', 'Price'),
+    ('convert_price_to_idr', 'Price', 'Price_USD'),
+    ('clean_rating', 'Rating', 'Rating'),
+    ('clean_colors', 'Colors', 'Colors'),
+    ('clean_size', 'Size', 'Size'),
+    ('clean_gender', 'Gender', 'Gender'),
+]
+
+def _clean_columns(df, clean_column):
+    """Runs CLEANING_STEPS on `df` in place; rows_out of each stage is its count of non-null values."""
+    for name, target, source in CLEANING_STEPS:
+        with record_stage(name, rows_in=len(df)) as stage:
+            df[target] = clean_column(name, df[source])
+            stage.rows_out = int(df[target].notna().sum())
+
+def _clean_columns_rowwise(df):
+    # Functions are looked up at call time so they can be patched
+    _clean_columns(df, lambda name, values: values.apply(globals()[name]))
+
+def _clean_columns_vectorized(df):
+    _clean_columns(df, lambda name, values: globals()[f"{name}_series"](values))
+
+def _clean_memoized_column(name, values):
+    if name not in MEMOIZED_STEPS:
+        return globals()[f"{name}_series"](values)
+    return map_unique(values, memoized(globals()[name]))
+
+def _clean_columns_memoized(df):
+    _clean_columns(df, _clean_memoized_column)
+
+TRANSFORM_ENGINES = {
+    'rowwise': _clean_columns_rowwise,
+    'vectorized': _clean_columns_vectorized,
+    'memoized': _clean_columns_memoized,
+}
+
+# --- Per-page transform cache ---
+# Extracted rows carry their Page number. A page's cleaned columns are cached under a hash
+# of its raw rows, so a run only cleans the pages whose content changed since an earlier run.
+
+RAW_COLUMNS = ['Title', 'Price', 'Rating', 'Colors', 'Size', 'Gender']
+CLEANED_COLUMNS = list(dict.fromkeys(target for _, target, _ in CLEANING_STEPS))
+# Bump when the clean_* functions change, so results cached by older code are not reused
+TRANSFORM_CACHE_VERSION = 1
+
+def page_content_key(row_fingerprints, engine):
+    """
+    Returns the transform cache key of one page: a SHA-256 of the 64-bit fingerprints of its
+    raw rows (utils.dedup.key_fingerprints over RAW_COLUMNS) and of the cleaning setup.
+    """
+    digest = hashlib.sha256(f"{TRANSFORM_CACHE_VERSION}|{engine}|{USD_TO_IDR_EXCHANGE_RATE}|".encode('utf-8'))
+    digest.update(np.ascontiguousarray(row_fingerprints).tobytes())
+    return digest.hexdigest()
+
+def _clean_pages(df, engine, cache):
+    """
+    Cleans `df` page by page through `cache` (a utils.cache.TransformCache): pages cleaned
+    before are read from the cache, the others are cleaned together by the engine and stored.
+    Returns the CLEANED_COLUMNS of every row of `df`, in row order.
+    """
+    parts = []
+    changed = []
+    fingerprints = key_fingerprints(df, RAW_COLUMNS) # Hashing every row at once beats hashing page by page
+    pages = df.groupby('Page', sort=False, dropna=False).indices
+    for rows in pages.values():
+        key = page_content_key(fingerprints[rows], engine)
+        cleaned = cache.get(key)
+        if cleaned is not None and len(cleaned) == len(rows):
+            parts.append(cleaned.set_axis(rows))
+        else:
+            changed.append((key, rows))
+    logging.info(f"Transform cache: reusing {len(pages) - len(changed)} of {len(pages)} page(s).")
+
+    if changed:
+        changed_rows = np.concatenate([rows for _, rows in changed])
+        fresh = df.iloc[changed_rows].copy()
+        TRANSFORM_ENGINES[engine](fresh)
+        fresh = fresh[CLEANED_COLUMNS].set_axis(changed_rows)
+        start = 0
+        for key, rows in changed:
+            cache.put(key, fresh.iloc[start:start + len(rows)].reset_index(drop=True))
+            start += len(rows)
+        parts.append(fresh)
+    return pd.concat(parts).sort_index()
+
+# Column dtypes of the standard output schema
+STANDARD_DTYPES = {
+    'Title': 'object',
+    'Price': 'float64',
+    'Rating': 'float64',
+    'Colors': 'int64',
+    'Size': 'object',
+    'Gender': 'object',
+    'Timestamp': 'datetime64[ns]',
+}
+
+# Column dtypes of the compact output schema (see to_compact_schema)
+COMPACT_DTYPES = {
+    'Title': _STRING_DTYPE if _STRING_DTYPE is not object else 'string',
+    'Price': 'float64',
+    'Rating': 'float32',
+    'Colors': 'int8',
+    'Size': 'category',
+    'Gender': 'category',
+    'Timestamp': 'datetime64[ns]',
+}
+
+OUTPUT_DTYPES = {'standard': STANDARD_DTYPES, 'compact': COMPACT_DTYPES}
+
+def to_compact_schema(df):
+    """
+    Converts a transformed DataFrame to the compact schema: categorical Size/Gender,
+    float32 Rating, the smallest integer type that holds Colors (int8 for catalog data)
+    and Arrow-backed strings for Title. Converts the columns of `df` in place and returns it.
+    """
+    df['Title'] = df['Title'].astype(COMPACT_DTYPES['Title'])
+    df['Rating'] = df['Rating'].astype(COMPACT_DTYPES['Rating'])
+    df['Colors'] = pd.to_numeric(df['Colors'], downcast='integer')
+    df['Size'] = df['Size'].astype(COMPACT_DTYPES['Size'])
+    df['Gender'] = df['Gender'].astype(COMPACT_DTYPES['Gender'])
+    return df
+
+def transform_data(df_raw, engine=None, schema=None, deduplicator=None, cache=None):
     """
     Transforms the raw DataFrame: cleans data, converts types, removes duplicates/nulls.
+    `engine` selects how columns are cleaned: 'memoized' (each distinct raw value cleaned once),
+    'vectorized' (pandas string accessors) or 'rowwise' (the per-value clean_* functions);
+    TRANSFORM_ENGINE by default.
+    `schema` selects the output dtypes: 'standard' (object/float64/int64 columns) or
+    'compact' (see to_compact_schema); OUTPUT_SCHEMA by default.
+    Duplicate rows (same DEDUP_KEY_COLUMNS) are dropped by a utils.dedup.Deduplicator.
+    When transforming a stream of chunks, pass the same `deduplicator` to every call so
+    rows whose key was already seen in an earlier chunk (or run) are dropped too.
+    Raw rows that carry their Page number are cleaned page by page through `cache` (a
+    utils.cache.TransformCache, the on-disk one when USE_TRANSFORM_CACHE is set), so only
+    changed pages are cleaned; parse failures of reused pages are not reported again.
     Includes error handling for overall transformation process.
     """
     if df_raw.empty:
@@ -110,17 +408,25 @@ def transform_data(df_raw):
     
     logging.info("Starting data transformation...")
     try:
+        engine = engine or TRANSFORM_ENGINE
+        if engine not in TRANSFORM_ENGINES:
+            raise ValueError(f"Unknown transform engine '{engine}'. Choose one of: {', '.join(TRANSFORM_ENGINES)}")
+        schema = schema or OUTPUT_SCHEMA
+        if schema not in ('standard', 'compact'):
+            raise ValueError(f"Unknown output schema '{schema}'. Choose 'standard' or 'compact'.")
         df = df_raw.copy()
 
-        # Clean and convert Price
-        df['Price_USD'] = df['Price'].apply(clean_price)
-        df['Price'] = df['Price_USD'].apply(convert_price_to_idr)
-        
-        # Clean other columns
-        df['Rating'] = df['Rating'].apply(clean_rating)
-        df['Colors'] = df['Colors'].apply(clean_colors)
-        df['Size'] = df['Size'].apply(clean_size)
-        df['Gender'] = df['Gender'].apply(clean_gender)
+        # Clean and convert Price, then the other columns; parse failures are summarised
+        # once per run (see utils/diagnostics.py) instead of logged per value
+        if cache is None and USE_TRANSFORM_CACHE:
+            cache = TransformCache()
+        with parse_failure_scope():
+            if cache is not None and 'Page' in df:
+                cleaned = _clean_pages(df, engine, cache)
+                for column in CLEANED_COLUMNS:
+                    df[column] = cleaned[column].to_numpy()
+            else:
+                TRANSFORM_ENGINES[engine](df)
         
         # Remove "Unknown Product" titles
         df = df[df['Title'] != "Unknown Product"]
@@ -128,8 +434,10 @@ def transform_data(df_raw):
         # Drop rows with NaN in critical columns that make the data unusable
         df.dropna(subset=['Price', 'Rating', 'Title'], inplace=True)
 
-        # Remove duplicates
-        df.drop_duplicates(subset=['Title', 'Price', 'Size', 'Gender', 'Colors'], keep='first', inplace=True)
+        # Remove duplicates by 64-bit fingerprints of the key columns
+        if deduplicator is None:
+            deduplicator = Deduplicator()
+        df = deduplicator.drop_duplicates(df)
         
         # Ensure correct data types
         df['Timestamp'] = pd.to_datetime(df['Timestamp'])
@@ -140,6 +448,9 @@ def transform_data(df_raw):
         df['Size'] = df['Size'].astype(str)
         df['Gender'] = df['Gender'].astype(str)
 
+        if schema == 'compact':
+            to_compact_schema(df)
+
         # Select and reorder columns for the final dataset
         final_columns = ['Title', 'Price', 'Rating', 'Colors', 'Size', 'Gender', 'Timestamp']
         df = df[final_columns]